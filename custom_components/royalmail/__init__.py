@@ -1,78 +1,17 @@
-"""The Royal Mail integration."""
+"""The Royal Mail integration.
 
-from __future__ import annotations
-
-import asyncio
-
-from homeassistant.config_entries import ConfigEntry, ConfigEntryState
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
-import homeassistant.helpers.config_validation as cv
-from homeassistant.helpers.typing import ConfigType
-
-from .const import DOMAIN
-from .services import async_cleanup_services, async_setup_services
-
-PLATFORMS = [Platform.SENSOR]
-CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
-
-
-async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Set up platform from a ConfigEntry."""
-    hass.data.setdefault(DOMAIN, {})
-    hass_data = dict(entry.data)
-
-    # Register services when the first config entry is added
-    if not hass.data[DOMAIN]:
-        async_setup_services(hass)
-
-    # Registers update listener to update config entry when options are updated.
-    unsub_options_update_listener = entry.add_update_listener(options_update_listener)
+Home Assistant's entry points live in entry.py and are only imported when
+first used, so the API client and command line run without Home Assistant.
+"""
 
-    # Use async_on_unload to register the listener without storing it in entry data
-    entry.async_on_unload(unsub_options_update_listener)
-
-    hass.data[DOMAIN][entry.entry_id] = hass_data
-    # Forward the setup to each platform.
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    return True
-
-
-async def options_update_listener(hass: HomeAssistant, config_entry: ConfigEntry):
-    """Handle options update."""
-    entry_state = hass.config_entries.async_get_entry(config_entry.entry_id).state
-
-    # Proceed only if the entry is in a valid state (loaded, etc.)
-    if entry_state not in (
-        ConfigEntryState.SETUP_IN_PROGRESS,
-        ConfigEntryState.SETUP_RETRY,
-    ):
-        await hass.config_entries.async_reload(config_entry.entry_id)
-
-
-async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
-    """Unload a config entry."""
-    unload_ok = all(
-        await asyncio.gather(
-            *[
-                hass.config_entries.async_forward_entry_unload(entry, platform)
-                for platform in PLATFORMS
-            ]
-        )
-    )
-
-    # Remove config entry from domain.
-    if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
-
-    # If this was the last config entry, unregister the services
-    if not hass.data[DOMAIN]:
-        async_cleanup_services(hass)
+from __future__ import annotations
 
-    return unload_ok
+import importlib
+from typing import Any
 
 
-async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
-    """Set up the Royal Mail component from yaml configuration."""
-    hass.data.setdefault(DOMAIN, {})
-    return True
+def __getattr__(name: str) -> Any:
+    """Return an entry point, importing the integration on first use."""
+    if name.startswith("__"):
+        raise AttributeError(name)
+    return getattr(importlib.import_module(f"{__name__}.entry"), name)
@@ -0,0 +1,60 @@
+"""Decoded JSON cache for Royal Mail API responses."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import time
+from typing import Any
+
+from aiohttp import ClientResponse
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util.json import json_loads
+
+from .const import BODY_CACHE_TTL, JSON_EXECUTOR_BYTES
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RoyalMailBodyCache:
+    """Decode each distinct response body only once.
+
+    Bodies are hashed as raw bytes, so a body identical to the last one for
+    the same URL returns the same decoded object without parsing it again.
+    Callers can then compare results by identity to skip unchanged items,
+    and must treat them as read only.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Init."""
+        self.hass = hass
+        self._bodies: dict[str, tuple[float, bytes, Any]] = {}
+
+    async def async_json(self, url: str, resp: ClientResponse) -> Any:
+        """Return the decoded body of a response to url."""
+        raw = await resp.read()
+        digest = hashlib.blake2b(raw, digest_size=16).digest()
+
+        cached = self._bodies.get(url)
+        if cached is not None and cached[1] == digest:
+            self._bodies[url] = (time.monotonic(), digest, cached[2])
+            return cached[2]
+
+        if not raw.strip():
+            decoded = None
+        elif len(raw) > JSON_EXECUTOR_BYTES:
+            # Long documents would block the event loop while parsing
+            decoded = await self.hass.async_add_executor_job(json_loads, raw)
+        else:
+            decoded = json_loads(raw)
+
+        self._bodies[url] = (time.monotonic(), digest, decoded)
+        return decoded
+
+    def prune(self) -> None:
+        """Forget bodies that have not been seen for a while."""
+        cutoff = time.monotonic() - BODY_CACHE_TTL.total_seconds()
+        for url, (seen, _, _) in list(self._bodies.items()):
+            if seen < cutoff:
+                del self._bodies[url]
@@ -0,0 +1,108 @@
+"""Royal Mail parcels grouped by status."""
+
+from __future__ import annotations
+
+from .const import (
+    BUCKET_AWAITING_COLLECTION,
+    BUCKET_DELIVERED,
+    BUCKET_DELIVERY_FAILED,
+    BUCKET_DUE_TODAY,
+    BUCKET_IN_TRANSIT,
+    CATEGORY_AVAILABLE_FOR_COLLECTION,
+    CATEGORY_COLLECTED,
+    CATEGORY_DELIVERED,
+    CATEGORY_DELIVERY_FAILED,
+    CATEGORY_IN_TRANSIT,
+    CATEGORY_OTHER,
+    CATEGORY_OUT_FOR_DELIVERY,
+    CONF_EVENTCODE,
+    CONF_EVENTS,
+    PARCEL_AVAILABLE_FOR_COLLECTION,
+    PARCEL_COLLECTED,
+    PARCEL_DELIVERED,
+    PARCEL_DELIVERY_FAILED,
+    PARCEL_DELIVERY_TODAY,
+    PARCEL_IN_TRANSIT,
+    STATUS_BUCKETS,
+)
+
+BUCKETS = (
+    BUCKET_IN_TRANSIT,
+    BUCKET_DUE_TODAY,
+    BUCKET_DELIVERY_FAILED,
+    BUCKET_AWAITING_COLLECTION,
+    BUCKET_DELIVERED,
+)
+
+
+def event_category(event_code: str | None) -> str:
+    """Return the broad category of a tracking event code."""
+    if event_code in PARCEL_DELIVERED:
+        return CATEGORY_DELIVERED
+    if event_code in PARCEL_DELIVERY_FAILED:
+        return CATEGORY_DELIVERY_FAILED
+    if event_code in PARCEL_DELIVERY_TODAY:
+        return CATEGORY_OUT_FOR_DELIVERY
+    if event_code == PARCEL_AVAILABLE_FOR_COLLECTION:
+        return CATEGORY_AVAILABLE_FOR_COLLECTION
+    if event_code == PARCEL_COLLECTED:
+        return CATEGORY_COLLECTED
+    if event_code in PARCEL_IN_TRANSIT:
+        return CATEGORY_IN_TRANSIT
+    return CATEGORY_OTHER
+
+
+def parcel_bucket(parcel: dict | None) -> str:
+    """Return the status bucket of a parcel from its last event."""
+    events = (parcel or {}).get(CONF_EVENTS) or [{}]
+    category = event_category(events[0].get(CONF_EVENTCODE))
+    return STATUS_BUCKETS.get(category, BUCKET_IN_TRANSIT)
+
+
+class RoyalMailStatusBuckets:
+    """Parcel ids by status, kept up to date by moving changed parcels only.
+
+    Unchanged parcels are the same decoded objects from one refresh to the
+    next, so only parcels that are new, changed or gone are classified.
+    Each bucket has a version that changes whenever its contents do.
+    """
+
+    def __init__(self) -> None:
+        """Init."""
+        # Dicts keep parcels in the order they entered the bucket
+        self._buckets: dict[str, dict[str, None]] = {bucket: {} for bucket in BUCKETS}
+        self._parcels: dict[str, tuple[dict | None, str]] = {}
+        self.versions: dict[str, int] = dict.fromkeys(BUCKETS, 0)
+
+    def ids(self, bucket: str) -> list[str]:
+        """Return the ids of the parcels in a bucket."""
+        return list(self._buckets[bucket])
+
+    def count(self, bucket: str) -> int:
+        """Return the number of parcels in a bucket."""
+        return len(self._buckets[bucket])
+
+    def update(self, parcels: dict[str, dict | None]) -> None:
+        """Move the parcels whose status changed since the last update."""
+        for mail_piece_id in self._parcels.keys() - parcels.keys():
+            _, bucket = self._parcels.pop(mail_piece_id)
+            self._move(mail_piece_id, bucket, None)
+
+        for mail_piece_id, parcel in parcels.items():
+            known = self._parcels.get(mail_piece_id)
+            if known is not None and known[0] is parcel:
+                continue
+            bucket = parcel_bucket(parcel)
+            self._parcels[mail_piece_id] = (parcel, bucket)
+            self._move(mail_piece_id, known[1] if known else None, bucket)
+
+    def _move(self, mail_piece_id: str, old: str | None, new: str | None) -> None:
+        """Move a parcel between buckets."""
+        if old == new:
+            return
+        if old is not None:
+            del self._buckets[old][mail_piece_id]
+            self.versions[old] += 1
+        if new is not None:
+            self._buckets[new][mail_piece_id] = None
+            self.versions[new] += 1
@@ -0,0 +1,225 @@
+"""Look up Royal Mail items from the command line.
+
+Reference numbers are read one per line from files or stdin, and one JSON
+object per item is written to stdout as each lookup completes::
+
+    ROYALMAIL_USERNAME=... ROYALMAIL_PASSWORD=... \\
+        python -m custom_components.royalmail.cli references.txt > results.jsonl
+
+Only a bounded queue of references is held in memory, so inputs of any
+size can be streamed through.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import Iterator
+import fileinput
+import json
+import logging
+import os
+import sys
+from typing import Any, TextIO
+
+from aiohttp import ClientSession, TCPConnector
+
+from .buckets import parcel_bucket
+from .client import TRANSIENT_ERRORS, RoyalMailClient, RoyalMailError
+from .const import (
+    API_HOST,
+    ATTR_CODE,
+    ATTR_DETAILS,
+    ATTR_MAILPIECE_ID,
+    ATTR_STATUS,
+    ATTR_TIME,
+    CONF_EVENTCODE,
+    CONF_EVENTDATETIME,
+    CONF_EVENTNAME,
+    CONF_EVENTS,
+    CONF_PASSWORD,
+    CONF_PRODUCT_NAME,
+    CONF_SUMMARY,
+    CONF_USERNAME,
+    RATE_LIMIT_RATE,
+)
+from .ratelimit import HostBackoff, RateLimitedSession, RoyalMailRateLimiter
+from .session import API_TIMEOUT
+
+_LOGGER = logging.getLogger(__name__)
+
+ENV_USERNAME = "ROYALMAIL_USERNAME"
+ENV_PASSWORD = "ROYALMAIL_PASSWORD"
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RETRIES = 3
+RETRY_DELAY = 2.0
+
+
+def parcel_result(mail_piece_id: str, parcel: dict, full: bool = False) -> dict:
+    """Return the output line for a mail piece."""
+    event = (parcel.get(CONF_EVENTS) or [{}])[0]
+    result = {
+        ATTR_MAILPIECE_ID: mail_piece_id,
+        ATTR_STATUS: parcel_bucket(parcel),
+        CONF_PRODUCT_NAME: (parcel.get(CONF_SUMMARY) or {}).get(CONF_PRODUCT_NAME),
+        ATTR_CODE: event.get(CONF_EVENTCODE),
+        "name": event.get(CONF_EVENTNAME),
+        ATTR_TIME: event.get(CONF_EVENTDATETIME),
+    }
+    if full:
+        result[ATTR_DETAILS] = parcel
+    return result
+
+
+async def async_lookup(
+    client: RoyalMailClient,
+    backoff: HostBackoff,
+    mail_piece_id: str,
+    retries: int = DEFAULT_RETRIES,
+    full: bool = False,
+) -> dict[str, Any]:
+    """Look up one mail piece, retrying transient failures."""
+    attempt = 0
+    while True:
+        try:
+            parcel = await client.async_get_mailpiece(mail_piece_id)
+        except TRANSIENT_ERRORS as err:
+            if attempt >= retries:
+                return {ATTR_MAILPIECE_ID: mail_piece_id, "error": repr(err)}
+            delay = max(backoff.remaining(API_HOST), RETRY_DELAY * 2**attempt)
+            _LOGGER.debug("Retrying %s in %.0fs: %r", mail_piece_id, delay, err)
+            await asyncio.sleep(delay)
+            attempt += 1
+        except RoyalMailError as err:
+            return {ATTR_MAILPIECE_ID: mail_piece_id, "error": str(err)}
+        else:
+            return parcel_result(mail_piece_id, parcel, full)
+
+
+async def _async_produce(queue: asyncio.Queue[str | None], lines: Iterator[str]):
+    """Queue references as they are read, waiting while the queue is full."""
+    loop = asyncio.get_running_loop()
+    # Reading happens in a thread, so a slow pipe does not stall lookups
+    while (line := await loop.run_in_executor(None, next, lines, None)) is not None:
+        if reference := line.strip():
+            await queue.put(reference)
+
+
+async def _async_work(
+    queue: asyncio.Queue[str | None],
+    client: RoyalMailClient,
+    backoff: HostBackoff,
+    args: argparse.Namespace,
+    out: TextIO,
+) -> int:
+    """Look up queued references until told to stop, returning the failures.
+
+    Every reference gets an output line, so one bad item never stops the
+    worker and leaves the producer waiting on a full queue.
+    """
+    failures = 0
+    while (reference := await queue.get()) is not None:
+        try:
+            result = await async_lookup(
+                client, backoff, reference, args.retries, args.full
+            )
+        except Exception as err:
+            _LOGGER.debug("Unable to look up %s", reference, exc_info=True)
+            result = {ATTR_MAILPIECE_ID: reference, "error": repr(err)}
+        finally:
+            queue.task_done()
+        failures += "error" in result
+        out.write(json.dumps(result, separators=(",", ":")) + "\n")
+        out.flush()
+    queue.task_done()
+    return failures
+
+
+async def async_main(args: argparse.Namespace, username: str, password: str) -> int:
+    """Log in, then stream lookups of every reference to stdout."""
+    limiter = RoyalMailRateLimiter(rate=args.rate)
+    backoff = HostBackoff()
+    connector = TCPConnector(limit_per_host=args.concurrency)
+    async with ClientSession(connector=connector, timeout=API_TIMEOUT) as http:
+        client = RoyalMailClient(
+            RateLimitedSession(http, limiter, backoff),
+            {CONF_USERNAME: username, CONF_PASSWORD: password},
+        )
+        try:
+            await client.async_login()
+        except (RoyalMailError, *TRANSIENT_ERRORS) as err:
+            _LOGGER.error("Unable to log in to Royal Mail: %s", err)
+            return 2
+
+        status = 0
+        queue: asyncio.Queue[str | None] = asyncio.Queue(maxsize=args.concurrency * 2)
+        workers = [
+            asyncio.create_task(_async_work(queue, client, backoff, args, sys.stdout))
+            for _ in range(args.concurrency)
+        ]
+        try:
+            with fileinput.input(args.files or ("-",)) as lines:
+                await _async_produce(queue, lines)
+        except OSError as err:
+            _LOGGER.error("Unable to read references: %s", err)
+            status = 2
+        for _ in workers:
+            await queue.put(None)
+        failures = sum(await asyncio.gather(*workers))
+
+    return status or (1 if failures else 0)
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the command line interface."""
+    parser = argparse.ArgumentParser(
+        prog="python -m custom_components.royalmail.cli",
+        description=(
+            "Look up Royal Mail reference numbers and write one JSON line per "
+            f"item. The account is read from {ENV_USERNAME} and {ENV_PASSWORD}."
+        ),
+    )
+    parser.add_argument(
+        "files", nargs="*", help="files of reference numbers, stdin if omitted"
+    )
+    parser.add_argument(
+        "-c",
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"lookups in flight at once (default {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "-r",
+        "--rate",
+        type=float,
+        default=RATE_LIMIT_RATE,
+        help=f"requests per second (default {RATE_LIMIT_RATE})",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=DEFAULT_RETRIES,
+        help=f"retries of transient failures (default {DEFAULT_RETRIES})",
+    )
+    parser.add_argument(
+        "--full", action="store_true", help="include the full tracking details"
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="debug logging")
+    args = parser.parse_args(argv)
+
+    if args.concurrency < 1 or args.rate <= 0 or args.retries < 0:
+        parser.error("concurrency and rate must be positive, retries not negative")
+    username = os.environ.get(ENV_USERNAME)
+    password = os.environ.get(ENV_PASSWORD)
+    if not username or not password:
+        parser.error(f"set {ENV_USERNAME} and {ENV_PASSWORD}")
+
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.WARNING, stream=sys.stderr
+    )
+    return asyncio.run(async_main(args, username, password))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+"""Royal Mail API client that does not need a running Home Assistant."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import logging
+from typing import Any
+import uuid
+
+from aiohttp import ClientError, ClientResponse
+
+from .const import (
+    ACCESS_TOKEN,
+    CONF_ACCESS_TOKEN,
+    CONF_DEVICE_ID,
+    CONF_GRANT_TYPE,
+    CONF_GUID,
+    CONF_IBM_CLIENT_ID,
+    CONF_MAILPIECES,
+    CONF_ORIGIN,
+    CONF_PASSWORD,
+    CONF_REFRESH_TOKEN,
+    CONF_USERNAME,
+    IBM_CLIENT_ID,
+    MAILPIECE_URL,
+    ORIGIN,
+    TOKENS_URL,
+)
+from .ratelimit import HostUnavailable, RateLimitedSession
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RoyalMailError(Exception):
+    """Base error."""
+
+
+class InvalidAuth(RoyalMailError):
+    """Raised when invalid authentication credentials are provided."""
+
+
+class APIRatelimitExceeded(RoyalMailError):
+    """Raised when the API rate limit is exceeded."""
+
+
+class ServiceUnavailable(RoyalMailError):
+    """Raised when the API returns a server error."""
+
+
+class NotFoundError(RoyalMailError):
+    """Raised when the API rate limit is exceeded."""
+
+
+class UnknownError(RoyalMailError):
+    """Raised when an unknown error occurs."""
+
+
+# Failures that should not blank data that was fetched successfully before.
+TRANSIENT_ERRORS = (
+    APIRatelimitExceeded,
+    ServiceUnavailable,
+    HostUnavailable,
+    ClientError,
+    asyncio.TimeoutError,
+)
+
+
+def api_headers(access_token: str | None) -> dict[str, str]:
+    """Return the headers for an authenticated API request."""
+    return {
+        CONF_IBM_CLIENT_ID: IBM_CLIENT_ID,
+        CONF_ORIGIN: ORIGIN,
+        "Authorization": f"Bearer {access_token}",
+    }
+
+
+def raise_for_status(status: int) -> None:
+    """Raise the error for a failed API response."""
+    if status == 401:
+        raise InvalidAuth("Invalid authentication credentials")
+    if status == 429:
+        raise APIRatelimitExceeded("API rate limit exceeded.")
+    if status >= 500:
+        raise ServiceUnavailable(f"Royal Mail returned {status}")
+
+
+class RoyalMailClient:
+    """Log in to an account and make authenticated requests.
+
+    Tokens are kept in the account data passed in, and requests go through
+    a rate limited session, so the client can be shared by any number of
+    concurrent callers. It does not need Home Assistant, so the integration
+    and the command line share it.
+    """
+
+    def __init__(
+        self,
+        session: RateLimitedSession,
+        data: dict[str, Any],
+        on_tokens: Callable[[dict[str, Any]], None] | None = None,
+    ) -> None:
+        """Init."""
+        self.session = session
+        self.data = data
+        self.on_tokens = on_tokens
+        # Accounts keep one device id, new logins only get one as a fallback
+        if not data.get(CONF_DEVICE_ID):
+            data[CONF_DEVICE_ID] = uuid.uuid4().hex.upper()[0:6]
+        self._lock = asyncio.Lock()
+
+    @property
+    def access_token(self) -> str | None:
+        """Return the current access token."""
+        return self.data.get(CONF_ACCESS_TOKEN)
+
+    @property
+    def guid(self) -> str | None:
+        """Return the account's user id."""
+        return self.data.get(CONF_GUID)
+
+    async def async_request_tokens(self, grant: str) -> dict[str, Any]:
+        """Request tokens with the password or refresh token grant."""
+        if grant == CONF_REFRESH_TOKEN:
+            body = {CONF_REFRESH_TOKEN: self.data.get(CONF_REFRESH_TOKEN)}
+        else:
+            body = {
+                CONF_USERNAME: self.data.get(CONF_USERNAME),
+                CONF_PASSWORD: self.data.get(CONF_PASSWORD),
+            }
+        _LOGGER.debug("Requesting Royal Mail tokens with %s grant", grant)
+        resp = await self.session.request(
+            method="POST",
+            url=TOKENS_URL,
+            json={
+                **body,
+                CONF_GRANT_TYPE: grant,
+                CONF_DEVICE_ID: self.data[CONF_DEVICE_ID],
+            },
+            headers={CONF_IBM_CLIENT_ID: IBM_CLIENT_ID},
+        )
+        raise_for_status(resp.status)
+        tokens = await resp.json()
+        if not isinstance(tokens, dict) or not tokens.get(CONF_ACCESS_TOKEN):
+            raise InvalidAuth("No access token in the token response")
+
+        self.data.update(tokens)
+        if self.on_tokens is not None:
+            self.on_tokens(tokens)
+        return tokens
+
+    async def async_login(self) -> dict[str, Any]:
+        """Log in with the password grant and keep the new tokens."""
+        return await self.async_request_tokens(CONF_PASSWORD)
+
+    async def async_refresh_tokens(self) -> dict[str, Any]:
+        """Refresh the tokens, one caller at a time."""
+        async with self._lock:
+            return await self._async_refresh_tokens()
+
+    async def _async_refresh_tokens(self) -> dict[str, Any]:
+        """Refresh the tokens, logging in again if the refresh token is rejected."""
+        # The refresh grant avoids a full login and a new device session
+        if self.data.get(CONF_REFRESH_TOKEN):
+            try:
+                return await self.async_request_tokens(CONF_REFRESH_TOKEN)
+            except InvalidAuth as err:
+                _LOGGER.debug("Refresh token rejected, logging in: %s", err)
+        return await self.async_login()
+
+    async def async_request(
+        self,
+        method: str,
+        url: str,
+        session: RateLimitedSession | None = None,
+        headers: dict[str, str] | None = None,
+        bearer: bool = True,
+        **kwargs: Any,
+    ) -> ClientResponse:
+        """Make an authenticated request, refreshing the tokens once on a 401.
+
+        Endpoints that do not take a bearer token get the access token in
+        their own header.
+        """
+        for attempt in range(2):
+            access_token = self.access_token
+            if bearer:
+                request_headers = api_headers(access_token)
+            else:
+                request_headers = {ACCESS_TOKEN: access_token}
+            request_headers.update(headers or {})
+
+            resp = await (session or self.session).request(
+                method=method, url=url, headers=request_headers, **kwargs
+            )
+            if resp.status != 401 or attempt:
+                break
+            resp.release()
+            async with self._lock:
+                # Only the first caller to see the expired token refreshes it
+                if self.access_token == access_token:
+                    _LOGGER.debug("Token rejected by %s, refreshing", url)
+                    await self._async_refresh_tokens()
+
+        if resp.status == 401:
+            raise InvalidAuth("Invalid authentication credentials")
+        return resp
+
+    async def async_fetch_mailpiece(
+        self,
+        mail_piece_id: str,
+        session: RateLimitedSession | None = None,
+        decode: Callable[[str, ClientResponse], Awaitable[Any]] | None = None,
+    ) -> Any:
+        """Fetch and decode the response for a mail piece.
+
+        The body is decoded as JSON unless decode is given the URL and
+        response to decode instead.
+        """
+        url = MAILPIECE_URL.format(mailPieceId=mail_piece_id)
+        resp = await self.async_request("GET", url, session)
+        raise_for_status(resp.status)
+        if decode is None:
+            return await resp.json()
+        return await decode(url, resp)
+
+    async def async_get_mailpiece(self, mail_piece_id: str) -> dict[str, Any]:
+        """Return the tracking details of a mail piece."""
+        body = await self.async_fetch_mailpiece(mail_piece_id)
+        if not isinstance(body, dict) or not body.get(CONF_MAILPIECES):
+            raise NotFoundError(f"Unable to find {mail_piece_id}")
+        return body[CONF_MAILPIECES]
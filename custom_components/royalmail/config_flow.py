@@ -12,18 +12,36 @@ from homeassistant import config_entries
 from homeassistant.config_entries import ConfigEntryState, ConfigFlowResult
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import HomeAssistantError
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
+from .client import (
+    TRANSIENT_ERRORS,
+    InvalidAuth as ClientInvalidAuth,
+    RoyalMailClient,
+    RoyalMailError,
+)
 from .const import (
-    CONF_ACCESS_TOKEN,
+    CONF_COMPACT,
+    CONF_DEVICE_ID,
     CONF_GUID,
     CONF_PASSWORD,
+    CONF_REPLAY_SPEED,
     CONF_RESULTS,
+    CONF_TRANSPORT,
     CONF_USER_ID,
     CONF_USERNAME,
     DOMAIN,
+    TRANSPORT_LIVE,
+    TRANSPORT_RECORD,
+    TRANSPORT_REPLAY,
+)
+from .scheduler import async_get_scheduler
+from .tokens import (
+    STORED_KEYS,
+    TOKEN_KEYS,
+    async_get_account_data,
+    async_load_account_data,
+    async_save_tokens,
 )
-from .coordinator import RoyalMailTokensCoordinator
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -42,17 +60,27 @@ def async_get_options_flow(config_entry):
 
 
 async def validate_input(hass: HomeAssistant, data: dict[str, Any]) -> dict[str, Any]:
-    """Validate the user input allows us to connect."""
-
-    session = async_get_clientsession(hass)
-    coordinator = RoyalMailTokensCoordinator(hass, session, data)
-
-    await coordinator.async_refresh()
-
-    if coordinator.last_exception is not None and data is not None:
-        raise InvalidAuth
-
-    return {"title": str(data[CONF_USERNAME])}
+    """Validate the user input allows us to connect.
+
+    Logs in as the device in data, or a new one, and returns the tokens and
+    device id so the account can keep using this login.
+    """
+
+    session = async_get_scheduler(hass).interactive_session
+    client = RoyalMailClient(session, dict(data))
+
+    try:
+        tokens = await client.async_login()
+    except ClientInvalidAuth as err:
+        raise InvalidAuth from err
+    except (RoyalMailError, *TRANSIENT_ERRORS) as err:
+        raise CannotConnect from err
+
+    return {
+        "title": str(data[CONF_USERNAME]),
+        "tokens": tokens,
+        CONF_DEVICE_ID: client.data[CONF_DEVICE_ID],
+    }
 
 
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -60,26 +88,39 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
     VERSION = 1
 
-    @callback
-    def _entry_exists(self):
-        """Check if an entry for this domain already exists."""
-        existing_entries = self._async_current_entries()
-        return len(existing_entries) > 0
-
     async def async_step_user(
         self, user_input: dict[str, Any] | None = None
     ) -> ConfigFlowResult:
         """Handle the initial step."""
-        if self._entry_exists():
-            return self.async_abort(reason="already_configured")
-
         errors: dict[str, str] = {}
         if user_input is not None:
             await self.async_set_unique_id(user_input[CONF_USERNAME])
             self._abort_if_unique_id_configured()
 
+            existing_entries = self.hass.config_entries.async_entries(DOMAIN)
+
+            # Check if an entry already exists with the same username
+            existing_entry = next(
+                (
+                    entry
+                    for entry in existing_entries
+                    if entry.data.get(CONF_USERNAME) == user_input[CONF_USERNAME]
+                ),
+                None,
+            )
+
+            # Log in as the device the account already uses, if any
+            device_id = None
+            if existing_entry is not None:
+                account_data = await async_load_account_data(
+                    self.hass, existing_entry
+                )
+                device_id = account_data.get(CONF_DEVICE_ID)
+
             try:
-                info = await validate_input(self.hass, user_input)
+                info = await validate_input(
+                    self.hass, {**user_input, CONF_DEVICE_ID: device_id}
+                )
             except CannotConnect:
                 errors["base"] = "cannot_connect"
             except InvalidAuth:
@@ -90,18 +131,6 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             else:
                 data = dict(user_input)
 
-                existing_entries = self.hass.config_entries.async_entries(DOMAIN)
-
-                # Check if an entry already exists with the same username
-                existing_entry = next(
-                    (
-                        entry
-                        for entry in existing_entries
-                        if entry.data.get(CONF_USERNAME) == user_input[CONF_USERNAME]
-                    ),
-                    None,
-                )
-
                 if existing_entry is not None:
                     # Update specific data in the entry
                     updated_data = existing_entry.data.copy()
@@ -111,7 +140,13 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     self.hass.config_entries.async_update_entry(
                         existing_entry, data=updated_data
                     )
+                    await async_save_tokens(
+                        self.hass, existing_entry.entry_id, info["tokens"]
+                    )
 
+                # Setup moves the validated login into the account's token store
+                login = {**info["tokens"], CONF_DEVICE_ID: info[CONF_DEVICE_ID]}
+                data.update({key: login[key] for key in STORED_KEYS if key in login})
                 return self.async_create_entry(title=info["title"], data=data)
 
         return self.async_show_form(
@@ -123,48 +158,26 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if import_data is not None:
             try:
-                await self.async_set_unique_id(import_data[CONF_USERNAME])
-                self._abort_if_unique_id_configured()
-
-                existing_entries = self.hass.config_entries.async_entries(DOMAIN)
+                guid = import_data.get(CONF_RESULTS)[0][CONF_USER_ID]
 
-                # Check if an entry already exists with the same username
+                # Only the account the item was tracked on needs reloading
                 existing_entry = next(
                     (
                         entry
-                        for entry in existing_entries
-                        if entry.data.get(CONF_GUID)
-                        == import_data.get(CONF_RESULTS)[0][CONF_USER_ID]
+                        for entry in self._async_current_entries()
+                        if async_get_account_data(self.hass, entry).get(CONF_GUID)
+                        == guid
                     ),
                     None,
                 )
 
-                if existing_entry is not None:
-                    entry_data = existing_entry.data
-                    import_data[CONF_USERNAME] = entry_data[CONF_USERNAME]
-
-                    # Update specific data in the entry
-                    updated_data = existing_entry.data.copy()
-                    # Merge the import_data into the entry_data
-                    updated_data.update(import_data)
-                    # Update the entry with the new data
-                    self.hass.config_entries.async_update_entry(
-                        existing_entry, data=updated_data
-                    )
-
-                for entry in self._async_current_entries():
-                    # Update specific data in the entry
-                    updated_data = entry.data.copy()
-                    # Merge the import_data into the entry_data
-                    updated_data.update(entry_data)
-                    self.hass.config_entries.async_update_entry(
-                        entry, data=updated_data
+                if (
+                    existing_entry is not None
+                    and existing_entry.state == ConfigEntryState.LOADED
+                ):
+                    self.hass.async_create_task(
+                        self.hass.config_entries.async_reload(existing_entry.entry_id)
                     )
-                    # Ensure that the config entry is fully set up before attempting a reload
-                    if entry.state == ConfigEntryState.LOADED:
-                        self.hass.async_create_task(
-                            self.hass.config_entries.async_reload(entry.entry_id)
-                        )
 
                 return self.async_abort(reason="entry_updated")
 
@@ -180,24 +193,30 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     ) -> ConfigFlowResult:
         """Handle reauth step."""
 
-        session = async_get_clientsession(self.hass)
-        coordinator = RoyalMailTokensCoordinator(self.hass, session, user_input)
-
-        await coordinator.async_refresh()
-        if coordinator.last_exception is not None and user_input is not None:
-            raise InvalidAuth
-
         existing_entry = self.hass.config_entries.async_get_entry(
             self.context["entry_id"]
         )
-        user_input[CONF_ACCESS_TOKEN] = coordinator.data[CONF_ACCESS_TOKEN]
+
+        # Log in again as the same device the account already uses
+        account_data = await async_load_account_data(self.hass, existing_entry)
+        device_id = account_data.get(CONF_DEVICE_ID)
+        session = async_get_scheduler(self.hass).interactive_session
+        client = RoyalMailClient(session, {**user_input, CONF_DEVICE_ID: device_id})
+
+        try:
+            tokens = await client.async_login()
+        except (RoyalMailError, *TRANSIENT_ERRORS) as err:
+            raise InvalidAuth from err
 
         # Update specific data in the entry
         updated_data = existing_entry.data.copy()
-        # Merge the import_data into the entry_data
-        updated_data.update(user_input)
+        # Merge the credentials into the entry_data, tokens go to the token store
+        updated_data.update(
+            {key: value for key, value in user_input.items() if key not in TOKEN_KEYS}
+        )
         # Update the entry with the new data
         self.hass.config_entries.async_update_entry(existing_entry, data=updated_data)
+        await async_save_tokens(self.hass, existing_entry.entry_id, tokens)
         # Ensure that the config entry is fully set up before attempting a reload
         if existing_entry.state == ConfigEntryState.LOADED:
             await self.hass.config_entries.async_reload(existing_entry.entry_id)
@@ -230,9 +249,28 @@ class RoyalMailFlowHandler(config_entries.OptionsFlow):
 
     async def async_step_init(self, user_input=None) -> ConfigFlowResult:
         """Init."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
         return self.async_show_form(
             step_id="init",
-            data_schema=vol.Schema({}),
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_TRANSPORT,
+                        default=options.get(CONF_TRANSPORT, TRANSPORT_LIVE),
+                    ): vol.In([TRANSPORT_LIVE, TRANSPORT_RECORD, TRANSPORT_REPLAY]),
+                    vol.Required(
+                        CONF_REPLAY_SPEED,
+                        default=options.get(CONF_REPLAY_SPEED, 1.0),
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
+                    vol.Required(
+                        CONF_COMPACT,
+                        default=options.get(CONF_COMPACT, False),
+                    ): bool,
+                }
+            ),
         )
 
 
@@ -1,5 +1,7 @@
 """Constants for the Royal Mail integration."""
 
+from datetime import timedelta
+
 DOMAIN = "royalmail"
 CONF_IBM_CLIENT_ID = "x-ibm-client-id"
 IBM_CLIENT_ID = "e83f49c439b0ebc0b130692bcb8b1cde"
@@ -8,6 +10,7 @@ IMAGE_URL = "https://api.royalmail.net{image}"
 PENDING_ITEMS_URL = "https://api.royalmail.net/track/v2/pending/items"
 MAILPIECES_URL = "https://api.royalmail.net/mailpieces/v3.1/user/{guid}/history/{ibmClientId}?limit=6"
 MAILPIECE_URL = "https://api.royalmail.net/mailpieces/v3.1/{mailPieceId}/events"
+SUMMARY_URL = "https://api.royalmail.net/mailpieces/v3/summary?mailPieceId={mailPieceIds}"
 SUBSCRIPTION_URL = (
     "https://api.royalmail.net/pushapi/app/v2/subscription/track/{mailPieceId}"
 )
@@ -16,6 +19,8 @@ TRACKING_ALIAS_URL = "https://api.royalmail.net/trackingalias"
 REMOVE_MAILPIECE_URL = "https://api.royalmail.net/mailpieces/v3.1/user/{guid}/history/{ibmClientId}?mailPieceId={mailPieceId}"
 CONF_TRACK_ITEM = "track_your_item"
 CONF_STOP_TRACKING_ITEM = "stop_tracking_item"
+CONF_REFRESH_ITEM = "refresh_item"
+CONF_GET_PARCEL = "get_parcel"
 CONF_REFERENCE_NUMBER = "reference_number"
 CONF_DEVICE_ID = "device_id"
 CONF_GRANT_TYPE = "grant_type"
@@ -77,3 +82,143 @@ PARCEL_DELIVERY_TODAY = ["EVGPD"]
 CONF_PARCELS = "parcels"
 CONF_OUT_FOR_DELIVERY = "out_for_delivery"
 CONF_AVAILABLE_FOR_COLLECTION = "available_for_collection"
+DATA_SCHEDULER = f"{DOMAIN}_scheduler"
+POLL_STAGGER = timedelta(seconds=5)
+MAILPIECE_CYCLE_WINDOW = timedelta(minutes=5)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 1
+RATE_LIMIT_RATE = 2.0
+RATE_LIMIT_BURST = 10
+RATE_LIMIT_MIN_RATE = 0.1
+RATE_LIMIT_RECOVERY = 0.05
+RATE_LIMIT_BACKOFF = 30
+COALESCE_TTL = timedelta(seconds=15)
+STATE_WRITE_WINDOW = 0.5
+CONF_LINKS = "links"
+CONF_HREF = "href"
+CONF_PROOF_OF_DELIVERY = "proofOfDeliveryData"
+CONF_DELIVERY_DATETIME = "deliveryDateTime"
+IMAGE_PHOTO = "photo"
+IMAGE_SIGNATURE = "signature"
+IMAGE_LINKS = {
+    IMAGE_PHOTO: ["photoimage", "imagePhoto"],
+    IMAGE_SIGNATURE: ["signatureimage", "imageSignature"],
+}
+IMAGE_CACHE_DIR = f"{DOMAIN}_images"
+IMAGE_CACHE_MAX_BYTES = 50 * 1024 * 1024
+IMAGE_CHUNK_SIZE = 64 * 1024
+CONF_LOCATION_NAME = "locationName"
+HISTORY_STORAGE_VERSION = 1
+HISTORY_SAVE_DELAY = 30
+HISTORY_RETENTION = timedelta(days=400)
+HISTORY_MAX_ITEMS = 2000
+HISTORY_MAX_EVENTS = 100
+HISTORY_COMPACT_INTERVAL = timedelta(days=1)
+TRANSIT_STARTED = ["EVAIE", "EVOCO"]
+STATS_STORAGE_VERSION = 1
+STATS_RELATIVE_ACCURACY = 0.02
+STATS_MIN_SAMPLES = 3
+CONF_PREDICTED_DELIVERY = "predicted_delivery"
+API_HOST = "api.royalmail.net"
+GATEWAY_HOST = "rmappgateway.dockethub.com"
+UPDATE_INTERVAL = timedelta(minutes=45)
+CONF_STALE_SINCE = "stale_since"
+BACKOFF_BASE = 60
+BACKOFF_MAX = 3600
+TOKENS_STORAGE_VERSION = 1
+TOKENS_SAVE_DELAY = 10
+CONF_EXPIRES_AT = "expires_at"
+TOKEN_EXPIRY_MARGIN = 300
+TRACK_STORAGE_VERSION = 1
+TRACK_SAVE_DELAY = 5
+TRACK_PROGRESS_TTL = timedelta(days=1)
+EVENT_TRACKING = f"{DOMAIN}_tracking_event"
+EVENT_TRACKING_REPLAY = f"{DOMAIN}_replay_tracking_event"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_MAILPIECE_ID = "mail_piece_id"
+ATTR_CODE = "code"
+ATTR_TIME = "time"
+ATTR_CATEGORY = "category"
+CONF_TRANSPORT = "transport"
+CONF_REPLAY_SPEED = "replay_speed"
+CONF_COMPACT = "compact"
+ATTR_STATUS = "status"
+ATTR_DETAILS = "details"
+TRANSPORT_LIVE = "live"
+TRANSPORT_RECORD = "record"
+TRANSPORT_REPLAY = "replay"
+TRANSPORT_CASSETTE_DIR = f"{DOMAIN}_cassettes"
+TRANSPORT_CASSETTE_MAX_BYTES = 10 * 1024 * 1024
+JSON_EXECUTOR_BYTES = 256 * 1024
+BODY_CACHE_TTL = UPDATE_INTERVAL * 2
+CONF_LAST_EVENT_CODE = "lastEventCode"
+CONF_LAST_EVENT_DATETIME = "lastEventDateTime"
+SUMMARY_BATCH_SIZE = 30
+SUMMARY_RETRY = timedelta(hours=6)
+HTTP_POOL_LIMIT = 2 * RATE_LIMIT_BURST
+HTTP_KEEPALIVE = 60
+HTTP_DNS_CACHE_TTL = 300
+TIMEOUT_CONNECT = 10
+TIMEOUT_API_READ = 30
+TIMEOUT_API_TOTAL = 60
+TIMEOUT_GATEWAY_READ = 20
+TIMEOUT_GATEWAY_TOTAL = 40
+TIMEOUT_IMAGE_READ = 60
+CATEGORY_DELIVERED = "delivered"
+CATEGORY_DELIVERY_FAILED = "delivery_failed"
+CATEGORY_OUT_FOR_DELIVERY = "out_for_delivery"
+CATEGORY_AVAILABLE_FOR_COLLECTION = "available_for_collection"
+CATEGORY_COLLECTED = "collected"
+CATEGORY_IN_TRANSIT = "in_transit"
+CATEGORY_OTHER = "other"
+
+# Refresh order by category, parcels expected today first and finished ones last
+REFRESH_PRIORITY = {
+    CATEGORY_OUT_FOR_DELIVERY: 0,
+    CATEGORY_AVAILABLE_FOR_COLLECTION: 0,
+    CATEGORY_DELIVERED: 2,
+    CATEGORY_COLLECTED: 2,
+}
+REFRESH_PRIORITY_DEFAULT = 1
+
+BUCKET_IN_TRANSIT = "in_transit"
+BUCKET_DUE_TODAY = "due_today"
+BUCKET_DELIVERY_FAILED = "delivery_failed"
+BUCKET_AWAITING_COLLECTION = "awaiting_collection"
+BUCKET_DELIVERED = "delivered"
+STATUS_BUCKETS = {
+    CATEGORY_DELIVERED: BUCKET_DELIVERED,
+    CATEGORY_COLLECTED: BUCKET_DELIVERED,
+    CATEGORY_DELIVERY_FAILED: BUCKET_DELIVERY_FAILED,
+    CATEGORY_OUT_FOR_DELIVERY: BUCKET_DUE_TODAY,
+    CATEGORY_AVAILABLE_FOR_COLLECTION: BUCKET_AWAITING_COLLECTION,
+}
+
+CATEGORIES = (
+    CATEGORY_IN_TRANSIT,
+    CATEGORY_OUT_FOR_DELIVERY,
+    CATEGORY_DELIVERY_FAILED,
+    CATEGORY_AVAILABLE_FOR_COLLECTION,
+    CATEGORY_DELIVERED,
+    CATEGORY_COLLECTED,
+    CATEGORY_OTHER,
+)
+CONF_EXPORT_HISTORY = "export_history"
+ATTR_FORMAT = "format"
+ATTR_START_DATE = "start_date"
+ATTR_END_DATE = "end_date"
+ATTR_PRODUCT = "product"
+ATTR_PATH = "path"
+ATTR_ROWS = "rows"
+EXPORT_FORMAT_CSV = "csv"
+EXPORT_FORMAT_JSONL = "jsonl"
+EXPORT_DIR = "royalmail_exports"
+EXPORT_BATCH_SIZE = 500
+CONF_QUERY_PARCELS = "query_parcels"
+CONF_DESTINATION_COUNTRY = "destinationCountryName"
+CONF_LAST_EVENT_LOCATION = "lastEventLocationName"
+ATTR_DESTINATION = "destination"
+ATTR_STARTED = "started"
+ATTR_MIN_AGE_DAYS = "min_age_days"
+ATTR_MAX_AGE_DAYS = "max_age_days"
+ATTR_LIMIT = "limit"
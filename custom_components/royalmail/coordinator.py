@@ -1,46 +1,70 @@
 """Royal Mail Coordinator."""
 
-from asyncio import Lock
+import asyncio
+from collections.abc import Awaitable, Callable
 from datetime import timedelta
+import functools
 import logging
-import uuid
+import time
 
-from homeassistant.core import HomeAssistant
-from homeassistant.exceptions import ConfigEntryAuthFailed, HomeAssistantError
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import ATTR_LOCATION, ATTR_NAME
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import dt as dt_util
 
 from .const import (
-    ACCESS_TOKEN,
+    API_HOST,
+    ATTR_CATEGORY,
+    ATTR_CODE,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_MAILPIECE_ID,
+    ATTR_TIME,
+    COALESCE_TTL,
     CONF_ACCESS_TOKEN,
-    CONF_CONTENT_TYPE,
-    CONF_DEVICE_ID,
-    CONF_FIRST_NAME,
-    CONF_GRANT_TYPE,
+    CONF_EVENTCODE,
+    CONF_EVENTDATETIME,
+    CONF_EVENTS,
+    CONF_EVENTNAME,
     CONF_GUID,
-    CONF_IBM_CLIENT_ID,
+    CONF_LAST_EVENT_CODE,
+    CONF_LAST_EVENT_DATETIME,
+    CONF_LOCATION_NAME,
     CONF_MAILPIECE_ID,
     CONF_MAILPIECES,
     CONF_MP_DETAILS,
-    CONF_ORIGIN,
-    CONF_PASSWORD,
-    CONF_PRODUCT_NAME,
-    CONF_REFRESH_TOKEN,
+    CONF_STALE_SINCE,
     CONF_SUMMARY,
-    CONF_USER_ID,
-    CONF_USERNAME,
-    CONTENT_TYPE,
-    DOMAIN,
+    EVENT_TRACKING,
+    EVENT_TRACKING_REPLAY,
     IBM_CLIENT_ID,
-    MAILPIECE_URL,
+    MAILPIECE_CYCLE_WINDOW,
     MAILPIECES_URL,
-    ORIGIN,
-    PRODUCT_NAME,
-    PUSH_NOTIFICATION_URL,
-    REMOVE_MAILPIECE_URL,
-    SUBSCRIPTION_URL,
-    TOKENS_URL,
-    TRACKING_ALIAS_URL,
+    PARCEL_DELIVERED,
+    REFRESH_PRIORITY,
+    REFRESH_PRIORITY_DEFAULT,
+    SUMMARY_BATCH_SIZE,
+    SUMMARY_RETRY,
+    SUMMARY_URL,
+    UPDATE_INTERVAL,
 )
+from .buckets import RoyalMailStatusBuckets, event_category
+from .client import (
+    TRANSIENT_ERRORS,
+    APIRatelimitExceeded,
+    InvalidAuth,
+    NotFoundError,
+    RoyalMailClient,
+    RoyalMailError,
+    ServiceUnavailable,
+    UnknownError,
+)
+from .history import RoyalMailEventHistory
+from .index import RoyalMailParcelIndex
+from .scheduler import async_get_scheduler
+from .stats import RoyalMailDeliveryStats
+from .tokens import RoyalMailTokenStore
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -48,209 +72,57 @@ _LOGGER = logging.getLogger(__name__)
 class TokenManager:
     """Token Manager."""
 
-    def __init__(self, hass: HomeAssistant, session, data) -> None:
-        """Init."""
-        self.hass = hass
-        self.session = session
-        self.data = data
-        self.lock = Lock()
-
-    async def refresh_tokens(self):
-        """Refresh Tokens."""
-        async with self.lock:
-            # Perform the refresh logic
-            coordinator = RoyalMailTokensCoordinator(self.hass, self.session, self.data)
-            new_tokens = await coordinator.refresh_tokens()
-            if new_tokens:
-                self.data.update(new_tokens)
-                await self._persist_tokens()
-            return new_tokens
-
-    async def _persist_tokens(self):
-        entries = self.hass.config_entries.async_entries(DOMAIN)
-        for entry in entries:
-            updated_data = entry.data.copy()
-            updated_data.update(self.data)
-            self.hass.config_entries.async_update_entry(entry, data=updated_data)
-
-
-class RoyalMailRemoveMailPieceCoordinator(DataUpdateCoordinator):
-    """Remove Mail Piece coordinator."""
-
     def __init__(
-        self, hass: HomeAssistant, session, data: dict, mail_piece_id: str
+        self,
+        hass: HomeAssistant,
+        session,
+        data,
+        token_store: RoyalMailTokenStore | None = None,
     ) -> None:
-        """Initialize coordinator."""
-        super().__init__(
-            hass,
-            _LOGGER,
-            # Name of the data. For logging purposes.
-            name="Royal Mail",
-            # Polling interval. Will only be polled if there are subscribers.
-            update_interval=None,
-        )
-        self.session = session
-        self.access_token = data[CONF_ACCESS_TOKEN]
-        self.refresh_token = data[CONF_REFRESH_TOKEN]
-        self.mail_piece_id = mail_piece_id
-        self.guid = data[CONF_GUID]
-        self.device_id = str(uuid.uuid4().hex.upper()[0:6])
+        """Init."""
+        self.hass = hass
         self.data = data
+        self.token_store = token_store
+        self.client = RoyalMailClient(session, data, self._persist_tokens)
 
-    async def _async_update_data(self):
-        """Fetch data from API endpoint."""
-        try:
-            mail_piece = await self.session.request(
-                method="GET",
-                url=MAILPIECE_URL.format(mailPieceId=self.mail_piece_id),
-                headers={
-                    CONF_IBM_CLIENT_ID: IBM_CLIENT_ID,
-                    CONF_ORIGIN: ORIGIN,
-                    "Authorization": f"Bearer {self.access_token}",
-                },
-            )
-
-            mailPiece = await mail_piece.json()
-
-            product_name = mailPiece[CONF_MAILPIECES][CONF_SUMMARY][CONF_PRODUCT_NAME]
-
-            push_notification = await self.session.request(
-                method="DELETE",
-                url=PUSH_NOTIFICATION_URL.format(
-                    guid=self.guid, mailPieceId=self.mail_piece_id
-                ),
-                headers={ACCESS_TOKEN: self.access_token},
-                json={PRODUCT_NAME: product_name},
-            )
-            if push_notification.status == 201:
-                removeMailPiece = await self.session.request(
-                    method="DELETE",
-                    url=REMOVE_MAILPIECE_URL.format(
-                        guid=self.guid,
-                        ibmClientId=IBM_CLIENT_ID,
-                        mailPieceId=self.mail_piece_id,
-                    ),
-                    headers={
-                        CONF_IBM_CLIENT_ID: IBM_CLIENT_ID,
-                        CONF_ORIGIN: ORIGIN,
-                        "Authorization": f"Bearer {self.access_token}",
-                    },
-                )
-
-                body = await removeMailPiece.json()
-
-        except InvalidAuth as err:
-            raise ConfigEntryAuthFailed from err
-        except RoyalMailError as err:
-            raise UpdateFailed(str(err)) from err
-        except ValueError as err:
-            _LOGGER.error("Value error occurred: %s", err)
-            raise UpdateFailed(f"Unexpected response: {err}") from err
-        except Exception as err:
-            _LOGGER.error("Unexpected exception: %s", err)
-            raise UnknownError from err
-        else:
-            return body
-
+    @property
+    def access_token(self) -> str | None:
+        """Return the current access token."""
+        return self.data.get(CONF_ACCESS_TOKEN)
 
-class RoyalMailTrackNewItemCoordinator(DataUpdateCoordinator):
-    """Track new mail pieces coordinator."""
+    @property
+    def guid(self) -> str | None:
+        """Return the account's user id."""
+        return self.data.get(CONF_GUID)
 
-    def __init__(
-        self, hass: HomeAssistant, session, data: dict, mail_piece_id: str
-    ) -> None:
-        """Initialize coordinator."""
+    def access_token_valid(self) -> bool:
+        """Return if the saved access token has not expired yet."""
+        if self.token_store is not None:
+            return self.token_store.access_token_valid()
+        return bool(self.data.get(CONF_ACCESS_TOKEN))
 
-        super().__init__(
-            hass,
-            _LOGGER,
-            # Name of the data. For logging purposes.
-            name="Royal Mail",
-            # Polling interval. Will only be polled if there are subscribers.
-            update_interval=None,
-        )
-        self.session = session
-        self.access_token = data[CONF_ACCESS_TOKEN]
-        self.guid = data[CONF_GUID]
-        self.mail_piece_id = mail_piece_id
-
-    def unableToTrackMailPiece(self):
-        """Unable to track mail piece."""
-        raise NotFoundError(f"New item: Unable to track {self.mail_piece_id}")
-
-    async def _async_update_data(self):
-        """Fetch data from API endpoint."""
-        try:
-            mail_piece = await self.session.request(
-                method="GET",
-                url=MAILPIECE_URL.format(mailPieceId=self.mail_piece_id),
-                headers={
-                    CONF_IBM_CLIENT_ID: IBM_CLIENT_ID,
-                    CONF_ORIGIN: ORIGIN,
-                    "Authorization": f"Bearer {self.access_token}",
-                },
-            )
-
-            mailPiece = await mail_piece.json()
-
-            product_name = mailPiece[CONF_MAILPIECES][CONF_SUMMARY][CONF_PRODUCT_NAME]
-
-            create_subscription = await self.session.request(
-                method="POST",
-                url=SUBSCRIPTION_URL.format(mailPieceId=self.mail_piece_id),
-                headers={
-                    CONF_IBM_CLIENT_ID: IBM_CLIENT_ID,
-                    CONF_ORIGIN: ORIGIN,
-                    CONF_CONTENT_TYPE: CONTENT_TYPE,
-                    "Authorization": f"Bearer {self.access_token}",
-                },
-            )
-
-            if create_subscription.status == 200:
-                push_notification = await self.session.request(
-                    method="PUT",
-                    url=PUSH_NOTIFICATION_URL.format(
-                        guid=self.guid, mailPieceId=self.mail_piece_id
-                    ),
-                    headers={ACCESS_TOKEN: self.access_token},
-                    json={PRODUCT_NAME: product_name},
-                )
-                if push_notification.status == 201:
-                    tracking_alias = await self.session.request(
-                        method="GET",
-                        url=TRACKING_ALIAS_URL,
-                        headers={
-                            CONF_IBM_CLIENT_ID: IBM_CLIENT_ID,
-                            CONF_ORIGIN: ORIGIN,
-                            CONF_CONTENT_TYPE: CONTENT_TYPE,
-                            CONF_USER_ID: self.guid,
-                            CONF_MAILPIECE_ID: self.mail_piece_id,
-                            "Authorization": f"Bearer {self.access_token}",
-                        },
-                    )
-                    body = await tracking_alias.json()
-
-            else:
-                self.unableToTrackMailPiece()
+    async def refresh_tokens(self):
+        """Refresh Tokens."""
+        return await self.client.async_refresh_tokens()
 
-        except InvalidAuth as err:
-            raise ConfigEntryAuthFailed from err
-        except RoyalMailError as err:
-            raise UpdateFailed(str(err)) from err
-        except ValueError as err:
-            _LOGGER.error("Value error occurred: %s", err)
-            raise UpdateFailed(f"Unexpected response: {err}") from err
-        except Exception as err:
-            _LOGGER.error("Unexpected exception: %s", err)
-            raise UnknownError from err
-        else:
-            return body
+    def _persist_tokens(self, tokens: dict) -> None:
+        """Persist tokens to this account's token store only."""
+        if self.token_store is not None:
+            self.token_store.async_update(tokens)
 
 
 class RoyalMaiMailPiecesCoordinator(DataUpdateCoordinator):
     """RoyalMaiMailPiecesCoordinator."""
 
-    def __init__(self, hass: HomeAssistant, session, data: dict) -> None:
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        session,
+        entry: ConfigEntry,
+        token_manager: TokenManager,
+        interactive_session=None,
+        replay: bool = False,
+    ) -> None:
         """Initialize coordinator."""
         super().__init__(
             hass,
@@ -258,68 +130,154 @@ class RoyalMaiMailPiecesCoordinator(DataUpdateCoordinator):
             # Name of the data. For logging purposes.
             name="Royal Mail",
             # Polling interval. Will only be polled if there are subscribers.
-            update_interval=timedelta(minutes=45),
+            update_interval=UPDATE_INTERVAL,
+            # Unchanged bodies decode to the same objects, so this is cheap
+            always_update=False,
         )
         self.authenticating = False
         self.session = session
-        self.access_token = data.get(CONF_ACCESS_TOKEN)
-        self.refresh_token = data.get(CONF_REFRESH_TOKEN)
-        self.guid = data.get(CONF_GUID)
-        self.device_id = str(uuid.uuid4().hex.upper()[0:6])
-        self.data = data
-        self.token_manager = TokenManager(hass, session, data)
+        self.scheduler = async_get_scheduler(hass)
+        self.interactive_session = (
+            interactive_session or self.scheduler.interactive_session
+        )
+        self.token_manager = token_manager
+        self.client = token_manager.client
+        self.config_entry_id = entry.entry_id
+        # Replays keep their own history and events, apart from the live account
+        self.replay = replay
+        storage_id = f"{entry.entry_id}.replay" if replay else entry.entry_id
+        self.history = RoyalMailEventHistory(hass, storage_id)
+        self.stats = RoyalMailDeliveryStats(hass, storage_id)
+        self.event_type = EVENT_TRACKING_REPLAY if replay else EVENT_TRACKING
+        self.buckets = RoyalMailStatusBuckets()
+        self.index = RoyalMailParcelIndex()
+        self.new_events: dict[str, list[dict]] = {}
+        self._last_good: dict[str, dict] = {}
+        self._stale_since: dict[str, str] = {}
+        self._since_outage: str | None = None
+        self._summaries_until = 0.0
+        self._batch_summaries_until = 0.0
+        self._parcel_listeners: dict[str, Callable[[dict], None]] = {}
+        self._summary_listeners: list[CALLBACK_TYPE] = []
+
+    @property
+    def access_token(self) -> str | None:
+        """Return the account's current access token."""
+        return self.token_manager.access_token
+
+    @property
+    def guid(self) -> str | None:
+        """Return the account's user id."""
+        return self.token_manager.guid
 
     async def _async_update_data(self):
+        """Fetch data from API endpoint in this account's scheduler slot."""
+        async with self.scheduler.async_poll_slot():
+            return await self._async_fetch_mailpieces()
+
+    async def _async_fetch_mailpieces(self):
         """Fetch data from API endpoint."""
         if self.authenticating:
             # Return early or set a pending state instead of making an API call
             return {"status": "pending"}
 
-        if not self.access_token or not self.guid:
-            self.authenticating = True
-            updated_tokens = await self.token_manager.refresh_tokens()
-            self.authenticating = False
-
-            if updated_tokens:
-                self.access_token = updated_tokens.get(CONF_ACCESS_TOKEN)
-                self.guid = updated_tokens.get(CONF_GUID)
-            else:
-                raise UpdateFailed(
-                    "Failed to refresh tokens and missing essential data."
-                )
-
         def validateResponse(all_mailpieces):
             """Validate Response."""
             if not isinstance(all_mailpieces, dict):
                 raise TypeError("Unexpected response format")
 
         try:
-            respAllMailPieces = await self._make_request_all_mailpieces()
-            if respAllMailPieces.status in [401, 429]:
-                self.authenticating = True
-                await self.token_manager.refresh_tokens()
-                self.authenticating = False
+            try:
+                # Saved tokens are reused across restarts until they expire
+                if (
+                    not self.access_token
+                    or not self.guid
+                    or not self.token_manager.access_token_valid()
+                ):
+                    await self._async_refresh_tokens()
+
                 respAllMailPieces = await self._make_request_all_mailpieces()
 
-            all_mailpieces = await respAllMailPieces.json()
+                # The rate limiter has already backed off, so wait for the next poll
+                if respAllMailPieces.status == 429:
+                    raise APIRatelimitExceeded("API rate limit exceeded.")
+                if respAllMailPieces.status >= 500:
+                    raise ServiceUnavailable(
+                        f"Royal Mail returned {respAllMailPieces.status}"
+                    )
+
+                all_mailpieces = await self.scheduler.body_cache.async_json(
+                    MAILPIECES_URL.format(guid=self.guid, ibmClientId=IBM_CLIENT_ID),
+                    respAllMailPieces,
+                )
+            except TRANSIENT_ERRORS as err:
+                if not self._last_good:
+                    raise
+                return self._serve_stale(err)
 
             validateResponse(all_mailpieces)
 
-            mail_pieces = {CONF_MAILPIECES: 0, CONF_MP_DETAILS: {}}
+            mail_pieces = {
+                CONF_MAILPIECES: 0,
+                CONF_MP_DETAILS: {},
+                CONF_STALE_SINCE: None,
+            }
+            last_good = {}
+            changed = {}
             total_mail_pieces = 0
             if CONF_MP_DETAILS in all_mailpieces and isinstance(
                 all_mailpieces.get(CONF_MP_DETAILS), list
             ):
-                for mail_piece in all_mailpieces.get(CONF_MP_DETAILS):
-                    mail_piece_id = mail_piece[CONF_MAILPIECE_ID]
-                    respMailPiece = await self._make_request_mailpiece(mail_piece_id)
-                    mail_piece = await respMailPiece.json()
+                mail_piece_ids = [
+                    mail_piece[CONF_MAILPIECE_ID]
+                    for mail_piece in all_mailpieces.get(CONF_MP_DETAILS)
+                ]
+                # Items already fetched are only fetched again if their
+                # summary shows a new last event
+                summaries = await self._async_fetch_summaries(
+                    [
+                        mail_piece_id
+                        for mail_piece_id in mail_piece_ids
+                        if mail_piece_id in self._last_good
+                    ]
+                )
+                fetched = await self._async_fetch_by_priority(
+                    [
+                        mail_piece_id
+                        for mail_piece_id in mail_piece_ids
+                        if not self._unchanged(mail_piece_id, summaries)
+                    ],
+                    summaries,
+                )
+                for mail_piece_id in mail_piece_ids:
+                    if mail_piece_id not in fetched:
+                        previous = self._last_good[mail_piece_id]
+                        total_mail_pieces += 1
+                        mail_pieces[CONF_MP_DETAILS][mail_piece_id] = previous
+                        last_good[mail_piece_id] = previous
+                        self._stale_since.pop(mail_piece_id, None)
+                        continue
+
+                    mail_piece = fetched[mail_piece_id]
+                    if isinstance(mail_piece, Exception):
+                        # One failing item keeps its last good data
+                        _LOGGER.debug("Serving stale %s: %s", mail_piece_id, mail_piece)
+                        parcel = self._stale_parcel(mail_piece_id)
+                        if parcel is not None:
+                            total_mail_pieces += 1
+                            mail_pieces[CONF_MP_DETAILS][mail_piece_id] = parcel
+                            last_good[mail_piece_id] = self._last_good[mail_piece_id]
+                        continue
 
                     if "errors" not in mail_piece:
                         total_mail_pieces += 1
-                        mail_pieces[CONF_MP_DETAILS][mail_piece_id] = mail_piece.get(
-                            CONF_MAILPIECES
-                        )
+                        parcel = mail_piece.get(CONF_MAILPIECES)
+                        mail_pieces[CONF_MP_DETAILS][mail_piece_id] = parcel
+                        # Identical bodies decode to the same object
+                        if parcel is not self._last_good.get(mail_piece_id):
+                            changed[mail_piece_id] = parcel
+                        last_good[mail_piece_id] = parcel
+                        self._stale_since.pop(mail_piece_id, None)
 
                 mail_pieces[CONF_MAILPIECES] = total_mail_pieces
 
@@ -336,151 +294,322 @@ class RoyalMaiMailPiecesCoordinator(DataUpdateCoordinator):
             _LOGGER.error("Unexpected exception: %s", err)
             raise UnknownError from err
         else:
-            return mail_pieces
-
-    async def _make_request_all_mailpieces(self):
-        """Make the API request."""
-        return await self.session.request(
-            method="GET",
-            url=MAILPIECES_URL.format(guid=self.guid, ibmClientId=IBM_CLIENT_ID),
-            headers={
-                CONF_IBM_CLIENT_ID: IBM_CLIENT_ID,
-                CONF_ORIGIN: ORIGIN,
-                "Authorization": f"Bearer {self.access_token}",
-            },
-        )
-
-    async def _make_request_mailpiece(self, mail_piece_id: str):
-        """Make the API request."""
-        return await self.session.request(
-            method="GET",
-            url=MAILPIECE_URL.format(mailPieceId=mail_piece_id),
-            headers={
-                CONF_IBM_CLIENT_ID: IBM_CLIENT_ID,
-                CONF_ORIGIN: ORIGIN,
-                "Authorization": f"Bearer {self.access_token}",
-            },
-        )
-
-
-class RoyalMailTokensCoordinator(DataUpdateCoordinator):
-    """Tokens coordinator."""
-
-    def __init__(self, hass: HomeAssistant, session, data: dict) -> None:
-        """Initialize coordinator."""
-        super().__init__(
-            hass,
-            _LOGGER,
-            # Name of the data. For logging purposes.
-            name="Royal Mail",
-            # Polling interval. Will only be polled if there are subscribers.
-            update_interval=None,
-        )
-        self.session = session
-        self.device_id = str(uuid.uuid4().hex.upper()[0:6])
-        self.data = dict(data)
-        self.body = None
-
-        if CONF_USERNAME in data and CONF_PASSWORD in data:
-            self.body = {
-                CONF_USERNAME: data[CONF_USERNAME],
-                CONF_PASSWORD: data[CONF_PASSWORD],
-                CONF_GRANT_TYPE: CONF_PASSWORD,
-                CONF_DEVICE_ID: self.device_id,
+            self._last_good = last_good
+            self._stale_since = {
+                mail_piece_id: since
+                for mail_piece_id, since in self._stale_since.items()
+                if mail_piece_id in last_good
             }
-        elif CONF_REFRESH_TOKEN in data:
-            self.body = {
-                CONF_REFRESH_TOKEN: data[CONF_REFRESH_TOKEN],
-                CONF_GRANT_TYPE: CONF_REFRESH_TOKEN,
-                CONF_DEVICE_ID: self.device_id,
-            }
-
-    async def _async_update_data(self):
-        """Fetch data from API endpoint."""
-
-        def validateResponse(all_mailpieces):
-            """Validate Response."""
-            if not isinstance(all_mailpieces, dict):
-                raise TypeError("Unexpected response format")
+            self._since_outage = None
+            self.update_interval = UPDATE_INTERVAL
+            self._merge_history(changed)
+            self._update_indexes(mail_pieces[CONF_MP_DETAILS])
+            return mail_pieces
 
-        def handle_status_code(status_code):
-            """Handle status code."""
-            if status_code == 401:
-                raise InvalidAuth("Invalid authentication credentials")
-            if status_code == 429:
-                raise APIRatelimitExceeded("API rate limit exceeded.")
+    async def _async_refresh_tokens(self) -> None:
+        """Refresh the account's tokens, skipping polls meanwhile."""
+        self.authenticating = True
+        try:
+            await self.token_manager.refresh_tokens()
+        finally:
+            self.authenticating = False
 
+    def _unchanged(
+        self, mail_piece_id: str, summaries: dict[str, tuple[str, str | None]]
+    ) -> bool:
+        """Return if a summary shows no new event since the item was fetched."""
+        summary = summaries.get(mail_piece_id)
+        previous = self._last_good.get(mail_piece_id)
+        return summary is not None and summary == last_event(previous or {})
+
+    async def _async_fetch_by_priority(
+        self,
+        mail_piece_ids: list[str],
+        summaries: dict[str, tuple[str, str | None]],
+    ) -> dict[str, dict | Exception]:
+        """Fetch mail pieces, publishing each parcel as soon as it lands.
+
+        Requests are queued out for delivery and awaiting collection first,
+        then in transit, then delivered, so the rate limiter serves the
+        parcels that matter today first. Failures are returned in place of
+        the item, so one failing item keeps its last good data, except
+        rejected credentials which are raised once every item has finished.
+        """
+        results: dict[str, dict | Exception] = {}
+
+        def _priority(mail_piece_id: str) -> int:
+            if (summary := summaries.get(mail_piece_id)) is not None:
+                code = summary[0]
+            else:
+                previous = self._last_good.get(mail_piece_id) or {}
+                code = (previous.get(CONF_EVENTS) or [{}])[0].get(CONF_EVENTCODE)
+            return REFRESH_PRIORITY.get(event_category(code), REFRESH_PRIORITY_DEFAULT)
+
+        async def _fetch(mail_piece_id: str) -> None:
+            try:
+                mail_piece = await self.async_fetch_shared(
+                    mail_piece_id,
+                    functools.partial(self._fetch_mailpiece, mail_piece_id),
+                    MAILPIECE_CYCLE_WINDOW,
+                )
+                if not isinstance(mail_piece, dict):
+                    raise TypeError("Unexpected response format")
+            except TRANSIENT_ERRORS as err:
+                results[mail_piece_id] = err
+                return
+            except Exception as err:
+                # Failed credentials are raised below, anything else is stale
+                if not isinstance(err, InvalidAuth):
+                    _LOGGER.warning("Unable to fetch %s: %s", mail_piece_id, err)
+                results[mail_piece_id] = err
+                return
+            results[mail_piece_id] = mail_piece
+            parcel = None if "errors" in mail_piece else mail_piece.get(CONF_MAILPIECES)
+            if parcel and parcel is not self._last_good.get(mail_piece_id):
+                if (listener := self._parcel_listeners.get(mail_piece_id)) is not None:
+                    listener(parcel)
+
+        # Tasks reach the rate limiter in the order they are created
+        tasks = [
+            asyncio.ensure_future(_fetch(mail_piece_id))
+            for mail_piece_id in sorted(mail_piece_ids, key=_priority)
+        ]
         try:
-            if self.body is not None:
-                resp = await self._make_request()
-
-                handle_status_code(resp.status)
-
-                body = await resp.json()
-
-                self.data[CONF_ACCESS_TOKEN] = body.get(CONF_ACCESS_TOKEN, None)
-                self.data[CONF_REFRESH_TOKEN] = body.get(CONF_REFRESH_TOKEN, None)
-                self.data[CONF_GUID] = body.get(CONF_GUID, None)
-                self.data[CONF_FIRST_NAME] = body.get(CONF_FIRST_NAME, None)
-
-                validateResponse(body)
-
-                # Persist the updated tokens
-                entries = self.hass.config_entries.async_entries(DOMAIN)
-                for entry in entries:
-                    # Update specific data in the entry
-                    updated_data = entry.data.copy()
-                    # Merge the import_data into the entry_data
-                    updated_data.update(body)
-                    # Update the entry with the new data
-                    self.hass.config_entries.async_update_entry(
-                        entry, data=updated_data
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+
+        # Rejected credentials fail the whole refresh, once
+        for result in results.values():
+            if isinstance(result, InvalidAuth):
+                raise result
+        return results
+
+    @callback
+    def async_add_parcel_listener(
+        self, mail_piece_id: str, update_callback: Callable[[dict], None]
+    ) -> CALLBACK_TYPE:
+        """Listen for a parcel's data as soon as a refresh fetches it.
+
+        The aggregate listeners are still notified once the refresh is done.
+        """
+        self._parcel_listeners[mail_piece_id] = update_callback
+
+        @callback
+        def remove_listener() -> None:
+            if self._parcel_listeners.get(mail_piece_id) is update_callback:
+                del self._parcel_listeners[mail_piece_id]
+
+        return remove_listener
+
+    @callback
+    def async_add_summary_listener(
+        self, update_callback: CALLBACK_TYPE
+    ) -> CALLBACK_TYPE:
+        """Listen for the summaries changing when a single parcel is refreshed.
+
+        Full refreshes notify the coordinator's listeners instead.
+        """
+        self._summary_listeners.append(update_callback)
+
+        @callback
+        def remove_listener() -> None:
+            if update_callback in self._summary_listeners:
+                self._summary_listeners.remove(update_callback)
+
+        return remove_listener
+
+    def _update_indexes(self, parcels: dict) -> None:
+        """Move changed parcels between the status buckets and indexes."""
+        self.buckets.update(parcels)
+        self.index.update(parcels)
+
+    def _stale_parcel(self, mail_piece_id: str) -> dict | None:
+        """Return the last good data for a parcel, marked as stale."""
+        parcel = self._last_good.get(mail_piece_id)
+        if parcel is None:
+            return None
+        since = self._stale_since.setdefault(
+            mail_piece_id, dt_util.utcnow().isoformat()
+        )
+        # Copy, as the last good data may be shared with other accounts
+        return {**parcel, CONF_STALE_SINCE: since}
+
+    def _serve_stale(self, err: Exception) -> dict:
+        """Keep serving the last good data while the API is unavailable."""
+        if self._since_outage is None:
+            self._since_outage = dt_util.utcnow().isoformat()
+            _LOGGER.warning("Royal Mail unavailable, serving last known data: %s", err)
+
+        # Never poll more often than usual, nor before the host may be retried
+        retry_in = self.scheduler.backoff.remaining(API_HOST)
+        self.update_interval = max(UPDATE_INTERVAL, timedelta(seconds=retry_in))
+
+        parcels = {
+            mail_piece_id: self._stale_parcel(mail_piece_id)
+            for mail_piece_id in self._last_good
+        }
+        self._update_indexes(parcels)
+        return {
+            CONF_MAILPIECES: len(parcels),
+            CONF_MP_DETAILS: parcels,
+            CONF_STALE_SINCE: self._since_outage,
+        }
+
+    def _merge_history(self, parcels: dict) -> None:
+        """Append new events to the history and announce them on the bus."""
+        # Events seen before there was any history are recorded, not announced
+        announce = self.data is not None or not self.history.empty
+        self.new_events = {}
+        for mail_piece_id, parcel in parcels.items():
+            if parcel and (events := self.history.async_merge(mail_piece_id, parcel)):
+                self.new_events[mail_piece_id] = events
+                if announce:
+                    self._fire_tracking_events(mail_piece_id, events)
+                if any(e.get(CONF_EVENTCODE) in PARCEL_DELIVERED for e in events):
+                    self.stats.async_ingest(
+                        mail_piece_id,
+                        self.history.product(mail_piece_id),
+                        list(self.history.iter_events(mail_piece_id)),
+                        events,
                     )
+        self.history.async_compact()
+
+    def _fire_tracking_events(self, mail_piece_id: str, events: list[dict]) -> None:
+        """Fire one bus event per new tracking event, oldest first."""
+        for event in events:
+            self.hass.bus.async_fire(
+                self.event_type,
+                {
+                    ATTR_CONFIG_ENTRY_ID: self.config_entry_id,
+                    ATTR_MAILPIECE_ID: mail_piece_id,
+                    ATTR_CODE: event.get(CONF_EVENTCODE),
+                    ATTR_NAME: event.get(CONF_EVENTNAME),
+                    ATTR_LOCATION: event.get(CONF_LOCATION_NAME),
+                    ATTR_TIME: event.get(CONF_EVENTDATETIME),
+                    ATTR_CATEGORY: event_category(event.get(CONF_EVENTCODE)),
+                },
+            )
 
-                return body
+    async def _async_fetch_summaries(
+        self, mail_piece_ids: list[str]
+    ) -> dict[str, tuple[str, str | None]]:
+        """Return the last event of each mail piece, in batched summary requests.
+
+        Items missing from the result, because a batch failed or the summary
+        had no last event, are fetched in full. A rejected batch falls back
+        to one summary per request, and a rejected single summary to full
+        fetches, each for SUMMARY_RETRY.
+        """
+        summaries: dict[str, tuple[str, str | None]] = {}
+        if self._summaries_until > time.monotonic():
+            return summaries
+
+        size = SUMMARY_BATCH_SIZE
+        if self._batch_summaries_until > time.monotonic():
+            size = 1
+        remaining = list(mail_piece_ids)
+        while remaining:
+            batch, remaining = remaining[:size], remaining[size:]
+            url = SUMMARY_URL.format(mailPieceIds=",".join(batch))
+            try:
+                resp = await self.client.async_request("GET", url)
+                if resp.status in (400, 404, 405):
+                    retry_at = time.monotonic() + SUMMARY_RETRY.total_seconds()
+                    if len(batch) > 1:
+                        _LOGGER.debug("Batched summaries rejected (%s)", resp.status)
+                        self._batch_summaries_until = retry_at
+                        size = 1
+                        remaining = batch + remaining
+                        continue
+                    _LOGGER.debug("Summaries unavailable (%s)", resp.status)
+                    self._summaries_until = retry_at
+                    break
+                if resp.status != 200:
+                    continue
+                body = await self.scheduler.body_cache.async_json(url, resp)
+            except (*TRANSIENT_ERRORS, InvalidAuth, ValueError) as err:
+                # Items without a summary are fetched in full, which reports
+                # rejected credentials
+                _LOGGER.debug("Unable to fetch summaries: %s", err)
+                continue
+
+            items = body.get(CONF_MAILPIECES) if isinstance(body, dict) else None
+            if isinstance(items, dict):
+                items = [items]
+            for item in items or []:
+                if isinstance(item, dict) and (event := last_event(item)):
+                    summaries[item.get(CONF_MAILPIECE_ID)] = event
+        return summaries
 
-        except InvalidAuth as err:
-            raise ConfigEntryAuthFailed from err
-        except RoyalMailError as err:
-            raise UpdateFailed(str(err)) from err
-        except ConfigEntryAuthFailed as err:
-            raise ConfigEntryAuthFailed(f"Config Entry failed: {err}") from err
-        except ValueError as err:
-            _LOGGER.error("Value error occurred: %s", err)
-            raise UpdateFailed(f"Unexpected response: {err}") from err
-        except Exception as err:
-            _LOGGER.error("Unexpected exception: %s", err)
-            raise UnknownError from err
-
-    async def _make_request(self):
+    async def _make_request_all_mailpieces(self):
         """Make the API request."""
-        return await self.session.request(
-            method="POST",
-            url=TOKENS_URL,
-            json=self.body,
-            headers={CONF_IBM_CLIENT_ID: IBM_CLIENT_ID},
+        return await self.client.async_request(
+            "GET", MAILPIECES_URL.format(guid=self.guid, ibmClientId=IBM_CLIENT_ID)
         )
 
-    async def refresh_tokens(self):
-        """Public method to refresh tokens."""
-        return await self._async_update_data()
-
-
-class RoyalMailError(HomeAssistantError):
-    """Base error."""
-
-
-class InvalidAuth(RoyalMailError):
-    """Raised when invalid authentication credentials are provided."""
-
-
-class APIRatelimitExceeded(RoyalMailError):
-    """Raised when the API rate limit is exceeded."""
-
+    async def async_refresh_mailpiece(self, mail_piece_id: str) -> dict:
+        """Fetch one tracked mail piece and merge it into the current data.
+
+        Only this parcel's listener and the summary listeners are notified,
+        not every entity, and the next full poll stays on schedule.
+        """
+        parcels = (self.data or {}).get(CONF_MP_DETAILS) or {}
+        if mail_piece_id not in parcels:
+            raise NotFoundError(f"{mail_piece_id} is not tracked by this account")
+
+        mail_piece = await self.async_fetch_shared(
+            mail_piece_id,
+            functools.partial(
+                self._fetch_mailpiece,
+                mail_piece_id,
+                self.interactive_session,
+            ),
+            timedelta(0),
+        )
+        if "errors" in mail_piece or not mail_piece.get(CONF_MAILPIECES):
+            raise NotFoundError(f"Unable to refresh {mail_piece_id}")
+
+        parcel = mail_piece[CONF_MAILPIECES]
+        self._last_good[mail_piece_id] = parcel
+        self._stale_since.pop(mail_piece_id, None)
+        self._merge_history({mail_piece_id: parcel})
+        self.data = {**self.data, CONF_MP_DETAILS: {**parcels, mail_piece_id: parcel}}
+        self._update_indexes(self.data[CONF_MP_DETAILS])
+        if (listener := self._parcel_listeners.get(mail_piece_id)) is not None:
+            listener(parcel)
+        for update_callback in list(self._summary_listeners):
+            update_callback()
+        return parcel
+
+    async def async_fetch_shared(
+        self,
+        mail_piece_id: str,
+        fetch: Callable[[], Awaitable[dict]],
+        max_age: timedelta = COALESCE_TTL,
+    ) -> dict:
+        """Fetch a mail piece through the scheduler, unless replaying.
+
+        Replayed responses are never shared with live accounts.
+        """
+        if self.replay:
+            return await fetch()
+        return await self.scheduler.async_fetch_mailpiece(
+            mail_piece_id, fetch, max_age
+        )
 
-class NotFoundError(RoyalMailError):
-    """Raised when the API rate limit is exceeded."""
+    async def _fetch_mailpiece(self, mail_piece_id: str, session=None) -> dict:
+        """Fetch and decode a single mail piece."""
+        return await self.client.async_fetch_mailpiece(
+            mail_piece_id, session, self.scheduler.body_cache.async_json
+        )
 
 
-class UnknownError(RoyalMailError):
-    """Raised when an unknown error occurs."""
+def last_event(mail_piece: dict) -> tuple[str, str | None] | None:
+    """Return the last event code and time from a mail piece summary."""
+    summary = mail_piece.get(CONF_SUMMARY) or {}
+    if not (code := summary.get(CONF_LAST_EVENT_CODE)):
+        return None
+    return code, summary.get(CONF_LAST_EVENT_DATETIME)
@@ -0,0 +1,102 @@
+"""Set up and tear down Royal Mail accounts."""
+
+from __future__ import annotations
+
+import asyncio
+
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.const import Platform
+from homeassistant.core import HomeAssistant
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+
+from .const import DOMAIN
+from .history import RoyalMailEventHistory
+from .runtime import RoyalMailConfigEntry, RoyalMailRuntime
+from .scheduler import async_get_scheduler
+from .services import async_setup_services
+from .stats import RoyalMailDeliveryStats
+from .tokens import RoyalMailTokenStore
+from .track import RoyalMailTrackProgress
+
+PLATFORMS = [Platform.IMAGE, Platform.SENSOR]
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup_entry(hass: HomeAssistant, entry: RoyalMailConfigEntry) -> bool:
+    """Set up platform from a ConfigEntry."""
+    # The shared connection pool stays open until the last account unloads
+    scheduler = async_get_scheduler(hass)
+    scheduler.async_acquire()
+    entry.async_on_unload(scheduler.async_release)
+
+    # Tokens and the device id live in their own store so refreshes don't
+    # rewrite the entry and restarts don't register a new device.
+    token_store = RoyalMailTokenStore(hass, entry.entry_id)
+    await token_store.async_load()
+    token_store.async_migrate_entry(entry)
+    token_store.async_get_device_id()
+
+    # Registers update listener to update config entry when options are updated.
+    unsub_options_update_listener = entry.add_update_listener(options_update_listener)
+
+    # Use async_on_unload to register the listener without storing it in entry data
+    entry.async_on_unload(unsub_options_update_listener)
+
+    # Platforms and services share this account's runtime until it is unloaded.
+    runtime = RoyalMailRuntime(hass, entry, token_store)
+    await runtime.async_load()
+    await runtime.coordinator.async_config_entry_first_refresh()
+    entry.runtime_data = runtime
+
+    # Forward the setup to each platform.
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    return True
+
+
+async def options_update_listener(hass: HomeAssistant, config_entry: ConfigEntry):
+    """Handle options update."""
+    entry_state = hass.config_entries.async_get_entry(config_entry.entry_id).state
+
+    # Proceed only if the entry is in a valid state (loaded, etc.)
+    if entry_state not in (
+        ConfigEntryState.SETUP_IN_PROGRESS,
+        ConfigEntryState.SETUP_RETRY,
+    ):
+        await hass.config_entries.async_reload(config_entry.entry_id)
+
+
+async def async_unload_entry(
+    hass: HomeAssistant, entry: RoyalMailConfigEntry
+) -> bool:
+    """Unload a config entry."""
+    unload_ok = all(
+        await asyncio.gather(
+            *[
+                hass.config_entries.async_forward_entry_unload(entry, platform)
+                for platform in PLATFORMS
+            ]
+        )
+    )
+
+    if unload_ok:
+        await entry.runtime_data.async_flush()
+
+    return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove everything stored for a removed account."""
+    await RoyalMailTokenStore(hass, entry.entry_id).async_remove()
+    # Replays keep separate stores next to the account's own
+    for storage_id in (entry.entry_id, f"{entry.entry_id}.replay"):
+        await RoyalMailEventHistory(hass, storage_id).async_remove()
+        await RoyalMailDeliveryStats(hass, storage_id).async_remove()
+        await RoyalMailTrackProgress(hass, storage_id).async_remove()
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Royal Mail component from yaml configuration."""
+    # Services dispatch to whichever accounts are loaded when they are called
+    async_setup_services(hass)
+    return True
@@ -0,0 +1,144 @@
+"""Export of Royal Mail tracking history."""
+
+from __future__ import annotations
+
+from collections.abc import Container, Iterator
+import csv
+from datetime import datetime
+from itertools import islice
+import json
+import logging
+import os
+from typing import Any, TextIO
+
+from homeassistant.core import HomeAssistant
+
+from .buckets import event_category
+from .const import (
+    ATTR_CATEGORY,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_MAILPIECE_ID,
+    ATTR_PRODUCT,
+    CONF_EVENTCODE,
+    CONF_EVENTDATETIME,
+    CONF_EVENTNAME,
+    CONF_LOCATION_NAME,
+    EXPORT_BATCH_SIZE,
+    EXPORT_FORMAT_CSV,
+)
+from .history import RoyalMailEventHistory, event_time
+from .index import normalize, product_matches
+
+_LOGGER = logging.getLogger(__name__)
+
+EXPORT_FIELDS = (
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_MAILPIECE_ID,
+    ATTR_PRODUCT,
+    ATTR_CATEGORY,
+    CONF_EVENTCODE,
+    CONF_EVENTNAME,
+    CONF_EVENTDATETIME,
+    CONF_LOCATION_NAME,
+)
+
+
+def iter_history_rows(
+    entry_id: str,
+    history: RoyalMailEventHistory,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    categories: Container[str] | None = None,
+    product: str | None = None,
+) -> Iterator[dict[str, Any]]:
+    """Yield one row per recorded event that matches the filters.
+
+    Events happened at or after start and before end, and belong to one of
+    the categories and a mail piece of the product, where given. Products
+    are matched like query_parcels does, on whole words of their name.
+    """
+    product = normalize(product)
+    for mail_piece_id in history.iter_mail_piece_ids():
+        item_product = history.product(mail_piece_id)
+        if product is not None and not product_matches(
+            product, normalize(item_product)
+        ):
+            continue
+        # A snapshot, as a poll may merge events between batches
+        for event in list(history.iter_events(mail_piece_id)):
+            category = event_category(event.get(CONF_EVENTCODE))
+            if categories and category not in categories:
+                continue
+            if start is not None or end is not None:
+                when = event_time(event)
+                if (start is not None and when < start) or (
+                    end is not None and when >= end
+                ):
+                    continue
+            yield {
+                ATTR_CONFIG_ENTRY_ID: entry_id,
+                ATTR_MAILPIECE_ID: mail_piece_id,
+                ATTR_PRODUCT: item_product,
+                ATTR_CATEGORY: category,
+                **event,
+            }
+
+
+class _ExportFile:
+    """Rows written to a temporary file, moved into place once complete."""
+
+    def __init__(self, path: str, export_format: str) -> None:
+        """Init."""
+        self.path = path
+        self.export_format = export_format
+        self._file: TextIO | None = None
+        self._writer: csv.DictWriter | None = None
+
+    def open(self) -> None:
+        """Create the file and write the CSV header."""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        # Fail rather than share the file with another export to the same path
+        self._file = open(f"{self.path}.tmp", "x", encoding="utf-8", newline="")
+        if self.export_format == EXPORT_FORMAT_CSV:
+            self._writer = csv.DictWriter(self._file, EXPORT_FIELDS)
+            self._writer.writeheader()
+
+    def write(self, rows: list[dict[str, Any]]) -> None:
+        """Append a batch of rows."""
+        if self._writer is not None:
+            self._writer.writerows(rows)
+        else:
+            self._file.writelines(
+                json.dumps(row, separators=(",", ":")) + "\n" for row in rows
+            )
+
+    def close(self, complete: bool) -> None:
+        """Close the file, keeping it only if every row was written."""
+        self._file.close()
+        if complete:
+            os.replace(f"{self.path}.tmp", self.path)
+        else:
+            os.remove(f"{self.path}.tmp")
+
+
+async def async_export_rows(
+    hass: HomeAssistant, rows: Iterator[dict[str, Any]], path: str, export_format: str
+) -> int:
+    """Write rows to a CSV or JSONL file in batches and return how many.
+
+    Rows are produced in the event loop and written in the executor, so at
+    most one batch is held in memory at a time.
+    """
+    export = _ExportFile(path, export_format)
+    await hass.async_add_executor_job(export.open)
+    count = 0
+    complete = False
+    try:
+        while batch := list(islice(rows, EXPORT_BATCH_SIZE)):
+            await hass.async_add_executor_job(export.write, batch)
+            count += len(batch)
+        complete = True
+    finally:
+        await hass.async_add_executor_job(export.close, complete)
+    _LOGGER.debug("Exported %s Royal Mail history rows to %s", count, path)
+    return count
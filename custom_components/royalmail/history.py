@@ -0,0 +1,222 @@
+"""Persistent Royal Mail tracking event history."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from datetime import datetime
+import logging
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_EVENTCODE,
+    CONF_EVENTDATETIME,
+    CONF_EVENTNAME,
+    CONF_EVENTS,
+    CONF_LOCATION_NAME,
+    CONF_PRODUCT_NAME,
+    CONF_SUMMARY,
+    DOMAIN,
+    HISTORY_COMPACT_INTERVAL,
+    HISTORY_MAX_EVENTS,
+    HISTORY_MAX_ITEMS,
+    HISTORY_RETENTION,
+    HISTORY_SAVE_DELAY,
+    HISTORY_STORAGE_VERSION,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Events are stored as compact lists in this field order.
+EVENT_FIELDS = (CONF_EVENTCODE, CONF_EVENTNAME, CONF_EVENTDATETIME, CONF_LOCATION_NAME)
+
+
+def event_key(mail_piece_id: str, event: dict) -> tuple[str, str, str]:
+    """Return the identity of a tracking event."""
+    return (
+        mail_piece_id,
+        event.get(CONF_EVENTCODE) or "",
+        event.get(CONF_EVENTDATETIME) or "",
+    )
+
+
+def event_time(event: dict) -> datetime:
+    """Return when an event happened, for ordering events."""
+    parsed = dt_util.parse_datetime(event.get(CONF_EVENTDATETIME) or "")
+    return dt_util.as_utc(parsed) if parsed else dt_util.utc_from_timestamp(0)
+
+
+class RoyalMailEventHistory:
+    """Append-only store of every tracking event seen for an account.
+
+    Events are keyed by (mailPieceId, eventCode, eventDateTime), so merging a
+    poll only appends events that have not been seen before and the history
+    survives the mail piece being removed from the account. Trimming a long
+    history records the time of the latest dropped event, and older events are
+    not appended again.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Init."""
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(
+            hass, HISTORY_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.history"
+        )
+        self._items: dict[str, dict[str, Any]] = {}
+        self._seen: set[tuple[str, str, str]] = set()
+        self._oversized: set[str] = set()
+        self._next_sweep: datetime | None = None
+
+    async def async_load(self) -> None:
+        """Load the history from disk."""
+        stored = await self._store.async_load() or {}
+        self._items = stored.get("items", {})
+        self._seen = {
+            (mail_piece_id, event[0], event[2])
+            for mail_piece_id, item in self._items.items()
+            for event in item["events"]
+        }
+        self._oversized = {
+            mail_piece_id
+            for mail_piece_id, item in self._items.items()
+            if len(item["events"]) > HISTORY_MAX_EVENTS
+        }
+        if self._compact():
+            self._store.async_delay_save(self._data_to_save, HISTORY_SAVE_DELAY)
+
+    async def async_flush(self) -> None:
+        """Write any pending changes to disk now."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Remove the history from disk."""
+        await self._store.async_remove()
+
+    @property
+    def empty(self) -> bool:
+        """Return True if no events have been recorded yet."""
+        return not self._items
+
+    @callback
+    def async_merge(self, mail_piece_id: str, mail_piece: dict) -> list[dict]:
+        """Append unseen events for a mail piece and return them oldest first."""
+        # Events are matched by identity, as the API does not always list them
+        # in order, and only the new ones are sorted.
+        item = self._items.get(mail_piece_id)
+        trimmed_until = None
+        if item and item.get("trimmed_until"):
+            trimmed_until = event_time({CONF_EVENTDATETIME: item["trimmed_until"]})
+
+        new_events = []
+        for event in reversed(mail_piece.get(CONF_EVENTS) or []):
+            key = event_key(mail_piece_id, event)
+            if key in self._seen:
+                continue
+            if trimmed_until is not None and event_time(event) <= trimmed_until:
+                continue
+            self._seen.add(key)
+            new_events.append(event)
+
+        if not new_events:
+            return new_events
+        new_events.sort(key=event_time)
+
+        item = self._items.setdefault(mail_piece_id, {"product": None, "events": []})
+        if product := (mail_piece.get(CONF_SUMMARY) or {}).get(CONF_PRODUCT_NAME):
+            item["product"] = product
+        item["updated"] = dt_util.utcnow().isoformat()
+        item["events"].extend(
+            [event.get(field) for field in EVENT_FIELDS] for event in new_events
+        )
+        if len(item["events"]) > HISTORY_MAX_EVENTS:
+            self._oversized.add(mail_piece_id)
+
+        self._store.async_delay_save(self._data_to_save, HISTORY_SAVE_DELAY)
+        return new_events
+
+    @callback
+    def async_compact(self) -> None:
+        """Apply retention limits and schedule a save if anything was dropped."""
+        if self._compact():
+            self._store.async_delay_save(self._data_to_save, HISTORY_SAVE_DELAY)
+
+    def product(self, mail_piece_id: str) -> str | None:
+        """Return the product name recorded for a mail piece."""
+        item = self._items.get(mail_piece_id)
+        return item["product"] if item else None
+
+    def iter_mail_piece_ids(self) -> Iterator[str]:
+        """Iterate the mail pieces with recorded history."""
+        return iter(list(self._items))
+
+    def iter_events(self, mail_piece_id: str) -> Iterator[dict]:
+        """Iterate the recorded events of a mail piece, oldest first."""
+        item = self._items.get(mail_piece_id)
+        if item is None:
+            return
+        for event in item["events"]:
+            yield dict(zip(EVENT_FIELDS, event))
+
+    def _compact(self) -> bool:
+        """Apply the limits that are exceeded, returning True if changed."""
+        changed = False
+        now = dt_util.utcnow()
+        cutoff = now - HISTORY_RETENTION
+
+        def updated(item: dict) -> datetime:
+            return dt_util.parse_datetime(item.get("updated") or "") or cutoff
+
+        for mail_piece_id in self._oversized:
+            if mail_piece_id in self._items:
+                self._trim(mail_piece_id)
+                changed = True
+        self._oversized.clear()
+
+        # Items only expire after months, so the full scan runs once a day
+        if self._next_sweep is None or now >= self._next_sweep:
+            self._next_sweep = now + HISTORY_COMPACT_INTERVAL
+            for mail_piece_id, item in list(self._items.items()):
+                if updated(item) < cutoff:
+                    self._drop(mail_piece_id)
+                    changed = True
+
+        if len(self._items) > HISTORY_MAX_ITEMS:
+            oldest = sorted(self._items, key=lambda key: updated(self._items[key]))
+            for mail_piece_id in oldest[: len(self._items) - HISTORY_MAX_ITEMS]:
+                self._drop(mail_piece_id)
+            changed = True
+
+        if changed:
+            _LOGGER.debug("Compacted Royal Mail history to %s items", len(self._items))
+        return changed
+
+    def _trim(self, mail_piece_id: str) -> None:
+        """Drop the oldest events of a long history, remembering where it ends."""
+        item = self._items[mail_piece_id]
+        trimmed = item["events"][:-HISTORY_MAX_EVENTS]
+        del item["events"][:-HISTORY_MAX_EVENTS]
+
+        # The mark is persisted, the seen set is rebuilt from kept events only
+        marks = [event[2] for event in trimmed]
+        if item.get("trimmed_until"):
+            marks.append(item["trimmed_until"])
+        item["trimmed_until"] = max(
+            marks, key=lambda value: event_time({CONF_EVENTDATETIME: value})
+        )
+        for event in trimmed:
+            self._seen.discard((mail_piece_id, event[0], event[2]))
+
+    def _drop(self, mail_piece_id: str) -> None:
+        """Forget a mail piece and its events."""
+        item = self._items.pop(mail_piece_id)
+        self._oversized.discard(mail_piece_id)
+        for event in item["events"]:
+            self._seen.discard((mail_piece_id, event[0], event[2]))
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data for storage."""
+        return {"items": self._items}
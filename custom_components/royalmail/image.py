@@ -0,0 +1,163 @@
+"""Royal Mail proof of delivery image platform."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from datetime import datetime
+
+from homeassistant.components.image import ImageEntity
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_COMPACT,
+    CONF_DELIVERY_DATETIME,
+    CONF_HREF,
+    CONF_LINKS,
+    CONF_MP_DETAILS,
+    CONF_PROOF_OF_DELIVERY,
+    DOMAIN,
+    IMAGE_CHUNK_SIZE,
+    IMAGE_LINKS,
+    IMAGE_URL,
+)
+from .coordinator import RoyalMaiMailPiecesCoordinator
+from .runtime import RoyalMailConfigEntry
+from .scheduler import async_get_scheduler
+
+
+def get_image_href(parcel: dict | None, kind: str) -> str | None:
+    """Return the image link of the given kind for a parcel, if any."""
+    if not parcel:
+        return None
+    links = parcel.get(CONF_LINKS) or {}
+    for link in IMAGE_LINKS[kind]:
+        href = (links.get(link) or {}).get(CONF_HREF)
+        if href:
+            return href
+    return None
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    entry: RoyalMailConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up proof of delivery images from a config entry."""
+    if entry.options.get(CONF_COMPACT, False):
+        # Compact accounts have no per-parcel entities
+        return
+
+    coordinator = entry.runtime_data.coordinator
+    added: set[tuple[str, str]] = set()
+
+    @callback
+    def _async_add_new_images() -> None:
+        """Add an image entity for every new photo or signature link."""
+        new_images = []
+        parcels = coordinator.data.get(CONF_MP_DETAILS, {})
+        for mail_piece_id, parcel in parcels.items():
+            for kind in IMAGE_LINKS:
+                if (mail_piece_id, kind) in added or not get_image_href(parcel, kind):
+                    continue
+                added.add((mail_piece_id, kind))
+                new_images.append(
+                    RoyalMailDeliveryImage(
+                        hass, coordinator, entry.title, mail_piece_id, kind
+                    )
+                )
+        if new_images:
+            async_add_entities(new_images)
+
+    _async_add_new_images()
+    entry.async_on_unload(coordinator.async_add_listener(_async_add_new_images))
+
+
+class RoyalMailDeliveryImage(
+    CoordinatorEntity[RoyalMaiMailPiecesCoordinator], ImageEntity
+):
+    """Photo or signature taken when a parcel was delivered.
+
+    Image bytes are only requested when the image is viewed, never while
+    polling, and are served from the shared disk cache afterwards.
+    """
+
+    _attr_content_type = "image/jpeg"
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: RoyalMaiMailPiecesCoordinator,
+        name: str,
+        mail_piece_id: str,
+        kind: str,
+    ) -> None:
+        """Init."""
+        CoordinatorEntity.__init__(self, coordinator)
+        ImageEntity.__init__(self, hass)
+        self.mail_piece_id = mail_piece_id
+        self.kind = kind
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{name}")},
+            manufacturer="Royal Mail",
+            model="Item Tracker",
+            name=name,
+            configuration_url="https://github.com/jampez77/RoyalMail/",
+        )
+        self._attr_name = f"{mail_piece_id} {kind}"
+        self._attr_unique_id = f"{DOMAIN}-{name}-{mail_piece_id}-{kind}".lower()
+        self.entity_id = f"image.{DOMAIN}_parcel_{mail_piece_id}_{kind}".lower()
+        self._attr_image_last_updated = self._delivered_at()
+
+    @property
+    def parcel(self) -> dict | None:
+        """Return the parcel from coordinator data."""
+        return self.coordinator.data.get(CONF_MP_DETAILS, {}).get(self.mail_piece_id)
+
+    @property
+    def available(self) -> bool:
+        """Return if the image can be fetched."""
+        href = get_image_href(self.parcel, self.kind)
+        return super().available and href is not None
+
+    def _delivered_at(self) -> datetime:
+        """Return the delivery time, which never changes once set."""
+        proof = (self.parcel or {}).get(CONF_PROOF_OF_DELIVERY) or {}
+        delivered = dt_util.parse_datetime(proof.get(CONF_DELIVERY_DATETIME) or "")
+        return delivered or dt_util.utcnow()
+
+    async def async_image(self) -> bytes | None:
+        """Return the image, downloading it on first view only."""
+        href = get_image_href(self.parcel, self.kind)
+        if href is None:
+            return None
+
+        scheduler = async_get_scheduler(self.hass)
+        image = await scheduler.image_cache.async_get(
+            href, lambda: self._async_download(href)
+        )
+        if image.startswith(b"\x89PNG"):
+            self._attr_content_type = "image/png"
+        return image
+
+    async def _async_download(self, href: str) -> AsyncIterator[bytes]:
+        """Stream the image body in chunks."""
+        resp = await self.coordinator.client.async_request(
+            "GET",
+            IMAGE_URL.format(image=href),
+            self.coordinator.interactive_session,
+        )
+        try:
+            if resp.status != 200:
+                raise HomeAssistantError(
+                    f"Unable to fetch {self.kind} for {self.mail_piece_id}: "
+                    f"{resp.status}"
+                )
+            async for chunk in resp.content.iter_chunked(IMAGE_CHUNK_SIZE):
+                yield chunk
+        finally:
+            resp.release()
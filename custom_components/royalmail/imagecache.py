@@ -0,0 +1,152 @@
+"""On-disk cache for Royal Mail proof of delivery images."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Callable
+from contextlib import asynccontextmanager
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+from homeassistant.core import HomeAssistant
+
+from .const import IMAGE_CACHE_MAX_BYTES
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RoyalMailImageCache:
+    """Size bounded LRU cache of images on disk.
+
+    Delivery images never change once taken, so an image is only downloaded
+    the first time it is viewed and served from disk until it is evicted.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        directory: str,
+        max_bytes: int = IMAGE_CACHE_MAX_BYTES,
+    ) -> None:
+        """Init."""
+        self.hass = hass
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._index: OrderedDict[str, int] | None = None
+        self._index_lock = asyncio.Lock()
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._lock_users: dict[str, int] = {}
+
+    async def async_get(
+        self, key: str, download: Callable[[], AsyncIterator[bytes]]
+    ) -> bytes:
+        """Return the image for key, streaming it to disk on a cache miss."""
+        name = hashlib.sha256(key.encode()).hexdigest()
+        async with self._index_lock:
+            if self._index is None:
+                self._index = await self.hass.async_add_executor_job(self._load_index)
+
+        async with self._async_locked(name):
+            path = self.directory / name
+            if name in self._index:
+                self._index.move_to_end(name)
+                try:
+                    return await self.hass.async_add_executor_job(self._read, path)
+                except FileNotFoundError:
+                    self._index.pop(name, None)
+
+            size = await self._async_download(path, download)
+            self._index[name] = size
+            evicted = self._evict()
+            image = await self.hass.async_add_executor_job(self._read, path)
+
+        for evicted_name in evicted:
+            # Under its own lock, so the file is never removed while it is read
+            async with self._async_locked(evicted_name):
+                if evicted_name not in self._index:
+                    await self.hass.async_add_executor_job(
+                        self._remove, [evicted_name]
+                    )
+        return image
+
+    @asynccontextmanager
+    async def _async_locked(self, name: str) -> AsyncIterator[None]:
+        """Hold the lock of one image, dropping it once nobody else wants it."""
+        lock = self._locks.setdefault(name, asyncio.Lock())
+        self._lock_users[name] = self._lock_users.get(name, 0) + 1
+        try:
+            async with lock:
+                yield
+        finally:
+            self._lock_users[name] -= 1
+            if not self._lock_users[name]:
+                del self._lock_users[name]
+                del self._locks[name]
+
+    async def _async_download(
+        self, path: Path, download: Callable[[], AsyncIterator[bytes]]
+    ) -> int:
+        """Stream a download to a temporary file and move it into place."""
+        partial = path.with_suffix(".part")
+        handle = await self.hass.async_add_executor_job(self._open, partial)
+        size = 0
+        try:
+            async for chunk in download():
+                await self.hass.async_add_executor_job(handle.write, chunk)
+                size += len(chunk)
+        except BaseException:
+            await self.hass.async_add_executor_job(handle.close)
+            await self.hass.async_add_executor_job(self._remove, [partial.name])
+            raise
+        await self.hass.async_add_executor_job(handle.close)
+        await self.hass.async_add_executor_job(os.replace, partial, path)
+        return size
+
+    def _evict(self) -> list[str]:
+        """Drop least recently used entries until the cache fits."""
+        evicted = []
+        total = sum(self._index.values())
+        while total > self.max_bytes and len(self._index) > 1:
+            name, size = self._index.popitem(last=False)
+            total -= size
+            evicted.append(name)
+        return evicted
+
+    def _open(self, path: Path):
+        """Open a file for writing, creating the cache directory."""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return path.open("wb")
+
+    def _read(self, path: Path) -> bytes:
+        """Read a cached image and mark it as recently used."""
+        image = path.read_bytes()
+        os.utime(path)
+        return image
+
+    def _remove(self, names: list[str]) -> None:
+        """Remove files from the cache directory."""
+        for name in names:
+            try:
+                (self.directory / name).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _load_index(self) -> OrderedDict[str, int]:
+        """Rebuild the LRU order from file access times."""
+        index: OrderedDict[str, int] = OrderedDict()
+        if not self.directory.is_dir():
+            return index
+        entries = []
+        for path in self.directory.iterdir():
+            if path.suffix == ".part":
+                path.unlink(missing_ok=True)
+                continue
+            stat = path.stat()
+            entries.append((stat.st_mtime, path.name, stat.st_size))
+        for _, name, size in sorted(entries):
+            index[name] = size
+        _LOGGER.debug("Loaded %s cached Royal Mail images", len(index))
+        return index
@@ -0,0 +1,170 @@
+"""Secondary indexes over Royal Mail parcels."""
+
+from __future__ import annotations
+
+from datetime import date
+
+from homeassistant.const import ATTR_LOCATION
+from homeassistant.util import dt as dt_util
+
+from .buckets import event_category
+from .const import (
+    ATTR_CATEGORY,
+    ATTR_DESTINATION,
+    ATTR_PRODUCT,
+    ATTR_STARTED,
+    CONF_DESTINATION_COUNTRY,
+    CONF_EVENTCODE,
+    CONF_EVENTS,
+    CONF_LAST_EVENT_LOCATION,
+    CONF_LOCATION_NAME,
+    CONF_PRODUCT_NAME,
+    CONF_SUMMARY,
+)
+from .history import event_time
+from .stats import transit_started
+
+INDEX_FIELDS = (ATTR_CATEGORY, ATTR_PRODUCT, ATTR_LOCATION, ATTR_DESTINATION)
+
+
+def normalize(value: str | None) -> str | None:
+    """Return an index key that ignores case and extra spaces."""
+    if not value or not (words := value.split()):
+        return None
+    return " ".join(words).casefold()
+
+
+def product_matches(query: str, product: str | None) -> bool:
+    """Return whether a normalized query names a product, or words of it.
+
+    The API names products in full, e.g. Royal Mail Tracked 24, so tracked 24
+    matches it but tracked 2 does not.
+    """
+    return product is not None and f" {query} " in f" {product} "
+
+
+def parcel_keys(parcel: dict | None) -> dict[str, str | None]:
+    """Return the index keys of a parcel."""
+    parcel = parcel or {}
+    summary = parcel.get(CONF_SUMMARY) or {}
+    events = parcel.get(CONF_EVENTS) or []
+    last = events[0] if events else {}
+    started = transit_started(events)
+    if started is None and events:
+        started = min(event_time(event) for event in events)
+    return {
+        ATTR_CATEGORY: event_category(last.get(CONF_EVENTCODE)),
+        ATTR_PRODUCT: normalize(summary.get(CONF_PRODUCT_NAME)),
+        ATTR_LOCATION: normalize(
+            summary.get(CONF_LAST_EVENT_LOCATION) or last.get(CONF_LOCATION_NAME)
+        ),
+        ATTR_DESTINATION: normalize(summary.get(CONF_DESTINATION_COUNTRY)),
+        ATTR_STARTED: started and dt_util.as_local(started).date().isoformat(),
+    }
+
+
+class RoyalMailParcelIndex:
+    """Parcel ids by category, product, location, destination and start day.
+
+    Like the status buckets, only parcels that are new, changed or gone are
+    re-indexed. A query starts from its smallest matching set, so it costs
+    about the size of its result rather than a scan of every parcel.
+    """
+
+    def __init__(self) -> None:
+        """Init."""
+        self._index: dict[str, dict[str, dict[str, None]]] = {
+            field: {} for field in (*INDEX_FIELDS, ATTR_STARTED)
+        }
+        self._parcels: dict[str, tuple[dict | None, dict[str, str | None]]] = {}
+
+    def update(self, parcels: dict[str, dict | None]) -> None:
+        """Re-index the parcels that changed since the last update."""
+        for mail_piece_id in self._parcels.keys() - parcels.keys():
+            _, keys = self._parcels.pop(mail_piece_id)
+            self._remove(mail_piece_id, keys)
+
+        for mail_piece_id, parcel in parcels.items():
+            known = self._parcels.get(mail_piece_id)
+            if known is not None and known[0] is parcel:
+                continue
+            keys = parcel_keys(parcel)
+            self._parcels[mail_piece_id] = (parcel, keys)
+            if known is not None and known[1] == keys:
+                continue
+            if known is not None:
+                self._remove(mail_piece_id, known[1])
+            self._add(mail_piece_id, keys)
+
+    def query(
+        self,
+        categories: list[str] | None = None,
+        product: str | None = None,
+        location: str | None = None,
+        destination: str | None = None,
+        started_from: date | None = None,
+        started_until: date | None = None,
+    ) -> list[str]:
+        """Return the ids of the parcels matching every given filter.
+
+        Text filters ignore case, a product matches any whole words of its
+        name, and the start day range is inclusive.
+        """
+        candidates: list[dict[str, None]] = []
+        if categories:
+            candidates.append(self._union(ATTR_CATEGORY, categories))
+        if product is not None:
+            query = normalize(product) or ""
+            names = [
+                name
+                for name in self._index[ATTR_PRODUCT]
+                if product_matches(query, name)
+            ]
+            candidates.append(self._union(ATTR_PRODUCT, names))
+        for field, value in (
+            (ATTR_LOCATION, location),
+            (ATTR_DESTINATION, destination),
+        ):
+            if value is not None:
+                candidates.append(self._index[field].get(normalize(value) or "", {}))
+        if started_from is not None or started_until is not None:
+            # Days are ISO dates, so they compare in date order
+            days = [
+                day
+                for day in self._index[ATTR_STARTED]
+                if (started_from is None or day >= started_from.isoformat())
+                and (started_until is None or day <= started_until.isoformat())
+            ]
+            candidates.append(self._union(ATTR_STARTED, days))
+
+        if not candidates:
+            return list(self._parcels)
+        smallest, *others = sorted(candidates, key=len)
+        return [
+            mail_piece_id
+            for mail_piece_id in smallest
+            if all(mail_piece_id in other for other in others)
+        ]
+
+    def _union(self, field: str, values: list[str]) -> dict[str, None]:
+        """Return the ids indexed under any of the values of a field."""
+        ids: dict[str, None] = {}
+        for value in values:
+            ids.update(self._index[field].get(value, {}))
+        return ids
+
+    def _add(self, mail_piece_id: str, keys: dict[str, str | None]) -> None:
+        """Add a parcel under each of its keys."""
+        for field, value in keys.items():
+            if value is not None:
+                self._index[field].setdefault(value, {})[mail_piece_id] = None
+
+    def _remove(self, mail_piece_id: str, keys: dict[str, str | None]) -> None:
+        """Remove a parcel from under each of its keys."""
+        for field, value in keys.items():
+            if value is None:
+                continue
+            ids = self._index[field][value]
+            del ids[mail_piece_id]
+            if not ids:
+                del self._index[field][value]
@@ -0,0 +1,229 @@
+"""Client side rate limiting for Royal Mail requests."""
+
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import heapq
+import itertools
+import logging
+import random
+import time
+from urllib.parse import urlsplit
+
+from aiohttp import ClientError, ClientResponse, ClientSession
+
+from .const import (
+    BACKOFF_BASE,
+    BACKOFF_MAX,
+    PRIORITY_BACKGROUND,
+    RATE_LIMIT_BACKOFF,
+    RATE_LIMIT_BURST,
+    RATE_LIMIT_MIN_RATE,
+    RATE_LIMIT_RATE,
+    RATE_LIMIT_RECOVERY,
+)
+from .session import request_timeout
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header into a delay in seconds."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RoyalMailRateLimiter:
+    """Token bucket shared by every Royal Mail request.
+
+    Waiters are served lowest priority value first, so interactive service
+    calls jump ahead of background polling. The refill rate is halved on
+    each 429 and recovers slowly while requests succeed.
+    """
+
+    def __init__(
+        self,
+        rate: float = RATE_LIMIT_RATE,
+        burst: int = RATE_LIMIT_BURST,
+    ) -> None:
+        """Init."""
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._counter = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def async_acquire(self, priority: int = PRIORITY_BACKGROUND) -> None:
+        """Wait for a token in the given priority lane."""
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._counter), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The token was granted as we were cancelled, hand it back
+                self._tokens = min(self.burst, self._tokens + 1)
+                self._dispatch()
+            raise
+
+    def async_rate_limited(self, retry_after: float | None) -> None:
+        """Back off after a 429 response."""
+        delay = retry_after if retry_after is not None else RATE_LIMIT_BACKOFF
+        self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+        self.rate = max(RATE_LIMIT_MIN_RATE, self.rate / 2)
+        self._tokens = 0.0
+        _LOGGER.warning(
+            "Royal Mail rate limit hit, pausing %.0fs and slowing to %.2f req/s",
+            delay,
+            self.rate,
+        )
+
+    def async_succeeded(self) -> None:
+        """Recover the refill rate after a successful request."""
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + RATE_LIMIT_RECOVERY)
+
+    def _refill(self, now: float) -> None:
+        """Add the tokens earned since the last refill."""
+        # Nothing is earned while paused by Retry-After
+        earned_since = max(self._updated, self._blocked_until)
+        if now > earned_since:
+            self._tokens = min(
+                self.burst, self._tokens + (now - earned_since) * self.rate
+            )
+        self._updated = now
+
+    def _dispatch(self) -> None:
+        """Hand out available tokens and schedule the next wake up."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        now = time.monotonic()
+        self._refill(now)
+
+        while self._waiters and self._waiters[0][2].done():
+            heapq.heappop(self._waiters)
+
+        if now < self._blocked_until:
+            if self._waiters:
+                self._schedule(self._blocked_until - now)
+            return
+
+        while self._waiters and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            self._tokens -= 1
+            future.set_result(None)
+
+        if self._waiters:
+            self._schedule((1 - self._tokens) / self.rate)
+
+    def _schedule(self, delay: float) -> None:
+        """Run the dispatcher again after a delay."""
+        self._timer = asyncio.get_running_loop().call_later(
+            max(delay, 0.0), self._dispatch
+        )
+
+
+class HostUnavailable(Exception):
+    """Raised when a request is skipped because its host is backing off."""
+
+
+class HostBackoff:
+    """Exponential backoff with jitter for hosts that are failing."""
+
+    def __init__(self) -> None:
+        """Init."""
+        self._hosts: dict[str, tuple[int, float]] = {}
+
+    def remaining(self, host: str) -> float:
+        """Return the seconds left before the host may be tried again."""
+        if host not in self._hosts:
+            return 0.0
+        return max(0.0, self._hosts[host][1] - time.monotonic())
+
+    def async_failed(self, host: str) -> float:
+        """Record a failure and return the delay before the next attempt."""
+        failures = self._hosts.get(host, (0, 0.0))[0] + 1
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (failures - 1))
+        delay *= random.uniform(0.5, 1.0)
+        self._hosts[host] = (failures, time.monotonic() + delay)
+        _LOGGER.debug(
+            "Backing off %s for %.0fs after %s failures", host, delay, failures
+        )
+        return delay
+
+    def async_retry_after(self, host: str, delay: float) -> None:
+        """Hold a host off for as long as its Retry-After asked."""
+        failures, until = self._hosts.get(host, (0, 0.0))
+        self._hosts[host] = (failures, max(until, time.monotonic() + delay))
+
+    def async_succeeded(self, host: str) -> None:
+        """Reset the backoff after a successful request."""
+        self._hosts.pop(host, None)
+
+
+class RateLimitedSession:
+    """Client session wrapper that routes requests through the rate limiter."""
+
+    def __init__(
+        self,
+        session: ClientSession,
+        limiter: RoyalMailRateLimiter,
+        backoff: HostBackoff,
+        priority: int = PRIORITY_BACKGROUND,
+    ) -> None:
+        """Init."""
+        self.session = session
+        self.limiter = limiter
+        self.backoff = backoff
+        self.priority = priority
+
+    async def request(self, method: str, url: str, **kwargs) -> ClientResponse:
+        """Make a rate limited request."""
+        host = urlsplit(url).hostname or ""
+        if (remaining := self.backoff.remaining(host)) > 0:
+            raise HostUnavailable(f"{host} is backing off for {remaining:.0f}s")
+
+        kwargs.setdefault("timeout", request_timeout(url))
+        await self.limiter.async_acquire(self.priority)
+        try:
+            resp = await self.session.request(method=method, url=url, **kwargs)
+        except (ClientError, asyncio.TimeoutError):
+            self.backoff.async_failed(host)
+            raise
+
+        if resp.status == 429:
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            self.limiter.async_rate_limited(retry_after)
+            self.backoff.async_retry_after(
+                host, RATE_LIMIT_BACKOFF if retry_after is None else retry_after
+            )
+            return resp
+
+        if resp.status >= 500:
+            self.backoff.async_failed(host)
+        else:
+            self.backoff.async_succeeded(host)
+        self.limiter.async_succeeded()
+        return resp
@@ -0,0 +1,284 @@
+"""Royal Mail per-account runtime data."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable
+import functools
+import logging
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import STORAGE_DIR
+
+from .const import (
+    CONF_CONTENT_TYPE,
+    CONF_MAILPIECE_ID,
+    CONF_MAILPIECES,
+    CONF_MP_DETAILS,
+    CONF_PRODUCT_NAME,
+    CONF_REPLAY_SPEED,
+    CONF_SUMMARY,
+    CONF_TRANSPORT,
+    CONF_USER_ID,
+    CONTENT_TYPE,
+    IBM_CLIENT_ID,
+    PRODUCT_NAME,
+    PUSH_NOTIFICATION_URL,
+    REMOVE_MAILPIECE_URL,
+    SUBSCRIPTION_URL,
+    TRACKING_ALIAS_URL,
+    TRANSPORT_CASSETTE_DIR,
+    TRANSPORT_LIVE,
+    TRANSPORT_RECORD,
+    TRANSPORT_REPLAY,
+)
+from .client import NotFoundError, RoyalMailError
+from .coordinator import RoyalMaiMailPiecesCoordinator, TokenManager
+from .ratelimit import RateLimitedSession
+from .scheduler import async_get_scheduler
+from .tokens import RoyalMailTokenStore
+from .track import (
+    STEP_PRODUCT,
+    STEP_PUSH,
+    STEP_SUBSCRIPTION,
+    RoyalMailTrackProgress,
+)
+from .transport import RecordingTransport, ReplayTransport
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RoyalMailRuntime:
+    """Everything an account needs for as long as its entry is loaded.
+
+    The token manager, caches and coordinator are created once per entry, so
+    polling, entities and services all share the same tokens and state.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        token_store: RoyalMailTokenStore,
+    ) -> None:
+        """Init."""
+        self.hass = hass
+        self.entry = entry
+        self.scheduler = async_get_scheduler(hass)
+        self.token_store = token_store
+        self.replay = entry.options.get(CONF_TRANSPORT) == TRANSPORT_REPLAY
+        # Replays must not touch the live account's stored state
+        storage_id = f"{entry.entry_id}.replay" if self.replay else entry.entry_id
+        self.track_progress = RoyalMailTrackProgress(hass, storage_id)
+        account_data = {**entry.data, **token_store.tokens}
+        self.session, self.interactive_session = self._create_sessions(account_data)
+        self.token_manager = TokenManager(
+            hass,
+            self.session,
+            account_data,
+            None if self.replay else token_store,
+        )
+        self.client = self.token_manager.client
+        self.coordinator = RoyalMaiMailPiecesCoordinator(
+            hass,
+            self.session,
+            entry,
+            self.token_manager,
+            self.interactive_session,
+            self.replay,
+        )
+        self._tracking: dict[str, asyncio.Task[dict]] = {}
+
+    def _create_sessions(
+        self, account_data: dict[str, Any]
+    ) -> tuple[RateLimitedSession, RateLimitedSession]:
+        """Return the account's sessions, recording or replaying if configured."""
+        mode = self.entry.options.get(CONF_TRANSPORT, TRANSPORT_LIVE)
+        if mode == TRANSPORT_LIVE:
+            return self.scheduler.session, self.scheduler.interactive_session
+
+        cassette = self.hass.config.path(
+            STORAGE_DIR, TRANSPORT_CASSETTE_DIR, f"{self.entry.entry_id}.jsonl"
+        )
+        if mode == TRANSPORT_RECORD:
+            _LOGGER.warning("Recording Royal Mail API traffic to %s", cassette)
+            transport = RecordingTransport(
+                self.hass, self.scheduler, cassette, account_data
+            )
+        else:
+            _LOGGER.warning("Replaying Royal Mail API traffic from %s", cassette)
+            transport = ReplayTransport(
+                self.hass,
+                cassette,
+                self.entry.options.get(CONF_REPLAY_SPEED, 1.0),
+                account_data,
+            )
+        return self.scheduler.create_sessions(transport)
+
+    async def async_load(self) -> None:
+        """Load the account's stored history, statistics and track progress.
+
+        Each replay starts from empty stores.
+        """
+        if self.replay:
+            await self.coordinator.history.async_remove()
+            await self.coordinator.stats.async_remove()
+            await self.track_progress.async_remove()
+        await self.coordinator.history.async_load()
+        await self.coordinator.stats.async_load()
+        await self.track_progress.async_load()
+
+    async def async_flush(self) -> None:
+        """Write everything the account keeps on disk."""
+        await self.coordinator.history.async_flush()
+        await self.coordinator.stats.async_flush()
+        await self.token_store.async_flush()
+        await self.track_progress.async_flush()
+
+    async def async_track_item(self, mail_piece_id: str) -> dict:
+        """Subscribe the account to a mail piece and return its tracking alias.
+
+        Concurrent calls for the same mail piece share one attempt, so the
+        steps are never run twice at once. The attempt runs in its own task,
+        so a cancelled caller leaves it running for the others.
+        """
+        if (task := self._tracking.get(mail_piece_id)) is None:
+            task = self.hass.async_create_background_task(
+                self._async_track_item(mail_piece_id),
+                f"Royal Mail track {mail_piece_id}",
+            )
+            self._tracking[mail_piece_id] = task
+
+            @callback
+            def _done(task: asyncio.Task[dict]) -> None:
+                if self._tracking.get(mail_piece_id) is task:
+                    del self._tracking[mail_piece_id]
+                # Avoid "exception never retrieved" warnings if every caller left
+                if not task.cancelled():
+                    task.exception()
+
+            task.add_done_callback(_done)
+
+        return await asyncio.shield(task)
+
+    async def _async_track_item(self, mail_piece_id: str) -> dict:
+        """Run the steps of tracking a mail piece that have not completed yet.
+
+        Completed steps are recorded, so retrying after a failure resumes at
+        the first step that did not complete.
+        """
+        session = self.interactive_session
+        progress = self.track_progress
+        done = progress.steps(mail_piece_id)
+
+        # The product lookup and the subscription do not depend on each other
+        pending: dict[str, Awaitable[Any]] = {}
+        if STEP_PRODUCT not in done:
+            pending[STEP_PRODUCT] = self._async_product_name(session, mail_piece_id)
+        if STEP_SUBSCRIPTION not in done:
+            pending[STEP_SUBSCRIPTION] = self._async_subscribe(session, mail_piece_id)
+        results = await asyncio.gather(*pending.values(), return_exceptions=True)
+        errors = []
+        for step, result in zip(pending, results):
+            if isinstance(result, BaseException):
+                errors.append(result)
+            else:
+                progress.async_complete_step(mail_piece_id, step, result)
+        if errors:
+            raise errors[0]
+        done = progress.steps(mail_piece_id)
+
+        if STEP_PUSH not in done:
+            resp = await self.client.async_request(
+                "PUT",
+                PUSH_NOTIFICATION_URL.format(
+                    guid=self.token_manager.guid, mailPieceId=mail_piece_id
+                ),
+                session,
+                json={PRODUCT_NAME: done[STEP_PRODUCT]},
+                bearer=False,
+            )
+            if resp.status != 201:
+                raise RoyalMailError(
+                    f"Unable to enable notifications for {mail_piece_id}"
+                )
+            progress.async_complete_step(mail_piece_id, STEP_PUSH, True)
+
+        resp = await self.client.async_request(
+            "GET",
+            TRACKING_ALIAS_URL,
+            session,
+            headers={
+                CONF_CONTENT_TYPE: CONTENT_TYPE,
+                CONF_USER_ID: self.token_manager.guid,
+                CONF_MAILPIECE_ID: mail_piece_id,
+            },
+        )
+        alias = await resp.json()
+        progress.async_finish(mail_piece_id)
+        return alias
+
+    async def _async_subscribe(
+        self, session: RateLimitedSession, mail_piece_id: str
+    ) -> bool:
+        """Subscribe the account to a mail piece."""
+        resp = await self.client.async_request(
+            "POST",
+            SUBSCRIPTION_URL.format(mailPieceId=mail_piece_id),
+            session,
+            headers={CONF_CONTENT_TYPE: CONTENT_TYPE},
+        )
+        if resp.status != 200:
+            raise NotFoundError(f"New item: Unable to track {mail_piece_id}")
+        return True
+
+    async def async_remove_item(
+        self, mail_piece_id: str, interactive: bool = True
+    ) -> list[dict]:
+        """Stop tracking a mail piece and return the account's remaining items."""
+        session = self.interactive_session if interactive else self.session
+        product_name = await self._async_product_name(session, mail_piece_id)
+
+        resp = await self.client.async_request(
+            "DELETE",
+            PUSH_NOTIFICATION_URL.format(
+                guid=self.token_manager.guid, mailPieceId=mail_piece_id
+            ),
+            session,
+            json={PRODUCT_NAME: product_name},
+            bearer=False,
+        )
+        if resp.status != 201:
+            raise RoyalMailError(f"Unable to disable notifications for {mail_piece_id}")
+
+        resp = await self.client.async_request(
+            "DELETE",
+            REMOVE_MAILPIECE_URL.format(
+                guid=self.token_manager.guid,
+                ibmClientId=IBM_CLIENT_ID,
+                mailPieceId=mail_piece_id,
+            ),
+            session,
+        )
+        body = await resp.json()
+        return body.get(CONF_MP_DETAILS) or []
+
+    async def _async_product_name(
+        self, session: RateLimitedSession, mail_piece_id: str
+    ) -> str:
+        """Return the product name of a mail piece, sharing in-flight fetches."""
+        mail_piece = await self.coordinator.async_fetch_shared(
+            mail_piece_id,
+            functools.partial(
+                self.client.async_fetch_mailpiece, mail_piece_id, session
+            ),
+        )
+        try:
+            return mail_piece[CONF_MAILPIECES][CONF_SUMMARY][CONF_PRODUCT_NAME]
+        except (KeyError, TypeError) as err:
+            raise NotFoundError(f"Unable to find {mail_piece_id}") from err
+
+
+RoyalMailConfigEntry = ConfigEntry[RoyalMailRuntime]
@@ -0,0 +1,227 @@
+"""Royal Mail request scheduler shared by all accounts."""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from datetime import timedelta
+import logging
+import time
+
+from aiohttp import ClientResponse, ClientSession, TCPConnector
+from aiohttp.hdrs import USER_AGENT
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.helpers.json import json_dumps
+from homeassistant.helpers.storage import STORAGE_DIR
+from homeassistant.util.ssl import get_default_context
+
+from .const import (
+    COALESCE_TTL,
+    DATA_SCHEDULER,
+    HTTP_DNS_CACHE_TTL,
+    HTTP_KEEPALIVE,
+    HTTP_POOL_LIMIT,
+    IMAGE_CACHE_DIR,
+    MAILPIECE_CYCLE_WINDOW,
+    POLL_STAGGER,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    RATE_LIMIT_BURST,
+)
+from .bodycache import RoyalMailBodyCache
+from .imagecache import RoyalMailImageCache
+from .ratelimit import HostBackoff, RateLimitedSession, RoyalMailRateLimiter
+from .session import API_TIMEOUT
+from .writes import RoyalMailStateWriter
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RoyalMailScheduler:
+    """Share one connection pool between accounts and stagger their polls.
+
+    The pool is opened on first use and closed when the last account is
+    unloaded, while the rate limits and backoff last as long as Home
+    Assistant.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Init."""
+        self.hass = hass
+        self._client_session: ClientSession | None = None
+        self._users = 0
+        self.limiter = RoyalMailRateLimiter()
+        self.backoff = HostBackoff()
+        # Background polling and housekeeping
+        self.session = RateLimitedSession(
+            self, self.limiter, self.backoff, PRIORITY_BACKGROUND
+        )
+        # User initiated service calls
+        self.interactive_session = RateLimitedSession(
+            self, self.limiter, self.backoff, PRIORITY_INTERACTIVE
+        )
+        self.body_cache = RoyalMailBodyCache(hass)
+        self.image_cache = RoyalMailImageCache(
+            hass, hass.config.path(STORAGE_DIR, IMAGE_CACHE_DIR)
+        )
+        self.state_writer = RoyalMailStateWriter(hass)
+        self._poll_lock = asyncio.Lock()
+        self._last_poll_started: float | None = None
+        self._mailpieces: dict[str, tuple[float, dict]] = {}
+        self._in_flight: dict[str, asyncio.Task[dict]] = {}
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, self._async_close)
+
+    @property
+    def client_session(self) -> ClientSession:
+        """Return the connection pool, opening it if it is closed."""
+        if self._client_session is None or self._client_session.closed:
+            self._client_session = async_create_session(self.hass)
+        return self._client_session
+
+    async def request(self, method: str, url: str, **kwargs) -> ClientResponse:
+        """Make a request through the current connection pool."""
+        return await self.client_session.request(method=method, url=url, **kwargs)
+
+    @callback
+    def async_acquire(self) -> None:
+        """Keep the connection pool open while an account is loaded."""
+        self._users += 1
+
+    async def async_release(self) -> None:
+        """Close the connection pool once the last account is unloaded."""
+        self._users -= 1
+        if not self._users:
+            await self._async_close()
+
+    async def _async_close(self, event: Event | None = None) -> None:
+        """Write pending states and close the connection pool."""
+        self.state_writer.async_flush()
+        if self._client_session is not None:
+            await self._client_session.close()
+            self._client_session = None
+
+    def create_sessions(
+        self, transport
+    ) -> tuple[RateLimitedSession, RateLimitedSession]:
+        """Return background and interactive sessions over another transport.
+
+        They share the rate limiter and backoff with every other account.
+        """
+        return (
+            RateLimitedSession(
+                transport, self.limiter, self.backoff, PRIORITY_BACKGROUND
+            ),
+            RateLimitedSession(
+                transport, self.limiter, self.backoff, PRIORITY_INTERACTIVE
+            ),
+        )
+
+    @asynccontextmanager
+    async def async_poll_slot(self) -> AsyncIterator[None]:
+        """Run one account poll at a time, spaced by the stagger interval."""
+        async with self._poll_lock:
+            if self._last_poll_started is not None:
+                wait = (
+                    self._last_poll_started
+                    + POLL_STAGGER.total_seconds()
+                    - time.monotonic()
+                )
+                if wait > 0:
+                    _LOGGER.debug("Staggering Royal Mail poll by %.1fs", wait)
+                    await asyncio.sleep(wait)
+
+            self._last_poll_started = time.monotonic()
+            self._prune_mailpieces()
+            self.body_cache.prune()
+            yield
+
+    async def async_fetch_mailpiece(
+        self,
+        mail_piece_id: str,
+        fetch: Callable[[], Awaitable[dict]],
+        max_age: timedelta = COALESCE_TTL,
+    ) -> dict:
+        """Fetch a mail piece, sharing identical in-flight and recent requests.
+
+        Concurrent callers await the same request and receive the same decoded
+        result, which must be treated as read only. Polls pass the cycle window
+        as max_age so an item tracked by several accounts is fetched once. The
+        request runs in its own task, so a cancelled caller leaves it running
+        for the others.
+        """
+        cached = self._mailpieces.get(mail_piece_id)
+        if (
+            cached is not None
+            and time.monotonic() - cached[0] < max_age.total_seconds()
+        ):
+            return cached[1]
+
+        if (task := self._in_flight.get(mail_piece_id)) is None:
+            task = self.hass.async_create_background_task(
+                self._async_fetch_mailpiece(mail_piece_id, fetch),
+                f"Royal Mail fetch {mail_piece_id}",
+            )
+            self._in_flight[mail_piece_id] = task
+
+            @callback
+            def _done(task: asyncio.Task[dict]) -> None:
+                if self._in_flight.get(mail_piece_id) is task:
+                    del self._in_flight[mail_piece_id]
+                # Avoid "exception never retrieved" warnings if every caller left
+                if not task.cancelled():
+                    task.exception()
+
+            task.add_done_callback(_done)
+
+        return await asyncio.shield(task)
+
+    async def _async_fetch_mailpiece(
+        self, mail_piece_id: str, fetch: Callable[[], Awaitable[dict]]
+    ) -> dict:
+        """Fetch a mail piece, keeping it for later callers unless it failed."""
+        mail_piece = await fetch()
+        if isinstance(mail_piece, dict) and "errors" not in mail_piece:
+            self._mailpieces[mail_piece_id] = (time.monotonic(), mail_piece)
+        return mail_piece
+
+    def _prune_mailpieces(self) -> None:
+        """Drop mail pieces fetched in a previous cycle."""
+        now = time.monotonic()
+        window = MAILPIECE_CYCLE_WINDOW.total_seconds()
+        for mail_piece_id, (fetched, _) in list(self._mailpieces.items()):
+            if now - fetched >= window:
+                del self._mailpieces[mail_piece_id]
+
+
+def async_create_session(hass: HomeAssistant) -> ClientSession:
+    """Create the connection pool shared by all Royal Mail accounts.
+
+    Connections are capped per host at the rate limiter's burst, kept alive
+    between the requests of a poll, and DNS lookups are cached.
+    """
+    connector = TCPConnector(
+        limit=HTTP_POOL_LIMIT,
+        limit_per_host=RATE_LIMIT_BURST,
+        ttl_dns_cache=HTTP_DNS_CACHE_TTL,
+        keepalive_timeout=HTTP_KEEPALIVE,
+        ssl=get_default_context(),
+    )
+    return ClientSession(
+        connector=connector,
+        timeout=API_TIMEOUT,
+        headers={USER_AGENT: SERVER_SOFTWARE},
+        json_serialize=json_dumps,
+    )
+
+
+@callback
+def async_get_scheduler(hass: HomeAssistant) -> RoyalMailScheduler:
+    """Return the scheduler shared by all Royal Mail accounts."""
+    if DATA_SCHEDULER not in hass.data:
+        hass.data[DATA_SCHEDULER] = RoyalMailScheduler(hass)
+    return hass.data[DATA_SCHEDULER]
+
@@ -1,25 +1,34 @@
 """Royal Mail sensor platform."""
 
 from datetime import date, datetime
+import hashlib
+import json
+import logging
 from typing import Any
 
-from aiohttp import ClientSession
-
-from homeassistant.components.sensor import SensorEntity, SensorEntityDescription
-from homeassistant.config_entries import ConfigEntry
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import UnitOfTime
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers import entity_registry as er
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity import DeviceInfo, Entity
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import (
     CoordinatorEntity,
     DataUpdateCoordinator,
 )
-from homeassistant.util import dt as dt_util
+from homeassistant.util import dt as dt_util, slugify
 
+from .buckets import BUCKETS
 from .const import (
+    BUCKET_AWAITING_COLLECTION,
+    BUCKET_DUE_TODAY,
     CONF_AVAILABLE_FOR_COLLECTION,
+    CONF_COMPACT,
     CONF_EVENTCODE,
     CONF_EVENTDATETIME,
     CONF_EVENTNAME,
@@ -28,20 +37,24 @@ from .const import (
     CONF_MP_DETAILS,
     CONF_OUT_FOR_DELIVERY,
     CONF_PARCELS,
+    CONF_PREDICTED_DELIVERY,
+    CONF_STALE_SINCE,
     CONF_STATUS_DESCRIPTION,
     CONF_SUMMARY,
     DOMAIN,
-    PARCEL_AVAILABLE_FOR_COLLECTION,
     PARCEL_COLLECTED,
     PARCEL_COLLECTION,
     PARCEL_DELIVERED,
     PARCEL_DELIVERY_TODAY,
     PARCEL_IN_TRANSIT,
 )
-from .coordinator import (
-    RoyalMailRemoveMailPieceCoordinator,
-    RoyalMaiMailPiecesCoordinator,
-)
+from .client import TRANSIENT_ERRORS, RoyalMailError
+from .coordinator import RoyalMaiMailPiecesCoordinator
+from .runtime import RoyalMailConfigEntry
+from .scheduler import async_get_scheduler
+from .stats import RoyalMailDeliveryStats
+
+_LOGGER = logging.getLogger(__name__)
 
 
 def hasMailPieceExpired(hass: HomeAssistant, expiry_date_raw: str) -> bool:
@@ -78,25 +91,38 @@ def is_mailpiece_id_present(mp_details: list[dict], mailpiece_id: str) -> bool:
     return any(item[CONF_MAILPIECE_ID] == mailpiece_id for item in mp_details)
 
 
+@callback
+def async_write_state_soon(entity: Entity) -> None:
+    """Write an entity's state together with other changes in the same window."""
+    async_get_scheduler(entity.hass).state_writer.async_schedule(entity)
+
+
+def fingerprint(*content: Any) -> str:
+    """Return a stable content hash for state and attribute values."""
+    encoded = json.dumps(content, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode(), digest_size=16).hexdigest()
+
+
 async def get_sensors(
-    name: str, hass: HomeAssistant, entry: ConfigEntry, session: ClientSession
+    name: str, hass: HomeAssistant, entry: RoyalMailConfigEntry
 ) -> list:
     """Get sensors."""
 
-    data = dict(entry.data)
-
-    rmCoordinator = RoyalMaiMailPiecesCoordinator(hass, session, data)
+    runtime = entry.runtime_data
 
-    await rmCoordinator.async_config_entry_first_refresh()
+    rmCoordinator = runtime.coordinator
 
     rmData = rmCoordinator.data
 
-    mailPieceSensors = []
+    mailPieceSensors = {}
 
     parcels = rmData[CONF_MP_DETAILS]
 
     totalMailPieces = len(parcels)
 
+    # Compact accounts expose parcels through the aggregates and get_parcel
+    compact = entry.options.get(CONF_COMPACT, False)
+
     for key, value in parcels.items():
         if value is not None and CONF_EVENTS in value:
             lastEventCode = value[CONF_EVENTS][0][CONF_EVENTCODE]
@@ -104,77 +130,96 @@ async def get_sensors(
             if lastEventCode in PARCEL_DELIVERED or lastEventCode == PARCEL_COLLECTED:
                 lastEventDateTime = value[CONF_EVENTS][0][CONF_EVENTDATETIME]
                 if hasMailPieceExpired(hass, lastEventDateTime):
-                    removeMailPieceCoordinator = RoyalMailRemoveMailPieceCoordinator(
-                        hass, session, data, key
-                    )
-
-                    await removeMailPieceCoordinator.async_refresh()
-
-                    remainingMailPieces = removeMailPieceCoordinator.data.get(
-                        CONF_MP_DETAILS
-                    )
+                    try:
+                        remainingMailPieces = await runtime.async_remove_item(
+                            key, interactive=False
+                        )
+                    except (RoyalMailError, *TRANSIENT_ERRORS) as err:
+                        _LOGGER.warning("Unable to remove expired %s: %s", key, err)
+                        remainingMailPieces = [{CONF_MAILPIECE_ID: key}]
 
                     if is_mailpiece_id_present(remainingMailPieces, key) is False:
                         await removeMailPiece(hass, key)
                         totalMailPieces -= 1
 
-            mailPieceSensors.append(
-                RoyalMailSensor(
-                    hass=hass,
-                    name=name,
-                    data=rmCoordinator.data.get(CONF_MP_DETAILS)[key],
-                    description=SensorEntityDescription(
-                        key=CONF_MAILPIECE_ID,
-                        name=key,
-                        icon="mdi:package-variant-closed-remove",
-                    ),
-                )
+            if compact:
+                continue
+
+            mailPieceSensors[key] = RoyalMailSensor(
+                hass=hass,
+                name=name,
+                data=rmCoordinator.data.get(CONF_MP_DETAILS)[key],
+                description=SensorEntityDescription(
+                    key=CONF_MAILPIECE_ID,
+                    name=key,
+                    icon="mdi:package-variant-closed-remove",
+                ),
+                stats=rmCoordinator.stats,
+                coordinator=rmCoordinator,
             )
 
     total_sensor = [
         TotalParcelsSensor(
             rmCoordinator,
             name,
-        )
+            mailPieceSensors,
+            compact,
+        ),
+        DeliveryOfficesSensor(rmCoordinator, name),
+        *(
+            ParcelStatusSensor(rmCoordinator, name, bucket, compact)
+            for bucket in BUCKETS
+        ),
     ]
 
-    return total_sensor + mailPieceSensors
+    return total_sensor + list(mailPieceSensors.values())
 
 
 async def async_setup_entry(
     hass: HomeAssistant,
-    entry: ConfigEntry,
+    entry: RoyalMailConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up sensors from a config entry created in the integrations UI."""
-    config = hass.data[DOMAIN][entry.entry_id]
-    if entry.options:
-        config.update(entry.options)
-
     if entry.data:
-        session = async_get_clientsession(hass)
-
-        sensors = await get_sensors(entry.title, hass, entry, session)
+        sensors = await get_sensors(entry.title, hass, entry)
+
+        # Parcel sensors fetch their item in async_update, only do so on request
+        async_add_entities(sensors)
+
+        coordinator = entry.runtime_data.coordinator
+        products: set[str] = set()
+
+        @callback
+        def _async_add_transit_time_sensors() -> None:
+            """Add a transit time sensor for every product with statistics."""
+            new_products = set(coordinator.stats.products) - products
+            if new_products:
+                products.update(new_products)
+                async_add_entities(
+                    TransitTimeSensor(coordinator, entry.title, product)
+                    for product in sorted(new_products)
+                )
 
-        async_add_entities(sensors, update_before_add=True)
+        _async_add_transit_time_sensors()
+        entry.async_on_unload(
+            coordinator.async_add_listener(_async_add_transit_time_sensors)
+        )
 
 
-async def remove_unavailable_entities(hass: HomeAssistant):
-    """Remove entities no longer provided by the integration."""
+async def remove_unavailable_entities(hass: HomeAssistant, entry_id: str):
+    """Remove an account's entities no longer provided by the integration."""
     # Access the entity registry
     registry = er.async_get(hass)
 
-    # Loop through all registered entities
-    for entity_id in list(registry.entities):
-        entity = registry.entities[entity_id]
-        # Check if the entity belongs to your integration (by checking domain)
-        if entity.platform == DOMAIN:
-            # Check if the entity is not available in `hass.states`
-            state = hass.states.get(entity_id)
+    # Only this account's entities, others may be unloaded or retrying setup
+    for entity in er.async_entries_for_config_entry(registry, entry_id):
+        # Check if the entity is not available in `hass.states`
+        state = hass.states.get(entity.entity_id)
 
-            # If the entity's state is unavailable or not in `hass.states`
-            if state is None or state.state == "unavailable":
-                registry.async_remove(entity_id)
+        # If the entity's state is unavailable or not in `hass.states`
+        if state is None or state.state == "unavailable":
+            registry.async_remove(entity.entity_id)
 
 
 class TotalParcelsSensor(CoordinatorEntity[DataUpdateCoordinator], SensorEntity):
@@ -184,10 +229,14 @@ class TotalParcelsSensor(CoordinatorEntity[DataUpdateCoordinator], SensorEntity)
         self,
         coordinator: DataUpdateCoordinator,
         name: str,
+        parcel_sensors: dict[str, "RoyalMailSensor"],
+        compact: bool = False,
     ) -> None:
         """Init."""
         super().__init__(coordinator)
         self.coordinator = coordinator
+        self.parcel_sensors = parcel_sensors
+        self.compact = compact
         self.total_parcels = self.coordinator.data[CONF_MP_DETAILS]
         self._state = self.get_state()
         self._name = "Royal Mail Parcels"
@@ -202,6 +251,7 @@ class TotalParcelsSensor(CoordinatorEntity[DataUpdateCoordinator], SensorEntity)
         self.entity_id = f"sensor.{DOMAIN}_tracked_parcels".lower()
         self._attr_icon = "mdi:package-variant-closed"
         self.attrs: dict[str, Any] = {}
+        self._fingerprint: str | None = None
 
     @property
     def name(self) -> None:
@@ -219,51 +269,62 @@ class TotalParcelsSensor(CoordinatorEntity[DataUpdateCoordinator], SensorEntity)
 
     def update_from_coordinator(self):
         """Update sensor state and attributes from coordinator data."""
+        parcels = self.coordinator.data.get(CONF_MP_DETAILS, {})
 
-        parcels_out_for_delivery = []
-        parcels_available_for_collection = []
-        for parcel in self.total_parcels.values():
-            if self.is_parcel_delivery_today(parcel):
-                parcels_out_for_delivery.append(parcel)
+        for mail_piece_id, parcel in parcels.items():
+            entity = self.parcel_sensors.get(mail_piece_id)
+            if entity is not None and entity.hass is not None:
+                entity.update_parcel_data(parcel)
 
-            if self.is_parcel_available_for_collection(parcel):
-                parcels_available_for_collection.append(parcel)
+        self.update_summary()
 
-            for entity in self.hass.data[DOMAIN].values():
-                if (
-                    isinstance(entity, RoyalMailSensor)
-                    and str(parcel[CONF_MAILPIECE_ID]).lower() in entity.unique_id
-                ):
-                    entity.update_parcel_data(parcel)
+    @callback
+    def update_summary(self) -> None:
+        """Update the aggregate without visiting every parcel sensor."""
+        self.total_parcels = self.coordinator.data.get(CONF_MP_DETAILS, {})
 
-        if self.total_parcels is not None:
+        # Compact accounts only record counts, not the ids of every parcel
+        if self.total_parcels is not None and not self.compact:
             self.attrs[CONF_PARCELS] = [
                 parcel[CONF_MAILPIECE_ID] for parcel in self.total_parcels.values()
             ]
 
-        self.attrs[CONF_OUT_FOR_DELIVERY] = [
-            parcel[CONF_MAILPIECE_ID] for parcel in parcels_out_for_delivery
-        ]
+            # Maintained by the coordinator as parcels change status
+            buckets = self.coordinator.buckets
+            self.attrs[CONF_OUT_FOR_DELIVERY] = buckets.ids(BUCKET_DUE_TODAY)
+            self.attrs[CONF_AVAILABLE_FOR_COLLECTION] = buckets.ids(
+                BUCKET_AWAITING_COLLECTION
+            )
 
-        self.attrs[CONF_AVAILABLE_FOR_COLLECTION] = [
-            parcel[CONF_MAILPIECE_ID] for parcel in parcels_available_for_collection
-        ]
+        # Set while the API is unavailable and the last good data is shown
+        self.attrs[CONF_STALE_SINCE] = self.coordinator.data.get(CONF_STALE_SINCE)
 
         self._state = self.get_state()
 
-        self.async_write_ha_state()
-
-        self.hass.add_job(remove_unavailable_entities(self.hass))
+        # Only write when the aggregate or the coordinator's availability moved
+        new_fingerprint = fingerprint(self.available, self._state, self.attrs)
+        if new_fingerprint != self._fingerprint:
+            self._fingerprint = new_fingerprint
+            async_write_state_soon(self)
+            # A failed poll makes every sensor unavailable, not just dropped ones
+            if self.coordinator.last_update_success:
+                self.hass.add_job(
+                    remove_unavailable_entities(
+                        self.hass, self.coordinator.config_entry_id
+                    )
+                )
 
     @callback
     def _handle_coordinator_update(self) -> None:
         """Handle updated data from the coordinator."""
         self.update_from_coordinator()
-        self.async_write_ha_state()
 
     async def async_added_to_hass(self) -> None:
         """Handle adding to Home Assistant."""
         await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_summary_listener(self.update_summary)
+        )
         await self.async_update()
 
     async def async_remove(self) -> None:
@@ -272,16 +333,6 @@ class TotalParcelsSensor(CoordinatorEntity[DataUpdateCoordinator], SensorEntity)
         if self.hass is not None:
             await super().async_remove()
 
-    def is_parcel_delivery_today(self, parcel: dict) -> bool:
-        """Check if the parcel has been delivered."""
-        lastEventCode = parcel[CONF_EVENTS][0][CONF_EVENTCODE]
-        return lastEventCode in PARCEL_DELIVERY_TODAY
-
-    def is_parcel_available_for_collection(self, parcel: dict) -> bool:
-        """Check if parcel is available for collection."""
-        lastEventCode = parcel[CONF_EVENTS][0][CONF_EVENTCODE]
-        return lastEventCode in PARCEL_AVAILABLE_FOR_COLLECTION
-
     @property
     def icon(self) -> str:
         """Return a representative icon of the timer."""
@@ -301,15 +352,22 @@ class TotalParcelsSensor(CoordinatorEntity[DataUpdateCoordinator], SensorEntity)
 class RoyalMailSensor(SensorEntity):
     """Define an Royal Mail sensor."""
 
+    # Updated as its refresh lands, by the aggregate, or through async_update
+    _attr_should_poll = False
+
     def __init__(
         self,
         hass: HomeAssistant,
         data: dict,
         name: str,
         description: SensorEntityDescription,
+        stats: RoyalMailDeliveryStats | None = None,
+        coordinator: RoyalMaiMailPiecesCoordinator | None = None,
     ) -> None:
         """Initialize."""
         self.hass = hass
+        self.stats = stats
+        self.coordinator = coordinator
         self._attr_device_info = DeviceInfo(
             identifiers={(DOMAIN, f"{name}")},
             manufacturer="Royal Mail",
@@ -326,10 +384,24 @@ class RoyalMailSensor(SensorEntity):
         self.entity_description = description
         self._name = name
         self._sensor_id = sensor_id
+        self._data_fingerprint = fingerprint(data)
         self.attrs = self.update_attributes()
         self._available = self.update_available()
         self._state = self.update_state()
         self._attr_icon = self.update_icon()
+        self._fingerprint = fingerprint(
+            self._available, self._state, self._attr_icon, self.attrs
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Receive this parcel as soon as a refresh fetches it."""
+        await super().async_added_to_hass()
+        if self.coordinator is not None:
+            self.async_on_remove(
+                self.coordinator.async_add_parcel_listener(
+                    self.entity_description.name, self.update_parcel_data
+                )
+            )
 
     async def async_remove(self) -> None:
         """Handle the removal of the entity."""
@@ -381,34 +453,234 @@ class RoyalMailSensor(SensorEntity):
                     attributes.update({f"{key}_{k}": v for k, v in value.items()})
                 else:
                     attributes[key] = value
+
+            if self.stats is not None and self._in_transit():
+                predicted = self.stats.predict_delivery(mail_piece_data)
+                if predicted is not None:
+                    attributes[CONF_PREDICTED_DELIVERY] = predicted.isoformat()
         return attributes
 
+    def _in_transit(self) -> bool:
+        """Return True if the parcel has not been delivered or collected."""
+        if not self.data.get(CONF_EVENTS):
+            return False
+        lastEventCode = self.data[CONF_EVENTS][0][CONF_EVENTCODE]
+        return (
+            lastEventCode not in PARCEL_DELIVERED
+            and lastEventCode not in PARCEL_COLLECTION
+        )
+
+    async def async_update(self) -> None:
+        """Fetch only this parcel, e.g. from homeassistant.update_entity."""
+        if self.coordinator is None:
+            return
+        try:
+            await self.coordinator.async_refresh_mailpiece(
+                self.entity_description.name
+            )
+        except (RoyalMailError, *TRANSIENT_ERRORS) as err:
+            _LOGGER.warning(
+                "Unable to refresh %s: %s", self.entity_description.name, err
+            )
+
     def update_parcel_data(self, data):
-        """Update parcel data."""
+        """Update parcel data, writing state only if something changed."""
+        data_fingerprint = fingerprint(data)
+        if data_fingerprint == self._data_fingerprint:
+            return
+
+        self._data_fingerprint = data_fingerprint
         self.data = data
         self._available = self.update_available()
         self._attr_icon = self.update_icon()
         self._state = self.update_state()
         self.attrs = self.update_attributes()
 
-        self.async_write_ha_state()
+        # Raw data can change (e.g. timestamps) without the derived state moving.
+        new_fingerprint = fingerprint(
+            self._available, self._state, self._attr_icon, self.attrs
+        )
+        if new_fingerprint == self._fingerprint:
+            return
+
+        self._fingerprint = new_fingerprint
+        async_write_state_soon(self)
 
     @property
     def available(self) -> bool:
         """Return if the entity is available."""
-        return self.update_available()
+        return self._available
 
     @property
     def icon(self) -> str:
         """Return a representative icon of the timer."""
-        return self.update_icon()
+        return self._attr_icon
 
     @property
     def native_value(self) -> str | date | None:
         """Native value."""
-        return self.update_state()
+        return self._state
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Define entity attributes."""
+        return self.attrs
+
+
+class TransitTimeSensor(CoordinatorEntity[DataUpdateCoordinator], SensorEntity):
+    """Sensor for the delivery time of a Royal Mail product."""
+
+    _attr_device_class = SensorDeviceClass.DURATION
+    _attr_native_unit_of_measurement = UnitOfTime.HOURS
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:timer-sand"
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        name: str,
+        product: str,
+    ) -> None:
+        """Init."""
+        super().__init__(coordinator)
+        self.product = product
+        self._attr_name = f"{product} transit time"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{name}")},
+            manufacturer="Royal Mail",
+            model="Item Tracker",
+            name=name,
+            configuration_url="https://github.com/jampez77/RoyalMail/",
+        )
+        self._attr_unique_id = f"{DOMAIN}-{name}-transit-{slugify(product)}".lower()
+        self.entity_id = f"sensor.{DOMAIN}_transit_time_{slugify(product)}".lower()
+        self._summary = self.coordinator.stats.products[product].summary()
+        self._fingerprint = fingerprint(self.available, self._summary)
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when the statistics or availability changed."""
+        self._summary = self.coordinator.stats.products[self.product].summary()
+        new_fingerprint = fingerprint(self.available, self._summary)
+        if new_fingerprint != self._fingerprint:
+            self._fingerprint = new_fingerprint
+            async_write_state_soon(self)
+
+    @property
+    def native_value(self) -> float | None:
+        """Mean transit time in hours."""
+        return self._summary["mean"]
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Define entity attributes."""
-        return self.update_attributes()
+        return self._summary
+
+
+class DeliveryOfficesSensor(CoordinatorEntity[DataUpdateCoordinator], SensorEntity):
+    """Sensor for transit times by final delivery office."""
+
+    _attr_icon = "mdi:office-building-marker"
+
+    def __init__(self, coordinator: DataUpdateCoordinator, name: str) -> None:
+        """Init."""
+        super().__init__(coordinator)
+        self._attr_name = "Royal Mail delivery offices"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{name}")},
+            manufacturer="Royal Mail",
+            model="Item Tracker",
+            name=name,
+            configuration_url="https://github.com/jampez77/RoyalMail/",
+        )
+        self._attr_unique_id = f"{DOMAIN}-{name}-delivery_offices".lower()
+        self.entity_id = f"sensor.{DOMAIN}_delivery_offices".lower()
+        self.attrs = self._office_summaries()
+        self._fingerprint = fingerprint(self.available, self.attrs)
+
+    def _office_summaries(self) -> dict[str, Any]:
+        """Return transit time statistics for each office."""
+        return {
+            office: sketch.summary()
+            for office, sketch in sorted(self.coordinator.stats.offices.items())
+        }
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when the statistics or availability changed."""
+        self.attrs = self._office_summaries()
+        new_fingerprint = fingerprint(self.available, self.attrs)
+        if new_fingerprint != self._fingerprint:
+            self._fingerprint = new_fingerprint
+            async_write_state_soon(self)
+
+    @property
+    def native_value(self) -> int:
+        """Number of delivery offices with statistics."""
+        return len(self.attrs)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Define entity attributes."""
+        return self.attrs
+
+
+class ParcelStatusSensor(CoordinatorEntity[DataUpdateCoordinator], SensorEntity):
+    """Sensor for the number of parcels with a status."""
+
+    _attr_icon = "mdi:package-variant"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+
+    def __init__(
+        self,
+        coordinator: RoyalMaiMailPiecesCoordinator,
+        name: str,
+        bucket: str,
+        compact: bool = False,
+    ) -> None:
+        """Init."""
+        super().__init__(coordinator)
+        self.bucket = bucket
+        self.compact = compact
+        self._attr_name = f"Royal Mail {bucket.replace('_', ' ')}"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{name}")},
+            manufacturer="Royal Mail",
+            model="Item Tracker",
+            name=name,
+            configuration_url="https://github.com/jampez77/RoyalMail/",
+        )
+        self._attr_unique_id = f"{DOMAIN}-{name}-status-{bucket}".lower()
+        self.entity_id = f"sensor.{DOMAIN}_{bucket}".lower()
+        self._version = coordinator.buckets.versions[bucket]
+        self._available = self.available
+
+    async def async_added_to_hass(self) -> None:
+        """Also follow parcels moving between buckets as they are refreshed."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            self.coordinator.async_add_summary_listener(
+                self._handle_coordinator_update
+            )
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when the bucket or availability changed."""
+        version = self.coordinator.buckets.versions[self.bucket]
+        if version != self._version or self.available != self._available:
+            self._version = version
+            self._available = self.available
+            async_write_state_soon(self)
+
+    @property
+    def native_value(self) -> int:
+        """Number of parcels in the bucket."""
+        return self.coordinator.buckets.count(self.bucket)
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Define entity attributes."""
+        if self.compact:
+            return None
+        return {CONF_PARCELS: self.coordinator.buckets.ids(self.bucket)}
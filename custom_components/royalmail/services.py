@@ -1,38 +1,107 @@
 """Services for Royal Mail Integration."""
 
+from datetime import timedelta
 import functools
+import itertools
+import uuid
 
 import voluptuous as vol
 
-from homeassistant.core import HomeAssistant, ServiceCall
-from homeassistant.exceptions import HomeAssistantError
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.const import ATTR_LOCATION, ATTR_NAME
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
 from homeassistant.helpers import config_validation as cv, entity_registry as er
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.util import dt as dt_util
 
+from .buckets import event_category, parcel_bucket
+from .client import TRANSIENT_ERRORS, RoyalMailError
 from .const import (
+    ATTR_CATEGORY,
+    ATTR_CODE,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_DESTINATION,
+    ATTR_DETAILS,
+    ATTR_END_DATE,
+    ATTR_FORMAT,
+    ATTR_LIMIT,
+    ATTR_MAILPIECE_ID,
+    ATTR_MAX_AGE_DAYS,
+    ATTR_MIN_AGE_DAYS,
+    ATTR_PATH,
+    ATTR_PRODUCT,
+    ATTR_ROWS,
+    ATTR_START_DATE,
+    ATTR_STATUS,
+    ATTR_TIME,
+    BUCKET_AWAITING_COLLECTION,
+    BUCKET_DELIVERED,
+    CATEGORIES,
+    CONF_DESTINATION_COUNTRY,
+    CONF_EVENTCODE,
+    CONF_EVENTDATETIME,
+    CONF_EVENTNAME,
+    CONF_EVENTS,
+    CONF_EXPORT_HISTORY,
+    CONF_GET_PARCEL,
+    CONF_LAST_EVENT_LOCATION,
+    CONF_LOCATION_NAME,
     CONF_MAILPIECE_ID,
     CONF_MP_DETAILS,
+    CONF_PARCELS,
+    CONF_PREDICTED_DELIVERY,
+    CONF_PRODUCT_NAME,
+    CONF_QUERY_PARCELS,
     CONF_REFERENCE_NUMBER,
+    CONF_REFRESH_ITEM,
     CONF_STOP_TRACKING_ITEM,
+    CONF_SUMMARY,
     CONF_TRACK_ITEM,
     DOMAIN,
+    EXPORT_DIR,
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMAT_JSONL,
 )
-from .coordinator import (
-    RoyalMailRemoveMailPieceCoordinator,
-    RoyalMailTrackNewItemCoordinator,
-)
+from .export import async_export_rows, iter_history_rows
+from .runtime import RoyalMailConfigEntry
 
 SERVICE_SCHEMA = vol.Schema(
     {
         vol.Required(CONF_REFERENCE_NUMBER): cv.string,
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
     }
 )
 
+EXPORT_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_FORMAT, default=EXPORT_FORMAT_CSV): vol.In(
+            [EXPORT_FORMAT_CSV, EXPORT_FORMAT_JSONL]
+        ),
+        vol.Optional(ATTR_START_DATE): cv.date,
+        vol.Optional(ATTR_END_DATE): cv.date,
+        vol.Optional(ATTR_CATEGORY): vol.All(cv.ensure_list, [vol.In(CATEGORIES)]),
+        vol.Optional(ATTR_PRODUCT): cv.string,
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    }
+)
 
-def async_cleanup_services(hass: HomeAssistant) -> None:
-    """Cleanup Royal Mail services."""
-    hass.services.async_remove(DOMAIN, CONF_TRACK_ITEM)
-    hass.services.async_remove(DOMAIN, CONF_STOP_TRACKING_ITEM)
+QUERY_SCHEMA = vol.Schema(
+    {
+        vol.Optional(ATTR_CATEGORY): vol.All(cv.ensure_list, [vol.In(CATEGORIES)]),
+        vol.Optional(ATTR_PRODUCT): cv.string,
+        vol.Optional(ATTR_LOCATION): cv.string,
+        vol.Optional(ATTR_DESTINATION): cv.string,
+        vol.Optional(ATTR_MIN_AGE_DAYS): cv.positive_int,
+        vol.Optional(ATTR_MAX_AGE_DAYS): cv.positive_int,
+        vol.Optional(ATTR_LIMIT): vol.All(vol.Coerce(int), vol.Range(min=1)),
+        vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    }
+)
 
 
 def async_setup_services(hass: HomeAssistant) -> None:
@@ -42,40 +111,92 @@ def async_setup_services(hass: HomeAssistant) -> None:
             CONF_TRACK_ITEM,
             functools.partial(track_new_item, hass),
             SERVICE_SCHEMA,
+            SupportsResponse.NONE,
         ),
         (
             CONF_STOP_TRACKING_ITEM,
             functools.partial(stop_tracking_item, hass),
             SERVICE_SCHEMA,
+            SupportsResponse.NONE,
+        ),
+        (
+            CONF_REFRESH_ITEM,
+            functools.partial(refresh_item, hass),
+            SERVICE_SCHEMA,
+            SupportsResponse.NONE,
+        ),
+        (
+            CONF_GET_PARCEL,
+            functools.partial(get_parcel, hass),
+            SERVICE_SCHEMA,
+            SupportsResponse.ONLY,
+        ),
+        (
+            CONF_EXPORT_HISTORY,
+            functools.partial(export_history, hass),
+            EXPORT_SCHEMA,
+            SupportsResponse.OPTIONAL,
+        ),
+        (
+            CONF_QUERY_PARCELS,
+            functools.partial(query_parcels, hass),
+            QUERY_SCHEMA,
+            SupportsResponse.ONLY,
         ),
     ]
-    for name, method, schema in services:
+    for name, method, schema, supports_response in services:
         if hass.services.has_service(DOMAIN, name):
             continue
-        hass.services.async_register(DOMAIN, name, method, schema=schema)
+        hass.services.async_register(
+            DOMAIN, name, method, schema=schema, supports_response=supports_response
+        )
+
+
+def async_get_account_entries(
+    hass: HomeAssistant, call: ServiceCall
+) -> list[RoyalMailConfigEntry]:
+    """Return the loaded accounts a service call applies to."""
+    entries = [
+        entry
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.state is ConfigEntryState.LOADED
+    ]
+
+    entry_id = call.data.get(ATTR_CONFIG_ENTRY_ID)
+    if entry_id is None:
+        return entries
+
+    entries = [entry for entry in entries if entry.entry_id == entry_id]
+    if not entries:
+        raise ServiceValidationError(f"Royal Mail account {entry_id} is not loaded")
+    return entries
 
 
 async def track_new_item(hass: HomeAssistant, call: ServiceCall) -> None:
     """Track new item."""
     reference = call.data.get(CONF_REFERENCE_NUMBER)
 
-    session = async_get_clientsession(hass)
-
-    entries = hass.config_entries.async_entries(DOMAIN)
+    entries = async_get_account_entries(hass, call)
 
     if not entries:
         return False
 
-    entry_data = entries[0].data
-
-    coordinator = RoyalMailTrackNewItemCoordinator(hass, session, entry_data, reference)
-
-    await coordinator.async_refresh()
-
-    if coordinator.last_exception is not None:
-        return HomeAssistantError(f"There was an unknown problem tracking {reference}")
+    if len(entries) > 1:
+        raise ServiceValidationError(
+            "More than one Royal Mail account is configured, "
+            f"set {ATTR_CONFIG_ENTRY_ID} to choose which one tracks {reference}"
+        )
 
-    data = dict(coordinator.data)
+    try:
+        data = await entries[0].runtime_data.async_track_item(reference)
+    except TRANSIENT_ERRORS as err:
+        raise HomeAssistantError(
+            f"Royal Mail is unavailable, unable to track {reference}: {err}"
+        ) from err
+    except RoyalMailError as err:
+        raise HomeAssistantError(
+            f"There was an unknown problem tracking {reference}"
+        ) from err
 
     # Initiate the config flow with the "import" step
     await hass.config_entries.flow.async_init(
@@ -89,35 +210,173 @@ async def stop_tracking_item(hass: HomeAssistant, call: ServiceCall) -> None:
     """Remove a booking, its device, and all related entities."""
     reference = call.data.get(CONF_REFERENCE_NUMBER)
 
-    session = async_get_clientsession(hass)
-
-    entries = hass.config_entries.async_entries(DOMAIN)
+    entries = async_get_account_entries(hass, call)
 
     if not entries:
         return
 
-    entry_data = entries[0].data
-
     entity_registry = er.async_get(hass)
 
-    entities = [
-        entity_id
-        for entity_id, entry in entity_registry.entities.items()
-        if entry.platform == DOMAIN
-        and str(reference).lower() in entry.entity_id.lower()
-    ]
+    for entry in entries:
+        # The parcel's sensor and images belong to the account that tracks it
+        entities = [
+            entity.entity_id
+            for entity in er.async_entries_for_config_entry(
+                entity_registry, entry.entry_id
+            )
+            if str(reference).lower() in entity.entity_id.lower()
+        ]
+        parcels = (entry.runtime_data.coordinator.data or {}).get(CONF_MP_DETAILS)
+        if not entities and reference not in (parcels or {}):
+            continue
+
+        # One removal per account, however many entities the parcel has
+        try:
+            remainingMailPieces = await entry.runtime_data.async_remove_item(
+                reference
+            )
+        except TRANSIENT_ERRORS as err:
+            raise HomeAssistantError(
+                f"Royal Mail is unavailable, unable to remove {reference}: {err}"
+            ) from err
+        except RoyalMailError as err:
+            raise HomeAssistantError(
+                f"There was an unknown problem removing {reference}"
+            ) from err
+
+        if is_mailpiece_id_present(remainingMailPieces, reference) is False:
+            for entity_id in entities:
+                entity_registry.async_remove(entity_id)
+
 
-    for entity in entities:
-        removeMailPieceCoordinator = RoyalMailRemoveMailPieceCoordinator(
-            hass, session, entry_data, reference
+async def refresh_item(hass: HomeAssistant, call: ServiceCall) -> None:
+    """Fetch one mail piece without polling the rest of the account."""
+    reference = call.data.get(CONF_REFERENCE_NUMBER)
+
+    coordinators = [
+        entry.runtime_data.coordinator
+        for entry in async_get_account_entries(hass, call)
+        if reference in (entry.runtime_data.coordinator.data or {}).get(
+            CONF_MP_DETAILS, {}
         )
+    ]
 
-        await removeMailPieceCoordinator.async_refresh()
+    if not coordinators:
+        raise ServiceValidationError(f"{reference} is not tracked by Royal Mail")
 
-        remainingMailPieces = removeMailPieceCoordinator.data.get(CONF_MP_DETAILS)
+    for coordinator in coordinators:
+        try:
+            await coordinator.async_refresh_mailpiece(reference)
+        except (RoyalMailError, *TRANSIENT_ERRORS) as err:
+            raise HomeAssistantError(f"Unable to refresh {reference}: {err}") from err
 
-        if is_mailpiece_id_present(remainingMailPieces, reference) is False:
-            entity_registry.async_remove(entity)
+
+async def get_parcel(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Return a tracked mail piece, for accounts without per-parcel sensors."""
+    reference = call.data.get(CONF_REFERENCE_NUMBER)
+
+    parcels = []
+    for entry in async_get_account_entries(hass, call):
+        coordinator = entry.runtime_data.coordinator
+        parcel = ((coordinator.data or {}).get(CONF_MP_DETAILS) or {}).get(reference)
+        if parcel is None:
+            continue
+        status = parcel_bucket(parcel)
+        predicted = None
+        if status not in (BUCKET_DELIVERED, BUCKET_AWAITING_COLLECTION):
+            predicted = coordinator.stats.predict_delivery(parcel)
+        parcels.append(
+            {
+                ATTR_CONFIG_ENTRY_ID: entry.entry_id,
+                ATTR_MAILPIECE_ID: reference,
+                ATTR_STATUS: status,
+                CONF_PREDICTED_DELIVERY: predicted and predicted.isoformat(),
+                ATTR_DETAILS: parcel,
+            }
+        )
+
+    if not parcels:
+        raise ServiceValidationError(f"{reference} is not tracked by Royal Mail")
+    return {CONF_PARCELS: parcels}
+
+
+async def export_history(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Write the recorded tracking events to a file in the config directory."""
+    export_format = call.data[ATTR_FORMAT]
+    start = end = None
+    if (start_date := call.data.get(ATTR_START_DATE)) is not None:
+        start = dt_util.start_of_local_day(start_date)
+    if (end_date := call.data.get(ATTR_END_DATE)) is not None:
+        # The end date is inclusive
+        end = dt_util.start_of_local_day(end_date + timedelta(days=1))
+
+    rows = itertools.chain.from_iterable(
+        iter_history_rows(
+            entry.entry_id,
+            entry.runtime_data.coordinator.history,
+            start,
+            end,
+            call.data.get(ATTR_CATEGORY),
+            call.data.get(ATTR_PRODUCT),
+        )
+        for entry in async_get_account_entries(hass, call)
+    )
+    # The suffix keeps exports started in the same second apart
+    stamp = dt_util.now().strftime("%Y%m%d_%H%M%S")
+    path = hass.config.path(
+        EXPORT_DIR,
+        f"{DOMAIN}_history_{stamp}_{uuid.uuid4().hex[:6]}.{export_format}",
+    )
+    try:
+        count = await async_export_rows(hass, rows, path, export_format)
+    except OSError as err:
+        raise HomeAssistantError(f"Unable to write {path}: {err}") from err
+    return {ATTR_PATH: path, ATTR_ROWS: count}
+
+
+async def query_parcels(hass: HomeAssistant, call: ServiceCall) -> ServiceResponse:
+    """Return the tracked parcels matching every given filter."""
+    today = dt_util.now().date()
+    started_from = started_until = None
+    if (max_age := call.data.get(ATTR_MAX_AGE_DAYS)) is not None:
+        started_from = today - timedelta(days=max_age)
+    if (min_age := call.data.get(ATTR_MIN_AGE_DAYS)) is not None:
+        started_until = today - timedelta(days=min_age)
+    limit = call.data.get(ATTR_LIMIT)
+
+    parcels = []
+    for entry in async_get_account_entries(hass, call):
+        coordinator = entry.runtime_data.coordinator
+        details = (coordinator.data or {}).get(CONF_MP_DETAILS) or {}
+        for mail_piece_id in coordinator.index.query(
+            call.data.get(ATTR_CATEGORY),
+            call.data.get(ATTR_PRODUCT),
+            call.data.get(ATTR_LOCATION),
+            call.data.get(ATTR_DESTINATION),
+            started_from,
+            started_until,
+        ):
+            parcel = details.get(mail_piece_id) or {}
+            summary = parcel.get(CONF_SUMMARY) or {}
+            event = (parcel.get(CONF_EVENTS) or [{}])[0]
+            parcels.append(
+                {
+                    ATTR_CONFIG_ENTRY_ID: entry.entry_id,
+                    ATTR_MAILPIECE_ID: mail_piece_id,
+                    ATTR_STATUS: parcel_bucket(parcel),
+                    ATTR_CATEGORY: event_category(event.get(CONF_EVENTCODE)),
+                    ATTR_PRODUCT: summary.get(CONF_PRODUCT_NAME),
+                    ATTR_DESTINATION: summary.get(CONF_DESTINATION_COUNTRY),
+                    ATTR_LOCATION: summary.get(CONF_LAST_EVENT_LOCATION)
+                    or event.get(CONF_LOCATION_NAME),
+                    ATTR_CODE: event.get(CONF_EVENTCODE),
+                    ATTR_NAME: event.get(CONF_EVENTNAME),
+                    ATTR_TIME: event.get(CONF_EVENTDATETIME),
+                }
+            )
+            if limit is not None and len(parcels) >= limit:
+                return {CONF_PARCELS: parcels}
+    return {CONF_PARCELS: parcels}
 
 
 def is_mailpiece_id_present(mp_details: list[dict], mailpiece_id: str) -> bool:
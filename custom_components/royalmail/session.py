@@ -0,0 +1,40 @@
+"""HTTP timeouts for Royal Mail hosts."""
+
+from __future__ import annotations
+
+from urllib.parse import urlsplit
+
+from aiohttp import ClientTimeout
+
+from .const import (
+    GATEWAY_HOST,
+    TIMEOUT_API_READ,
+    TIMEOUT_API_TOTAL,
+    TIMEOUT_CONNECT,
+    TIMEOUT_GATEWAY_READ,
+    TIMEOUT_GATEWAY_TOTAL,
+    TIMEOUT_IMAGE_READ,
+)
+
+API_TIMEOUT = ClientTimeout(
+    total=TIMEOUT_API_TOTAL, connect=TIMEOUT_CONNECT, sock_read=TIMEOUT_API_READ
+)
+GATEWAY_TIMEOUT = ClientTimeout(
+    total=TIMEOUT_GATEWAY_TOTAL,
+    connect=TIMEOUT_CONNECT,
+    sock_read=TIMEOUT_GATEWAY_READ,
+)
+# Images are streamed, so only stalls are limited, not the whole download
+IMAGE_TIMEOUT = ClientTimeout(
+    total=None, connect=TIMEOUT_CONNECT, sock_read=TIMEOUT_IMAGE_READ
+)
+
+
+def request_timeout(url: str) -> ClientTimeout:
+    """Return the timeouts for the kind of endpoint a URL points to."""
+    parts = urlsplit(url)
+    if parts.hostname == GATEWAY_HOST:
+        return GATEWAY_TIMEOUT
+    if "/images/" in parts.path:
+        return IMAGE_TIMEOUT
+    return API_TIMEOUT
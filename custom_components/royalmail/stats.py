@@ -0,0 +1,219 @@
+"""Royal Mail delivery time statistics."""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import math
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    CONF_EVENTCODE,
+    CONF_EVENTDATETIME,
+    CONF_EVENTS,
+    CONF_LOCATION_NAME,
+    CONF_PRODUCT_NAME,
+    CONF_SUMMARY,
+    DOMAIN,
+    HISTORY_MAX_ITEMS,
+    HISTORY_SAVE_DELAY,
+    PARCEL_DELIVERED,
+    STATS_MIN_SAMPLES,
+    STATS_RELATIVE_ACCURACY,
+    STATS_STORAGE_VERSION,
+    TRANSIT_STARTED,
+)
+
+
+class DurationSketch:
+    """Streaming histogram of durations with bounded relative error.
+
+    Durations fall into logarithmic buckets, so any quantile is accurate to
+    within STATS_RELATIVE_ACCURACY while memory only grows with the spread of
+    the values, not their number.
+    """
+
+    _gamma = (1 + STATS_RELATIVE_ACCURACY) / (1 - STATS_RELATIVE_ACCURACY)
+    _log_gamma = math.log(_gamma)
+
+    def __init__(
+        self,
+        buckets: dict[int, int] | None = None,
+        count: int = 0,
+        total: float = 0.0,
+    ) -> None:
+        """Init."""
+        self.buckets = buckets or {}
+        self.count = count
+        self.total = total
+
+    def add(self, seconds: float) -> None:
+        """Add a duration in seconds."""
+        index = math.ceil(math.log(max(seconds, 1.0)) / self._log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += seconds
+
+    @property
+    def mean(self) -> float | None:
+        """Return the mean duration."""
+        return self.total / self.count if self.count else None
+
+    def quantile(self, q: float) -> float | None:
+        """Return the approximate duration at quantile q."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self._gamma**index / (self._gamma + 1)
+        return None
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the sketch for storage."""
+        return {
+            "buckets": {str(index): n for index, n in self.buckets.items()},
+            "count": self.count,
+            "total": self.total,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> DurationSketch:
+        """Restore a stored sketch."""
+        return cls(
+            {int(index): n for index, n in data["buckets"].items()},
+            data["count"],
+            data["total"],
+        )
+
+    def summary(self) -> dict[str, Any]:
+        """Return the statistics in hours."""
+
+        def hours(seconds: float | None) -> float | None:
+            return None if seconds is None else round(seconds / 3600, 1)
+
+        return {
+            "count": self.count,
+            "mean": hours(self.mean),
+            "p50": hours(self.quantile(0.5)),
+            "p90": hours(self.quantile(0.9)),
+            "p95": hours(self.quantile(0.95)),
+        }
+
+
+def transit_started(events: list[dict]) -> datetime | None:
+    """Return when the item entered the network, from events in any order."""
+    started = [
+        event.get(CONF_EVENTDATETIME)
+        for event in events
+        if event.get(CONF_EVENTCODE) in TRANSIT_STARTED
+    ]
+    times = [dt_util.parse_datetime(value) for value in started if value]
+    times = [value for value in times if value is not None]
+    return min(times) if times else None
+
+
+class RoyalMailDeliveryStats:
+    """Transit time aggregates per product and final delivery office.
+
+    Aggregates are only ever updated with newly ingested delivery events, so
+    the cost of an update does not depend on how much history there is.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Init."""
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STATS_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.stats"
+        )
+        self.products: dict[str, DurationSketch] = {}
+        self.offices: dict[str, DurationSketch] = {}
+        self._counted: OrderedDict[str, None] = OrderedDict()
+
+    async def async_load(self) -> None:
+        """Load the statistics from disk."""
+        stored = await self._store.async_load() or {}
+        self.products = {
+            name: DurationSketch.from_dict(sketch)
+            for name, sketch in stored.get("products", {}).items()
+        }
+        self.offices = {
+            name: DurationSketch.from_dict(sketch)
+            for name, sketch in stored.get("offices", {}).items()
+        }
+        self._counted = OrderedDict.fromkeys(stored.get("counted", []))
+
+    async def async_flush(self) -> None:
+        """Write any pending changes to disk now."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Remove the statistics from disk."""
+        await self._store.async_remove()
+
+    @callback
+    def async_ingest(
+        self,
+        mail_piece_id: str,
+        product: str | None,
+        events: list[dict],
+        new_events: list[dict],
+    ) -> bool:
+        """Record the transit time if new_events contains the delivery."""
+        if mail_piece_id in self._counted:
+            return False
+
+        delivered = next(
+            (
+                event
+                for event in new_events
+                if event.get(CONF_EVENTCODE) in PARCEL_DELIVERED
+            ),
+            None,
+        )
+        if delivered is None:
+            return False
+
+        started = transit_started(events)
+        delivered_at = dt_util.parse_datetime(delivered.get(CONF_EVENTDATETIME) or "")
+        if started is None or delivered_at is None or delivered_at < started:
+            return False
+
+        seconds = (delivered_at - started).total_seconds()
+        if product:
+            self.products.setdefault(product, DurationSketch()).add(seconds)
+        if office := delivered.get(CONF_LOCATION_NAME):
+            self.offices.setdefault(office, DurationSketch()).add(seconds)
+
+        self._counted[mail_piece_id] = None
+        while len(self._counted) > HISTORY_MAX_ITEMS:
+            self._counted.popitem(last=False)
+
+        self._store.async_delay_save(self._data_to_save, HISTORY_SAVE_DELAY)
+        return True
+
+    def predict_delivery(self, parcel: dict) -> datetime | None:
+        """Predict when an in-transit parcel will be delivered."""
+        product = (parcel.get(CONF_SUMMARY) or {}).get(CONF_PRODUCT_NAME)
+        sketch = self.products.get(product)
+        if sketch is None or sketch.count < STATS_MIN_SAMPLES:
+            return None
+        started = transit_started(parcel.get(CONF_EVENTS) or [])
+        if started is None:
+            return None
+        return started + timedelta(seconds=sketch.quantile(0.5))
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data for storage."""
+        return {
+            "products": {name: s.as_dict() for name, s in self.products.items()},
+            "offices": {name: s.as_dict() for name, s in self.offices.items()},
+            "counted": list(self._counted),
+        }
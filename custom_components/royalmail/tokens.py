@@ -0,0 +1,157 @@
+"""Royal Mail token storage."""
+
+from __future__ import annotations
+
+import time
+from typing import Any
+import uuid
+
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import (
+    CONF_ACCESS_TOKEN,
+    CONF_DEVICE_ID,
+    CONF_EXPIRES_AT,
+    CONF_EXPIRES_IN,
+    CONF_FIRST_NAME,
+    CONF_GUID,
+    CONF_REFRESH_TOKEN,
+    CONF_TOKEN_TYPE,
+    DOMAIN,
+    TOKEN_EXPIRY_MARGIN,
+    TOKENS_SAVE_DELAY,
+    TOKENS_STORAGE_VERSION,
+)
+
+TOKEN_KEYS = (
+    CONF_ACCESS_TOKEN,
+    CONF_REFRESH_TOKEN,
+    CONF_TOKEN_TYPE,
+    CONF_EXPIRES_IN,
+    CONF_GUID,
+    CONF_FIRST_NAME,
+)
+# Kept in the token store once the account is set up
+STORED_KEYS = (*TOKEN_KEYS, CONF_DEVICE_ID)
+
+
+class RoyalMailTokenStore:
+    """Per-account token storage, kept out of the config entry.
+
+    Saves are delayed and coalesced, so a token refresh neither rewrites
+    core.config_entries nor fires the entry update listener.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Init."""
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(
+            hass, TOKENS_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.tokens"
+        )
+        self.tokens: dict[str, Any] = {}
+
+    async def async_load(self) -> dict[str, Any]:
+        """Load the stored tokens."""
+        self.tokens = await self._store.async_load() or {}
+        return self.tokens
+
+    @callback
+    def async_migrate_entry(self, entry: ConfigEntry) -> None:
+        """Move tokens out of the config entry.
+
+        Older versions saved them there, and a new entry carries the tokens
+        and device id of the login that validated it.
+        """
+        if not any(key in entry.data for key in STORED_KEYS):
+            return
+        if not self.tokens:
+            # The age of these tokens is unknown, so no expiry is recorded
+            self.tokens = {
+                key: entry.data[key] for key in STORED_KEYS if key in entry.data
+            }
+            self._store.async_delay_save(self._data_to_save, TOKENS_SAVE_DELAY)
+        self.hass.config_entries.async_update_entry(
+            entry,
+            data={k: v for k, v in entry.data.items() if k not in STORED_KEYS},
+        )
+
+    @callback
+    def async_update(self, tokens: dict[str, Any]) -> None:
+        """Update tokens and schedule a save."""
+        self.tokens.update({key: tokens[key] for key in TOKEN_KEYS if key in tokens})
+        if expires_in := tokens.get(CONF_EXPIRES_IN):
+            self.tokens[CONF_EXPIRES_AT] = time.time() + float(expires_in)
+        self._store.async_delay_save(self._data_to_save, TOKENS_SAVE_DELAY)
+
+    @callback
+    def async_get_device_id(self) -> str:
+        """Return the account's device id, generating and saving it once."""
+        if not (device_id := self.tokens.get(CONF_DEVICE_ID)):
+            device_id = self.tokens[CONF_DEVICE_ID] = uuid.uuid4().hex.upper()[0:6]
+            self._store.async_delay_save(self._data_to_save, TOKENS_SAVE_DELAY)
+        return device_id
+
+    def access_token_valid(self) -> bool:
+        """Return if the access token is saved and not about to expire."""
+        if not self.tokens.get(CONF_ACCESS_TOKEN):
+            return False
+        expires_at = self.tokens.get(CONF_EXPIRES_AT)
+        # Tokens saved without an expiry are tried and refreshed on a 401
+        return expires_at is None or expires_at - TOKEN_EXPIRY_MARGIN > time.time()
+
+    async def async_flush(self) -> None:
+        """Write any pending changes to disk now."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Remove the stored tokens."""
+        await self._store.async_remove()
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data for storage."""
+        return self.tokens
+
+
+@callback
+def async_get_token_store(
+    hass: HomeAssistant, entry_id: str
+) -> RoyalMailTokenStore | None:
+    """Return the live token store of a loaded account."""
+    entry = hass.config_entries.async_get_entry(entry_id)
+    if entry is None or entry.state is not ConfigEntryState.LOADED:
+        return None
+    return entry.runtime_data.token_store
+
+
+@callback
+def async_get_account_data(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return the entry credentials merged with the account's current tokens."""
+    token_store = async_get_token_store(hass, entry.entry_id)
+    if token_store is None:
+        return dict(entry.data)
+    return {**entry.data, **token_store.tokens}
+
+
+async def async_load_account_data(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return the account data, reading the token store if it is not loaded."""
+    if async_get_token_store(hass, entry.entry_id) is not None:
+        return async_get_account_data(hass, entry)
+    tokens = await RoyalMailTokenStore(hass, entry.entry_id).async_load()
+    return {**entry.data, **tokens}
+
+
+async def async_save_tokens(
+    hass: HomeAssistant, entry_id: str, tokens: dict[str, Any]
+) -> None:
+    """Save tokens for an account, through its live store when loaded."""
+    token_store = async_get_token_store(hass, entry_id)
+    if token_store is None:
+        token_store = RoyalMailTokenStore(hass, entry_id)
+        await token_store.async_load()
+    token_store.async_update(tokens)
+    await token_store.async_flush()
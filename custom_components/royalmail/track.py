@@ -0,0 +1,79 @@
+"""Progress of Royal Mail track requests."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    DOMAIN,
+    TRACK_PROGRESS_TTL,
+    TRACK_SAVE_DELAY,
+    TRACK_STORAGE_VERSION,
+)
+
+STEP_PRODUCT = "product"
+STEP_SUBSCRIPTION = "subscription"
+STEP_PUSH = "push"
+
+
+class RoyalMailTrackProgress:
+    """Completed steps of track requests that have not finished yet.
+
+    A retry of a failed track request resumes after the last completed step
+    instead of repeating it, so a subscription is never created twice.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Init."""
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(
+            hass, TRACK_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.track"
+        )
+        self._progress: dict[str, dict[str, Any]] = {}
+
+    async def async_load(self) -> None:
+        """Load unfinished track requests, dropping abandoned ones."""
+        stored = await self._store.async_load() or {}
+        cutoff = dt_util.utcnow() - TRACK_PROGRESS_TTL
+        self._progress = {
+            reference: steps
+            for reference, steps in stored.get("progress", {}).items()
+            if (dt_util.parse_datetime(steps.get("started") or "") or cutoff) > cutoff
+        }
+
+    async def async_flush(self) -> None:
+        """Write any pending changes to disk now."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Remove the stored progress."""
+        await self._store.async_remove()
+
+    def steps(self, reference: str) -> dict[str, Any]:
+        """Return the completed steps of a track request and their results."""
+        progress = self._progress.get(reference, {})
+        return {step: value for step, value in progress.items() if step != "started"}
+
+    @callback
+    def async_complete_step(self, reference: str, step: str, result: Any) -> None:
+        """Record the result of a completed step."""
+        progress = self._progress.setdefault(
+            reference, {"started": dt_util.utcnow().isoformat()}
+        )
+        progress[step] = result
+        self._store.async_delay_save(self._data_to_save, TRACK_SAVE_DELAY)
+
+    @callback
+    def async_finish(self, reference: str) -> None:
+        """Forget a track request once every step has completed."""
+        if self._progress.pop(reference, None) is not None:
+            self._store.async_delay_save(self._data_to_save, TRACK_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return data for storage."""
+        return {"progress": self._progress}
@@ -0,0 +1,277 @@
+"""Royal Mail HTTP transports for recording and replaying API traffic."""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+from collections import deque
+from collections.abc import AsyncIterator, Mapping
+import json
+import logging
+import os
+import time
+from typing import Any
+
+from aiohttp import ClientConnectionError, ClientSession
+
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    ACCESS_TOKEN,
+    CONF_ACCESS_TOKEN,
+    CONF_FIRST_NAME,
+    CONF_GUID,
+    CONF_PASSWORD,
+    CONF_REFRESH_TOKEN,
+    CONF_USERNAME,
+    TRANSPORT_CASSETTE_MAX_BYTES,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# Values of these keys are replaced by placeholders wherever they appear
+SECRET_KEYS = (
+    CONF_USERNAME,
+    CONF_PASSWORD,
+    CONF_ACCESS_TOKEN,
+    CONF_REFRESH_TOKEN,
+    CONF_GUID,
+    CONF_FIRST_NAME,
+)
+RECORDED_HEADERS = ("Content-Type", "Retry-After")
+
+
+class Sanitizer:
+    """Replace account secrets with stable placeholders."""
+
+    def __init__(self, secrets: Mapping[str, Any] | None = None) -> None:
+        """Init."""
+        self._secrets: dict[str, str] = {}
+        self.learn(secrets or {})
+
+    def learn(self, values: Mapping[str, Any]) -> None:
+        """Remember the secret values found in a mapping."""
+        for key in SECRET_KEYS:
+            value = values.get(key)
+            if isinstance(value, str) and len(value) > 3:
+                self._secrets[value] = f"<{key}>"
+
+    def learn_headers(self, headers: Mapping[str, str] | None) -> None:
+        """Remember the access token sent with a request."""
+        if not headers:
+            return
+        bearer = headers.get("Authorization", "").removeprefix("Bearer ")
+        self.learn({CONF_ACCESS_TOKEN: bearer or headers.get(ACCESS_TOKEN)})
+
+    def __call__(self, text: str) -> str:
+        """Return text with every known secret replaced."""
+        # Longest first, so a secret containing another is replaced whole
+        for value in sorted(self._secrets, key=len, reverse=True):
+            text = text.replace(value, self._secrets[value])
+        return text
+
+
+class _RecordedContent:
+    """Minimal stand-in for a response content stream."""
+
+    def __init__(self, body: bytes) -> None:
+        """Init."""
+        self._body = body
+
+    async def iter_chunked(self, n: int) -> AsyncIterator[bytes]:
+        """Yield the body in chunks of n bytes."""
+        for start in range(0, len(self._body), n):
+            yield self._body[start : start + n]
+
+
+class RecordedResponse:
+    """Fully read response, as recorded or replayed from a cassette."""
+
+    def __init__(self, status: int, headers: dict[str, str], body: bytes) -> None:
+        """Init."""
+        self.status = status
+        self.headers = headers
+        self.content = _RecordedContent(body)
+        self._body = body
+
+    @classmethod
+    def from_entry(cls, entry: dict[str, Any]) -> RecordedResponse:
+        """Restore a response from a cassette entry."""
+        if "body_b64" in entry:
+            body = base64.b64decode(entry["body_b64"])
+        else:
+            body = entry.get("body", "").encode()
+        return cls(entry["status"], entry.get("headers", {}), body)
+
+    async def read(self) -> bytes:
+        """Return the body."""
+        return self._body
+
+    async def text(self, encoding: str = "utf-8") -> str:
+        """Return the body as text."""
+        return self._body.decode(encoding)
+
+    async def json(self, **kwargs: Any) -> Any:
+        """Return the decoded JSON body."""
+        if not self._body.strip():
+            return None
+        return json.loads(self._body)
+
+    def release(self) -> None:
+        """Release the response, a no-op as the body is already read."""
+
+
+class RecordingTransport:
+    """Make live requests and append sanitized copies to a cassette.
+
+    Each line of the cassette is one request and response, with the offset
+    and duration of the request so a replay can reproduce the timing.
+    Recording stops once the cassette reaches max_bytes.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        session: ClientSession,
+        path: str,
+        secrets: Mapping[str, Any] | None = None,
+        max_bytes: int = TRANSPORT_CASSETTE_MAX_BYTES,
+    ) -> None:
+        """Init."""
+        self.hass = hass
+        self.session = session
+        self.path = path
+        self.max_bytes = max_bytes
+        self.sanitize = Sanitizer(secrets)
+        self._started = time.monotonic()
+        # Read from the file on the first append, as it may already exist
+        self._size: int | None = None
+        self.full = False
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> RecordedResponse:
+        """Make a request and record it."""
+        started = time.monotonic()
+        resp = await self.session.request(method=method, url=url, **kwargs)
+        try:
+            body = await resp.read()
+        finally:
+            resp.release()
+        duration = time.monotonic() - started
+
+        headers = {
+            name: resp.headers[name]
+            for name in RECORDED_HEADERS
+            if name in resp.headers
+        }
+        request_json = kwargs.get("json")
+        self.sanitize.learn_headers(kwargs.get("headers"))
+        if isinstance(request_json, dict):
+            self.sanitize.learn(request_json)
+
+        entry: dict[str, Any] = {
+            "at": round(started - self._started, 3),
+            "duration": round(duration, 3),
+            "method": method,
+            "url": self.sanitize(url),
+            "status": resp.status,
+            "headers": headers,
+        }
+        if request_json is not None:
+            entry["json"] = json.loads(self.sanitize(json.dumps(request_json)))
+
+        if headers.get("Content-Type", "").startswith(("application/json", "text/")):
+            text = body.decode("utf-8", "replace")
+            try:
+                decoded = json.loads(text)
+            except ValueError:
+                decoded = None
+            if isinstance(decoded, dict):
+                self.sanitize.learn(decoded)
+            entry["body"] = self.sanitize(text)
+        else:
+            entry["body_b64"] = base64.b64encode(body).decode()
+
+        if not self.full:
+            await self.hass.async_add_executor_job(self._append, entry)
+        return RecordedResponse(resp.status, headers, body)
+
+    def _append(self, entry: dict[str, Any]) -> None:
+        """Append an entry to the cassette, unless it would grow too large."""
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode()
+        if self._size is None:
+            try:
+                self._size = os.path.getsize(self.path)
+            except FileNotFoundError:
+                self._size = 0
+        if self._size + len(line) > self.max_bytes:
+            if not self.full:
+                self.full = True
+                _LOGGER.warning(
+                    "Stopped recording Royal Mail API traffic, %s is full", self.path
+                )
+            return
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "ab") as cassette:
+            cassette.write(line)
+        self._size += len(line)
+
+
+class ReplayTransport:
+    """Serve responses from a cassette instead of the network.
+
+    Requests are matched by method and sanitized URL, in recorded order, and
+    the last response for a request is repeated once the others are used.
+    Each response is served at its recorded offset plus duration, divided by
+    speed and counted from the start of the replay, so the gaps between
+    requests are reproduced too. Responses are served immediately when
+    speed is 0.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        path: str,
+        speed: float = 1.0,
+        secrets: Mapping[str, Any] | None = None,
+    ) -> None:
+        """Init."""
+        self.hass = hass
+        self.path = path
+        self.speed = speed
+        self.sanitize = Sanitizer(secrets)
+        self._entries: dict[tuple[str, str], deque[dict[str, Any]]] | None = None
+        self._lock = asyncio.Lock()
+        self._started = time.monotonic()
+
+    async def request(self, method: str, url: str, **kwargs: Any) -> RecordedResponse:
+        """Return the next recorded response for a request."""
+        async with self._lock:
+            if self._entries is None:
+                self._entries = await self.hass.async_add_executor_job(self._load)
+
+        self.sanitize.learn_headers(kwargs.get("headers"))
+        key = (method.upper(), self.sanitize(url))
+        responses = self._entries.get(key)
+        if not responses:
+            raise ClientConnectionError(f"No recorded response for {key[0]} {key[1]}")
+        entry = responses.popleft() if len(responses) > 1 else responses[0]
+
+        if self.speed > 0:
+            due = self._started + (entry.get("at", 0) + entry["duration"]) / self.speed
+            if (delay := due - time.monotonic()) > 0:
+                await asyncio.sleep(delay)
+        return RecordedResponse.from_entry(entry)
+
+    def _load(self) -> dict[tuple[str, str], deque[dict[str, Any]]]:
+        """Read the cassette, grouping responses by request."""
+        entries: dict[tuple[str, str], deque[dict[str, Any]]] = {}
+        with open(self.path, encoding="utf-8") as cassette:
+            for line in cassette:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                key = (entry["method"].upper(), entry["url"])
+                entries.setdefault(key, deque()).append(entry)
+        _LOGGER.debug("Loaded %s recorded requests from %s", len(entries), self.path)
+        return entries
@@ -0,0 +1,53 @@
+"""Coalesced state writes for Royal Mail entities."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity import Entity
+
+from .const import STATE_WRITE_WINDOW
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class RoyalMailStateWriter:
+    """Write the state of changed entities once per short window.
+
+    A refresh can change the same entity several times in quick succession,
+    e.g. when a parcel lands and again when the aggregate is published.
+    Entities are only marked dirty, and each dirty entity is written once
+    with its latest state when the window closes.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Init."""
+        self.hass = hass
+        # Dicts keep entities in the order they first changed
+        self._dirty: dict[Entity, None] = {}
+        self._timer: asyncio.TimerHandle | None = None
+
+    @callback
+    def async_schedule(self, entity: Entity) -> None:
+        """Write an entity's state when the current window closes."""
+        self._dirty[entity] = None
+        if self._timer is None:
+            self._timer = self.hass.loop.call_later(
+                STATE_WRITE_WINDOW, self.async_flush
+            )
+
+    @callback
+    def async_flush(self) -> None:
+        """Write every dirty entity now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        dirty, self._dirty = self._dirty, {}
+        if len(dirty) > 1:
+            _LOGGER.debug("Writing %s coalesced Royal Mail states", len(dirty))
+        for entity in dirty:
+            # Entities removed since they changed have nothing to write
+            if entity.hass is not None and entity.entity_id is not None:
+                entity.async_write_ha_state()
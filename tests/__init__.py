@@ -0,0 +1 @@
+"""Tests for the Royal Mail integration."""
@@ -0,0 +1,78 @@
+"""Helpers shared by the Royal Mail tests."""
+
+import json
+
+from custom_components.royalmail.const import (
+    CONF_MAILPIECE_ID,
+    CONF_MAILPIECES,
+    CONF_MP_DETAILS,
+    IBM_CLIENT_ID,
+    MAILPIECE_URL,
+    MAILPIECES_URL,
+)
+from custom_components.royalmail.transport import RecordedResponse
+
+GUID = "guid"
+ITEMS_URL = MAILPIECES_URL.format(guid=GUID, ibmClientId=IBM_CLIENT_ID)
+
+
+def make_parcel(mail_piece_id: str, code: str = "EVNSR") -> dict:
+    """Return a parcel whose last event has a code."""
+    return {
+        CONF_MAILPIECE_ID: mail_piece_id,
+        "summary": {
+            "productName": "Royal Mail Tracked 24",
+            "statusDescription": code,
+        },
+        "events": [
+            {
+                "eventCode": code,
+                "eventName": code,
+                "eventDateTime": "2024-01-01T12:00:00Z",
+            }
+        ],
+    }
+
+
+class FakeHttp:
+    """HTTP session answering each URL with its queued responses.
+
+    The last response for a URL is repeated once the others are used.
+    """
+
+    def __init__(self) -> None:
+        """Init."""
+        self.responses: dict[str, list[tuple[int, dict, bytes]]] = {}
+        self.requests: list[str] = []
+        self.closed = False
+
+    def add(
+        self, url: str, status: int, body=None, headers: dict | None = None
+    ) -> None:
+        """Queue a response for a URL."""
+        raw = body if isinstance(body, bytes) else json.dumps(body or {}).encode()
+        self.responses.setdefault(url, []).append((status, headers or {}, raw))
+
+    def add_parcels(self, *parcels: dict) -> None:
+        """Queue a successful poll returning the parcels."""
+        ids = [{CONF_MAILPIECE_ID: parcel[CONF_MAILPIECE_ID]} for parcel in parcels]
+        self.add(ITEMS_URL, 200, {CONF_MP_DETAILS: ids})
+        for parcel in parcels:
+            self.add(
+                MAILPIECE_URL.format(mailPieceId=parcel[CONF_MAILPIECE_ID]),
+                200,
+                {CONF_MAILPIECES: parcel},
+            )
+
+    async def request(self, method: str, url: str, **kwargs) -> RecordedResponse:
+        """Return the next response for a URL, or a 404."""
+        self.requests.append(url)
+        queued = self.responses.get(url)
+        if not queued:
+            return RecordedResponse(404, {}, b"{}")
+        status, headers, body = queued.pop(0) if len(queued) > 1 else queued[0]
+        return RecordedResponse(status, headers, body)
+
+    async def close(self) -> None:
+        """Close the session, like the connection pool it stands in for."""
+        self.closed = True
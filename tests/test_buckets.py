@@ -0,0 +1,67 @@
+"""Tests for the Royal Mail status buckets."""
+
+from custom_components.royalmail.buckets import (
+    BUCKETS,
+    RoyalMailStatusBuckets,
+    parcel_bucket,
+)
+from custom_components.royalmail.const import (
+    BUCKET_DELIVERED,
+    BUCKET_DUE_TODAY,
+    BUCKET_IN_TRANSIT,
+)
+
+
+def _parcel(event_code: str) -> dict:
+    """Return a parcel whose last event has the given code."""
+    return {"events": [{"eventCode": event_code}]}
+
+
+def test_parcel_bucket() -> None:
+    """Test parcels are classified by their last event."""
+    assert parcel_bucket(_parcel("EVGPD")) == BUCKET_DUE_TODAY
+    assert parcel_bucket(_parcel("EVKSP")) == BUCKET_DELIVERED
+    assert parcel_bucket(_parcel("EVNSR")) == BUCKET_IN_TRANSIT
+    assert parcel_bucket(None) == BUCKET_IN_TRANSIT
+
+
+def test_moves_changed_parcels() -> None:
+    """Test parcels move between buckets as their status changes."""
+    buckets = RoyalMailStatusBuckets()
+    first = _parcel("EVNSR")
+    second = _parcel("EVGPD")
+    buckets.update({"A": first, "B": second})
+    assert buckets.ids(BUCKET_IN_TRANSIT) == ["A"]
+    assert buckets.ids(BUCKET_DUE_TODAY) == ["B"]
+
+    buckets.update({"A": _parcel("EVGPD"), "B": second})
+    assert buckets.count(BUCKET_IN_TRANSIT) == 0
+    assert buckets.ids(BUCKET_DUE_TODAY) == ["B", "A"]
+
+    buckets.update({"A": _parcel("EVKSP")})
+    assert buckets.ids(BUCKET_DUE_TODAY) == []
+    assert buckets.ids(BUCKET_DELIVERED) == ["A"]
+    assert sum(buckets.count(bucket) for bucket in BUCKETS) == 1
+
+
+def test_versions_change_with_contents() -> None:
+    """Test only the buckets whose contents changed get a new version."""
+    buckets = RoyalMailStatusBuckets()
+    parcel = _parcel("EVNSR")
+    buckets.update({"A": parcel})
+    versions = dict(buckets.versions)
+    assert versions[BUCKET_IN_TRANSIT] == 1
+
+    # The same object is skipped, a new one in the same bucket is not a move
+    buckets.update({"A": parcel})
+    buckets.update({"A": _parcel("EVORI")})
+    assert buckets.versions == versions
+
+    buckets.update({"A": _parcel("EVGPD")})
+    assert buckets.versions[BUCKET_IN_TRANSIT] == versions[BUCKET_IN_TRANSIT] + 1
+    assert buckets.versions[BUCKET_DUE_TODAY] == versions[BUCKET_DUE_TODAY] + 1
+    assert buckets.versions[BUCKET_DELIVERED] == versions[BUCKET_DELIVERED]
+
+    buckets.update({})
+    assert buckets.versions[BUCKET_DUE_TODAY] == versions[BUCKET_DUE_TODAY] + 2
+    assert buckets.count(BUCKET_DUE_TODAY) == 0
@@ -0,0 +1,92 @@
+"""Tests for the Royal Mail API client and command line."""
+
+import argparse
+import asyncio
+import io
+import json
+
+import pytest
+
+from custom_components.royalmail.cli import _async_work
+from custom_components.royalmail.client import InvalidAuth, RoyalMailClient
+from custom_components.royalmail.const import MAILPIECE_URL, TOKENS_URL
+from custom_components.royalmail.ratelimit import HostBackoff
+from custom_components.royalmail.transport import RecordedResponse
+
+
+def _response(status: int, body: dict | None = None) -> RecordedResponse:
+    """Return a response with a JSON body."""
+    return RecordedResponse(status, {}, json.dumps(body or {}).encode())
+
+
+class FakeApi:
+    """Session that accepts one access token and issues the next on refresh."""
+
+    def __init__(self) -> None:
+        """Init."""
+        self.valid = "token-1"
+        self.refreshes = 0
+
+    async def request(self, method: str, url: str, headers=None, **kwargs):
+        """Answer a token or mail piece request."""
+        if url == TOKENS_URL:
+            self.refreshes += 1
+            self.valid = f"token-{self.refreshes + 1}"
+            return _response(200, {"access_token": self.valid})
+        await asyncio.sleep(0)
+        if headers["Authorization"] != f"Bearer {self.valid}":
+            return _response(401)
+        return _response(200, {"mailPieces": {"mailPieceId": url}})
+
+
+async def test_expired_token_is_refreshed_once() -> None:
+    """Test concurrent requests with an expired token share one refresh."""
+    api = FakeApi()
+    client = RoyalMailClient(api, {"access_token": "expired", "refresh_token": "r"})
+
+    parcels = await asyncio.gather(
+        client.async_get_mailpiece("A"), client.async_get_mailpiece("B")
+    )
+
+    assert api.refreshes == 1
+    assert parcels[0] == {"mailPieceId": MAILPIECE_URL.format(mailPieceId="A")}
+    assert client.access_token == "token-2"
+
+
+async def test_rejected_refresh_raises() -> None:
+    """Test a request still rejected after refreshing fails authentication."""
+
+    class Rejecting(FakeApi):
+        async def request(self, method: str, url: str, headers=None, **kwargs):
+            if url == TOKENS_URL:
+                return await super().request(method, url, headers, **kwargs)
+            return _response(401)
+
+    client = RoyalMailClient(Rejecting(), {"access_token": "expired"})
+    with pytest.raises(InvalidAuth):
+        await client.async_get_mailpiece("A")
+
+
+async def test_worker_survives_unexpected_errors() -> None:
+    """Test every reference gets a line when a lookup raises unexpectedly."""
+
+    class Client:
+        async def async_get_mailpiece(self, mail_piece_id: str) -> dict:
+            if mail_piece_id == "BAD":
+                raise ValueError("Malformed body")
+            return {"events": [{"eventCode": "EVKSP"}]}
+
+    queue: asyncio.Queue[str | None] = asyncio.Queue()
+    for reference in ("A", "BAD", "C", None):
+        queue.put_nowait(reference)
+    out = io.StringIO()
+    args = argparse.Namespace(retries=0, full=False)
+
+    failures = await _async_work(queue, Client(), HostBackoff(), args, out)
+
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [line["mail_piece_id"] for line in lines] == ["A", "BAD", "C"]
+    assert "ValueError" in lines[1]["error"]
+    assert lines[2]["status"] == "delivered"
+    assert failures == 1
+    await asyncio.wait_for(queue.join(), 1)
@@ -0,0 +1,71 @@
+"""Tests for the Royal Mail config flow."""
+
+import json
+from unittest.mock import patch
+
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant
+from homeassistant.data_entry_flow import FlowResultType
+import pytest
+
+from custom_components.royalmail.const import (
+    CONF_ACCESS_TOKEN,
+    CONF_DEVICE_ID,
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    DOMAIN,
+    TOKENS_URL,
+)
+from custom_components.royalmail.scheduler import async_get_scheduler
+from custom_components.royalmail.tokens import RoyalMailTokenStore
+from custom_components.royalmail.transport import RecordedResponse
+
+USER_INPUT = {CONF_USERNAME: "someone@example.com", CONF_PASSWORD: "hunter2"}
+
+
+class FakeLogin:
+    """Session issuing tokens to every login, recording the device ids."""
+
+    def __init__(self) -> None:
+        """Init."""
+        self.device_ids: list[str] = []
+
+    async def request(self, method: str, url: str, **kwargs) -> RecordedResponse:
+        """Return tokens for a login."""
+        assert url == TOKENS_URL
+        self.device_ids.append(kwargs["json"][CONF_DEVICE_ID])
+        body = {CONF_ACCESS_TOKEN: f"token-{len(self.device_ids)}"}
+        return RecordedResponse(200, {}, json.dumps(body).encode())
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable the integration."""
+    yield
+
+
+async def test_new_account_keeps_the_validating_login(hass: HomeAssistant) -> None:
+    """Test setup uses the tokens and device id of the login that validated."""
+    login = FakeLogin()
+    async_get_scheduler(hass).interactive_session = login
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    with patch(
+        "custom_components.royalmail.entry.async_setup_entry", return_value=True
+    ):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], USER_INPUT
+        )
+        await hass.async_block_till_done()
+
+    assert result["type"] is FlowResultType.CREATE_ENTRY
+    assert len(login.device_ids) == 1
+    entry = hass.config_entries.async_entries(DOMAIN)[0]
+
+    token_store = RoyalMailTokenStore(hass, entry.entry_id)
+    token_store.async_migrate_entry(entry)
+    assert token_store.tokens[CONF_ACCESS_TOKEN] == "token-1"
+    assert token_store.async_get_device_id() == login.device_ids[0]
+    assert entry.data == USER_INPUT
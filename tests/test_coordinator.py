@@ -0,0 +1,123 @@
+"""Tests for the Royal Mail parcels coordinator."""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.royalmail.const import (
+    API_HOST,
+    CONF_ACCESS_TOKEN,
+    CONF_GUID,
+    CONF_MP_DETAILS,
+    CONF_STALE_SINCE,
+    DOMAIN,
+    UPDATE_INTERVAL,
+)
+from custom_components.royalmail.coordinator import (
+    RoyalMaiMailPiecesCoordinator,
+    TokenManager,
+)
+from custom_components.royalmail.ratelimit import RateLimitedSession
+from custom_components.royalmail.scheduler import async_get_scheduler
+
+from .common import GUID, ITEMS_URL, FakeHttp, make_parcel
+
+@pytest.fixture(autouse=True)
+def no_poll_stagger():
+    """Run polls back to back."""
+    with patch("custom_components.royalmail.scheduler.POLL_STAGGER", timedelta(0)):
+        yield
+
+
+@pytest.fixture
+def http() -> FakeHttp:
+    """Return the fake Royal Mail API."""
+    return FakeHttp()
+
+
+@pytest.fixture
+async def coordinator(
+    hass: HomeAssistant, http: FakeHttp
+) -> RoyalMaiMailPiecesCoordinator:
+    """Return a coordinator polling the fake API through the shared limiter."""
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+    scheduler = async_get_scheduler(hass)
+    session = RateLimitedSession(http, scheduler.limiter, scheduler.backoff)
+    token_manager = TokenManager(
+        hass, session, {CONF_ACCESS_TOKEN: "token", CONF_GUID: GUID}
+    )
+    coordinator = RoyalMaiMailPiecesCoordinator(
+        hass, session, entry, token_manager, session
+    )
+    await coordinator.history.async_load()
+    await coordinator.stats.async_load()
+    return coordinator
+
+
+async def test_serves_stale_data_during_an_outage(
+    coordinator: RoyalMaiMailPiecesCoordinator, http: FakeHttp
+) -> None:
+    """Test the last good data is served, marked stale, while the API fails."""
+    http.add_parcels(make_parcel("A"))
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    parcel = coordinator.data[CONF_MP_DETAILS]["A"]
+    assert coordinator.data[CONF_STALE_SINCE] is None
+
+    http.responses.clear()
+    http.add(ITEMS_URL, 503)
+    await coordinator.async_refresh()
+
+    assert coordinator.last_update_success
+    stale = coordinator.data[CONF_MP_DETAILS]["A"]
+    assert stale[CONF_STALE_SINCE] is not None
+    assert coordinator.data[CONF_STALE_SINCE] is not None
+    assert stale["events"] == parcel["events"]
+    # Never polls more often than usual while the host backs off
+    assert coordinator.update_interval == UPDATE_INTERVAL
+
+
+async def test_stale_polls_wait_for_retry_after(
+    coordinator: RoyalMaiMailPiecesCoordinator, http: FakeHttp
+) -> None:
+    """Test a long Retry-After delays the next poll beyond the usual interval."""
+    http.add_parcels(make_parcel("A"))
+    await coordinator.async_refresh()
+
+    http.responses.clear()
+    http.add(ITEMS_URL, 429, headers={"Retry-After": "7200"})
+    await coordinator.async_refresh()
+
+    assert coordinator.data[CONF_STALE_SINCE] is not None
+    assert coordinator.scheduler.backoff.remaining(API_HOST) > 7100
+    assert coordinator.update_interval > timedelta(seconds=7100)
+
+
+async def test_refreshing_one_parcel_notifies_only_its_listeners(
+    coordinator: RoyalMaiMailPiecesCoordinator, http: FakeHttp
+) -> None:
+    """Test a single refresh reaches its parcel and the summaries, not everyone."""
+    http.add_parcels(make_parcel("A"), make_parcel("B"))
+    await coordinator.async_refresh()
+
+    calls: list[str] = []
+    coordinator.async_add_listener(lambda: calls.append("all"))
+    coordinator.async_add_parcel_listener("A", lambda parcel: calls.append("A"))
+    coordinator.async_add_parcel_listener("B", lambda parcel: calls.append("B"))
+    remove = coordinator.async_add_summary_listener(lambda: calls.append("summary"))
+
+    http.responses.clear()
+    http.add_parcels(make_parcel("A", "EVKSP"))
+    parcel = await coordinator.async_refresh_mailpiece("A")
+
+    assert calls == ["A", "summary"]
+    assert coordinator.data[CONF_MP_DETAILS]["A"] is parcel
+    assert coordinator.buckets.count("delivered") == 1
+
+    remove()
+    await coordinator.async_refresh_mailpiece("A")
+    assert calls == ["A", "summary", "A"]
@@ -0,0 +1,131 @@
+"""Tests for the Royal Mail history export."""
+
+import csv
+from datetime import datetime, timezone
+import json
+
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.royalmail.const import (
+    CONF_EVENTCODE,
+    CONF_EVENTDATETIME,
+    CONF_EVENTS,
+    CONF_PRODUCT_NAME,
+    CONF_SUMMARY,
+    EXPORT_FORMAT_CSV,
+    EXPORT_FORMAT_JSONL,
+)
+from custom_components.royalmail.export import async_export_rows, iter_history_rows
+from custom_components.royalmail.history import RoyalMailEventHistory
+
+
+def make_mail_piece(product: str, *events: tuple[str, str]) -> dict:
+    """Return a mail piece with events given oldest first as (code, time)."""
+    return {
+        CONF_SUMMARY: {CONF_PRODUCT_NAME: product},
+        CONF_EVENTS: [
+            {CONF_EVENTCODE: code, CONF_EVENTDATETIME: when}
+            for code, when in reversed(events)
+        ],
+    }
+
+
+@pytest.fixture
+async def history(hass: HomeAssistant) -> RoyalMailEventHistory:
+    """Return a history of two delivered parcels and one in transit."""
+    history = RoyalMailEventHistory(hass, "entry")
+    await history.async_load()
+    history.async_merge(
+        "A",
+        make_mail_piece(
+            "Royal Mail Tracked 24",
+            ("EVNSR", "2024-01-01T10:00:00+00:00"),
+            ("EVKSP", "2024-01-02T10:00:00+00:00"),
+        ),
+    )
+    history.async_merge(
+        "B",
+        make_mail_piece(
+            "Royal Mail Tracked 48", ("EVKSP", "2024-01-03T10:00:00+00:00")
+        ),
+    )
+    history.async_merge(
+        "C",
+        make_mail_piece(
+            "royal mail tracked 24", ("EVNSR", "2024-01-04T10:00:00+00:00")
+        ),
+    )
+    return history
+
+
+def _ids(rows) -> list[tuple[str, str]]:
+    """Return the mail piece and event code of each row."""
+    return [(row["mail_piece_id"], row[CONF_EVENTCODE]) for row in rows]
+
+
+async def test_filters(history: RoyalMailEventHistory) -> None:
+    """Test rows are filtered by date range, category and product."""
+    assert len(list(iter_history_rows("entry", history))) == 4
+
+    start = datetime(2024, 1, 2, tzinfo=timezone.utc)
+    end = datetime(2024, 1, 4, tzinfo=timezone.utc)
+    assert _ids(iter_history_rows("entry", history, start, end)) == [
+        ("A", "EVKSP"),
+        ("B", "EVKSP"),
+    ]
+    assert _ids(iter_history_rows("entry", history, categories=["delivered"])) == [
+        ("A", "EVKSP"),
+        ("B", "EVKSP"),
+    ]
+
+
+@pytest.mark.parametrize(
+    "product", ["Tracked 24", " TRACKED  24 ", "Royal Mail Tracked 24"]
+)
+async def test_product_matches_words_of_the_name(
+    history: RoyalMailEventHistory, product: str
+) -> None:
+    """Test products match like query_parcels, on words of the API's name."""
+    rows = list(iter_history_rows("entry", history, product=product))
+    assert _ids(rows) == [("A", "EVNSR"), ("A", "EVKSP"), ("C", "EVNSR")]
+    assert rows[0]["config_entry_id"] == "entry"
+    assert rows[0]["category"] == "in_transit"
+    assert rows[0]["product"] == "Royal Mail Tracked 24"
+
+
+@pytest.mark.parametrize("export_format", [EXPORT_FORMAT_CSV, EXPORT_FORMAT_JSONL])
+async def test_export_rows(
+    hass: HomeAssistant,
+    history: RoyalMailEventHistory,
+    tmp_path,
+    export_format: str,
+) -> None:
+    """Test every row is written and only the complete file is kept."""
+    path = tmp_path / f"export.{export_format}"
+    count = await async_export_rows(
+        hass, iter_history_rows("entry", history), str(path), export_format
+    )
+
+    assert count == 4
+    assert [file.name for file in tmp_path.iterdir()] == [path.name]
+    with open(path, encoding="utf-8", newline="") as export:
+        if export_format == EXPORT_FORMAT_CSV:
+            rows = list(csv.DictReader(export))
+        else:
+            rows = [json.loads(line) for line in export]
+    assert _ids(rows) == _ids(iter_history_rows("entry", history))
+
+
+async def test_export_does_not_share_a_file(
+    hass: HomeAssistant, history: RoyalMailEventHistory, tmp_path
+) -> None:
+    """Test an export to a path already being written fails."""
+    path = tmp_path / "export.csv"
+    (tmp_path / "export.csv.tmp").write_text("in progress")
+
+    with pytest.raises(FileExistsError):
+        await async_export_rows(
+            hass, iter_history_rows("entry", history), str(path), EXPORT_FORMAT_CSV
+        )
+    assert (tmp_path / "export.csv.tmp").read_text() == "in progress"
@@ -0,0 +1,93 @@
+"""Tests for the Royal Mail event history."""
+
+from datetime import datetime, timedelta, timezone
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.royalmail.const import (
+    CONF_EVENTCODE,
+    CONF_EVENTDATETIME,
+    CONF_EVENTNAME,
+    CONF_EVENTS,
+    CONF_PRODUCT_NAME,
+    CONF_SUMMARY,
+    HISTORY_MAX_EVENTS,
+)
+from custom_components.royalmail.history import RoyalMailEventHistory
+
+MAIL_PIECE_ID = "AB123456789GB"
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_event(index: int, code: str = "EVNRT") -> dict:
+    """Return an event a number of hours after the start."""
+    return {
+        CONF_EVENTCODE: code,
+        CONF_EVENTNAME: f"Event {index}",
+        CONF_EVENTDATETIME: (START + timedelta(hours=index)).isoformat(),
+    }
+
+
+def make_mail_piece(*indexes: int) -> dict:
+    """Return a mail piece with its events newest first, as the API does."""
+    return {
+        CONF_SUMMARY: {CONF_PRODUCT_NAME: "Tracked 24"},
+        CONF_EVENTS: [make_event(index) for index in sorted(indexes, reverse=True)],
+    }
+
+
+async def test_merge_appends_only_new_events(hass: HomeAssistant) -> None:
+    """Test merging a poll twice records each event once, oldest first."""
+    history = RoyalMailEventHistory(hass, "entry")
+    await history.async_load()
+    assert history.empty
+
+    new = history.async_merge(MAIL_PIECE_ID, make_mail_piece(0, 1))
+    assert [event[CONF_EVENTNAME] for event in new] == ["Event 0", "Event 1"]
+
+    new = history.async_merge(MAIL_PIECE_ID, make_mail_piece(0, 1, 2))
+    assert [event[CONF_EVENTNAME] for event in new] == ["Event 2"]
+    assert history.async_merge(MAIL_PIECE_ID, make_mail_piece(0, 1, 2)) == []
+
+    assert history.product(MAIL_PIECE_ID) == "Tracked 24"
+    assert [
+        event[CONF_EVENTNAME] for event in history.iter_events(MAIL_PIECE_ID)
+    ] == ["Event 0", "Event 1", "Event 2"]
+
+
+async def test_trimmed_events_are_not_added_again(hass: HomeAssistant) -> None:
+    """Test events dropped by trimming stay out after a reload."""
+    indexes = range(HISTORY_MAX_EVENTS + 5)
+    history = RoyalMailEventHistory(hass, "entry")
+    await history.async_load()
+    history.async_merge(MAIL_PIECE_ID, make_mail_piece(*indexes))
+    history.async_compact()
+    assert len(list(history.iter_events(MAIL_PIECE_ID))) == HISTORY_MAX_EVENTS
+    await history.async_flush()
+
+    reloaded = RoyalMailEventHistory(hass, "entry")
+    await reloaded.async_load()
+    assert reloaded.async_merge(MAIL_PIECE_ID, make_mail_piece(*indexes)) == []
+
+    new = reloaded.async_merge(
+        MAIL_PIECE_ID, make_mail_piece(*indexes, HISTORY_MAX_EVENTS + 5)
+    )
+    assert [event[CONF_EVENTNAME] for event in new] == [
+        f"Event {HISTORY_MAX_EVENTS + 5}"
+    ]
+    events = list(reloaded.iter_events(MAIL_PIECE_ID))
+    assert events[0][CONF_EVENTNAME] == "Event 5"
+
+
+async def test_compact_only_trims_oversized_items(hass: HomeAssistant) -> None:
+    """Test compacting leaves histories within the limits untouched."""
+    history = RoyalMailEventHistory(hass, "entry")
+    await history.async_load()
+    history.async_merge("short", make_mail_piece(0, 1))
+    history.async_merge(MAIL_PIECE_ID, make_mail_piece(*range(HISTORY_MAX_EVENTS)))
+
+    assert not history._compact()
+    history.async_merge(MAIL_PIECE_ID, make_mail_piece(HISTORY_MAX_EVENTS))
+    assert history._compact()
+    assert not history._compact()
+    assert len(list(history.iter_events("short"))) == 2
@@ -0,0 +1,58 @@
+"""Tests for the Royal Mail image cache."""
+
+import asyncio
+
+from homeassistant.core import HomeAssistant
+
+from custom_components.royalmail.imagecache import RoyalMailImageCache
+
+
+def _download(image: bytes, downloads: list[bytes]):
+    """Return a download streaming the image in two chunks."""
+
+    async def download():
+        downloads.append(image)
+        await asyncio.sleep(0)
+        yield image[:2]
+        await asyncio.sleep(0)
+        yield image[2:]
+
+    return download
+
+
+async def test_cache_hits_and_evicts(hass: HomeAssistant, tmp_path) -> None:
+    """Test images are downloaded once and the oldest is evicted when full."""
+    cache = RoyalMailImageCache(hass, str(tmp_path), max_bytes=8)
+    downloads: list[bytes] = []
+
+    assert await cache.async_get("a", _download(b"aaaa", downloads)) == b"aaaa"
+    assert await cache.async_get("a", _download(b"aaaa", downloads)) == b"aaaa"
+    assert await cache.async_get("b", _download(b"bbbb", downloads)) == b"bbbb"
+    assert await cache.async_get("c", _download(b"cccc", downloads)) == b"cccc"
+    assert downloads == [b"aaaa", b"bbbb", b"cccc"]
+    assert len(list(tmp_path.iterdir())) == 2
+
+    assert await cache.async_get("a", _download(b"aaaa", downloads)) == b"aaaa"
+    assert downloads[-1] == b"aaaa"
+    assert not cache._locks
+    assert not cache._lock_users
+
+
+async def test_concurrent_downloads_survive_eviction(
+    hass: HomeAssistant, tmp_path
+) -> None:
+    """Test images evicted by each other's downloads are still returned."""
+    cache = RoyalMailImageCache(hass, str(tmp_path), max_bytes=4)
+    downloads: list[bytes] = []
+    images = [bytes([ord("a") + i]) * 4 for i in range(6)]
+
+    results = await asyncio.gather(
+        *(
+            cache.async_get(image.decode(), _download(image, downloads))
+            for image in images
+        )
+    )
+
+    assert results == images
+    assert len(list(tmp_path.iterdir())) == 1
+    assert not cache._locks
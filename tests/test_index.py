@@ -0,0 +1,115 @@
+"""Tests for the Royal Mail parcel index."""
+
+from datetime import date
+
+from custom_components.royalmail.const import (
+    CONF_DESTINATION_COUNTRY,
+    CONF_EVENTCODE,
+    CONF_EVENTDATETIME,
+    CONF_EVENTS,
+    CONF_LOCATION_NAME,
+    CONF_PRODUCT_NAME,
+    CONF_SUMMARY,
+)
+from custom_components.royalmail.index import (
+    RoyalMailParcelIndex,
+    normalize,
+    product_matches,
+)
+
+
+def make_parcel(
+    product: str,
+    code: str = "EVNSR",
+    location: str = "Swindon MC",
+    started: str = "2024-01-01",
+) -> dict:
+    """Return a parcel accepted on a day whose last event has a code."""
+    return {
+        CONF_SUMMARY: {
+            CONF_PRODUCT_NAME: product,
+            CONF_DESTINATION_COUNTRY: "United Kingdom",
+        },
+        CONF_EVENTS: [
+            {
+                CONF_EVENTCODE: code,
+                CONF_EVENTDATETIME: f"{started}T18:00:00+00:00",
+                CONF_LOCATION_NAME: location,
+            },
+            {CONF_EVENTCODE: "EVAIE", CONF_EVENTDATETIME: f"{started}T12:00:00+00:00"},
+        ],
+    }
+
+
+def test_normalize() -> None:
+    """Test keys ignore case and extra spaces, and blanks are not keys."""
+    assert normalize("  Tracked  24 ") == "tracked 24"
+    assert normalize("   ") is None
+    assert normalize(None) is None
+
+
+def test_product_matches() -> None:
+    """Test a product matches whole words of its name."""
+    assert product_matches("tracked 24", "royal mail tracked 24")
+    assert product_matches("royal mail tracked 24", "royal mail tracked 24")
+    assert not product_matches("tracked 2", "royal mail tracked 24")
+    assert not product_matches("tracked 24", "royal mail tracked 48")
+    assert not product_matches("tracked 24", None)
+
+
+def test_query_by_api_product_name() -> None:
+    """Test a short product name finds parcels named in full by the API."""
+    index = RoyalMailParcelIndex()
+    index.update(
+        {
+            "A": make_parcel("Royal Mail Tracked 24"),
+            "B": make_parcel("Royal Mail Tracked 48"),
+            "C": make_parcel("Royal Mail Tracked 24 (Signed)"),
+        }
+    )
+
+    assert index.query(product="Tracked 24") == ["A", "C"]
+    assert index.query(product="royal mail tracked 48") == ["B"]
+    assert index.query(product="Tracked") == ["A", "B", "C"]
+    assert index.query(product="Tracked 4") == []
+
+
+def test_query() -> None:
+    """Test queries match every given filter, ignoring case."""
+    index = RoyalMailParcelIndex()
+    index.update(
+        {
+            "A": make_parcel("Tracked 24", "EVGPD"),
+            "B": make_parcel("Tracked 48", started="2024-01-03"),
+            "C": make_parcel("tracked 24", location="Leeds MC", started="2024-01-05"),
+        }
+    )
+
+    assert index.query() == ["A", "B", "C"]
+    assert index.query(product="TRACKED 24") == ["A", "C"]
+    assert index.query(categories=["out_for_delivery", "delivered"]) == ["A"]
+    assert index.query(product="Tracked 24", location=" leeds mc") == ["C"]
+    assert index.query(destination="united kingdom") == ["A", "B", "C"]
+    assert index.query(product="Special Delivery") == []
+    assert index.query(
+        started_from=date(2024, 1, 2), started_until=date(2024, 1, 5)
+    ) == ["B", "C"]
+
+
+def test_reindex_and_remove() -> None:
+    """Test changed parcels move between keys and removed ones leave no keys."""
+    index = RoyalMailParcelIndex()
+    parcel = make_parcel("Tracked 24")
+    index.update({"A": parcel, "B": make_parcel("Tracked 48")})
+
+    index.update({"A": make_parcel("Tracked 24", "EVKSP"), "B": None})
+    assert index.query(categories=["in_transit"]) == []
+    assert index.query(categories=["delivered"]) == ["A"]
+    # A parcel without data stays indexed, without its product
+    assert index.query() == ["A", "B"]
+    assert index.query(product="Tracked 48") == []
+
+    index.update({})
+    assert index.query() == []
+    assert index.query(product="Tracked 24") == []
+    assert not any(index._index.values())
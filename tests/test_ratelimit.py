@@ -0,0 +1,229 @@
+"""Tests for the Royal Mail rate limiter and host backoff."""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+from aiohttp import ClientConnectionError
+import pytest
+
+from custom_components.royalmail.const import (
+    API_HOST,
+    BACKOFF_BASE,
+    BACKOFF_MAX,
+    MAILPIECE_URL,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    RATE_LIMIT_MIN_RATE,
+    RATE_LIMIT_RECOVERY,
+)
+from custom_components.royalmail.ratelimit import (
+    HostBackoff,
+    HostUnavailable,
+    RateLimitedSession,
+    RoyalMailRateLimiter,
+    parse_retry_after,
+)
+
+URL = MAILPIECE_URL.format(mailPieceId="AB123456789GB")
+
+
+class FakeResponse:
+    """Response with only a status and headers."""
+
+    def __init__(self, status: int, headers: dict[str, str] | None = None) -> None:
+        """Init."""
+        self.status = status
+        self.headers = headers or {}
+
+
+class FakeSession:
+    """Session that returns or raises queued results."""
+
+    def __init__(self, *results) -> None:
+        """Init."""
+        self.results = list(results)
+        self.requests: list[tuple[str, str, dict]] = []
+
+    async def request(self, method: str, url: str, **kwargs):
+        """Return the next queued result."""
+        self.requests.append((method, url, kwargs))
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [(None, None), ("", None), ("120", 120.0), ("-5", 0.0), ("soon", None)],
+)
+def test_parse_retry_after_seconds(value: str | None, expected: float | None) -> None:
+    """Test Retry-After given in seconds or not at all."""
+    assert parse_retry_after(value) == expected
+
+
+def test_parse_retry_after_http_date() -> None:
+    """Test Retry-After given as an HTTP date."""
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=90)
+    assert 85 <= parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 90
+
+    retry_at = datetime.now(timezone.utc) - timedelta(minutes=5)
+    assert parse_retry_after(format_datetime(retry_at, usegmt=True)) == 0.0
+
+
+async def test_burst_then_refill() -> None:
+    """Test requests beyond the burst wait for the bucket to refill."""
+    limiter = RoyalMailRateLimiter(rate=20, burst=2)
+    await limiter.async_acquire()
+    await limiter.async_acquire()
+
+    waiter = asyncio.ensure_future(limiter.async_acquire())
+    await asyncio.sleep(0)
+    assert not waiter.done()
+    await asyncio.wait_for(waiter, 1)
+
+
+async def test_interactive_requests_jump_the_queue() -> None:
+    """Test interactive waiters are served before background ones."""
+    limiter = RoyalMailRateLimiter(rate=10, burst=1)
+    await limiter.async_acquire()
+    order = []
+
+    async def acquire(name: str, priority: int) -> None:
+        await limiter.async_acquire(priority)
+        order.append(name)
+
+    await asyncio.gather(
+        acquire("background 1", PRIORITY_BACKGROUND),
+        acquire("background 2", PRIORITY_BACKGROUND),
+        acquire("interactive", PRIORITY_INTERACTIVE),
+    )
+    assert order == ["interactive", "background 1", "background 2"]
+
+
+async def test_cancelled_waiter_does_not_use_a_token() -> None:
+    """Test a cancelled waiter leaves the next token to the others."""
+    limiter = RoyalMailRateLimiter(rate=10, burst=1)
+    await limiter.async_acquire()
+
+    waiter = asyncio.ensure_future(limiter.async_acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+
+    await asyncio.wait_for(limiter.async_acquire(), 1)
+
+
+def test_rate_limited_halves_rate_down_to_minimum() -> None:
+    """Test each 429 halves the rate, never below the minimum."""
+    limiter = RoyalMailRateLimiter(rate=2.0)
+    limiter.async_rate_limited(0)
+    assert limiter.rate == 1.0
+    limiter.async_rate_limited(0)
+    assert limiter.rate == 0.5
+
+    for _ in range(20):
+        limiter.async_rate_limited(0)
+    assert limiter.rate == RATE_LIMIT_MIN_RATE
+
+
+def test_rate_recovers_while_requests_succeed() -> None:
+    """Test the rate climbs back to its maximum after a 429."""
+    limiter = RoyalMailRateLimiter(rate=1.0)
+    limiter.async_rate_limited(0)
+    limiter.async_succeeded()
+    assert limiter.rate == pytest.approx(0.5 + RATE_LIMIT_RECOVERY)
+
+    for _ in range(100):
+        limiter.async_succeeded()
+    assert limiter.rate == 1.0
+
+
+async def test_retry_after_pauses_every_request() -> None:
+    """Test no token is handed out before Retry-After has passed."""
+    limiter = RoyalMailRateLimiter(rate=100, burst=10)
+    loop = asyncio.get_running_loop()
+
+    limiter.async_rate_limited(0.2)
+    started = loop.time()
+    await asyncio.wait_for(limiter.async_acquire(), 1)
+    assert loop.time() - started >= 0.19
+
+
+def test_host_backoff_grows_and_resets() -> None:
+    """Test failures back a host off exponentially until it succeeds."""
+    backoff = HostBackoff()
+    assert backoff.remaining(API_HOST) == 0
+
+    first = backoff.async_failed(API_HOST)
+    assert BACKOFF_BASE / 2 <= first <= BACKOFF_BASE
+    assert 0 < backoff.remaining(API_HOST) <= first
+
+    second = backoff.async_failed(API_HOST)
+    assert BACKOFF_BASE <= second <= 2 * BACKOFF_BASE
+    assert backoff.remaining("other.example.com") == 0
+
+    backoff.async_succeeded(API_HOST)
+    assert backoff.remaining(API_HOST) == 0
+
+
+def test_host_backoff_is_capped() -> None:
+    """Test the backoff never exceeds its maximum."""
+    backoff = HostBackoff()
+    for _ in range(20):
+        delay = backoff.async_failed(API_HOST)
+    assert BACKOFF_MAX / 2 <= delay <= BACKOFF_MAX
+
+
+async def test_session_backs_off_after_server_error() -> None:
+    """Test a 5xx backs the host off and later requests are skipped."""
+    backoff = HostBackoff()
+    http = FakeSession(FakeResponse(503))
+    session = RateLimitedSession(http, RoyalMailRateLimiter(), backoff)
+
+    resp = await session.request("GET", URL)
+    assert resp.status == 503
+    assert "timeout" in http.requests[0][2]
+    assert backoff.remaining(API_HOST) > 0
+
+    with pytest.raises(HostUnavailable):
+        await session.request("GET", URL)
+    assert len(http.requests) == 1
+
+
+async def test_session_backs_off_after_connection_error() -> None:
+    """Test a connection error backs the host off and is raised."""
+    backoff = HostBackoff()
+    http = FakeSession(ClientConnectionError())
+    session = RateLimitedSession(http, RoyalMailRateLimiter(), backoff)
+
+    with pytest.raises(ClientConnectionError):
+        await session.request("GET", URL)
+    assert backoff.remaining(API_HOST) > 0
+
+
+async def test_session_slows_down_after_429() -> None:
+    """Test a 429 slows the shared limiter, success recovers it."""
+    limiter = RoyalMailRateLimiter(rate=20.0)
+    http = FakeSession(FakeResponse(429, {"Retry-After": "0"}), FakeResponse(200))
+    session = RateLimitedSession(http, limiter, HostBackoff())
+
+    assert (await session.request("GET", URL)).status == 429
+    assert limiter.rate == 10.0
+
+    assert (await session.request("GET", URL)).status == 200
+    assert limiter.rate == pytest.approx(10.0 + RATE_LIMIT_RECOVERY)
+
+
+async def test_session_backs_off_for_retry_after() -> None:
+    """Test a 429 holds the host off for its Retry-After."""
+    backoff = HostBackoff()
+    http = FakeSession(FakeResponse(429, {"Retry-After": "120"}))
+    session = RateLimitedSession(http, RoyalMailRateLimiter(), backoff)
+
+    assert (await session.request("GET", URL)).status == 429
+    assert 115 < backoff.remaining(API_HOST) <= 120
+    with pytest.raises(HostUnavailable):
+        await session.request("GET", URL)
@@ -0,0 +1,39 @@
+"""Tests for the Royal Mail account runtime."""
+
+import asyncio
+
+from homeassistant.core import HomeAssistant
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.royalmail.const import DOMAIN
+from custom_components.royalmail.runtime import RoyalMailRuntime
+from custom_components.royalmail.tokens import RoyalMailTokenStore
+
+
+async def test_cancelled_caller_leaves_tracking_running(hass: HomeAssistant) -> None:
+    """Test a caller leaving does not cancel the attempt the others await."""
+    entry = MockConfigEntry(domain=DOMAIN, data={})
+    entry.add_to_hass(hass)
+    runtime = RoyalMailRuntime(hass, entry, RoyalMailTokenStore(hass, entry.entry_id))
+    release = asyncio.Event()
+    attempts = 0
+
+    async def track_item(mail_piece_id: str) -> dict:
+        nonlocal attempts
+        attempts += 1
+        await release.wait()
+        return {"alias": mail_piece_id}
+
+    runtime._async_track_item = track_item
+    first = asyncio.ensure_future(runtime.async_track_item("A"))
+    second = asyncio.ensure_future(runtime.async_track_item("A"))
+    await asyncio.sleep(0)
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    release.set()
+    assert await second == {"alias": "A"}
+    assert attempts == 1
+    assert not runtime._tracking
@@ -0,0 +1,81 @@
+"""Tests for the scheduler shared by Royal Mail accounts."""
+
+import asyncio
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.royalmail.scheduler import async_get_scheduler
+
+
+async def test_cancelled_caller_leaves_shared_fetch_running(
+    hass: HomeAssistant,
+) -> None:
+    """Test a caller leaving does not cancel the fetch the others await."""
+    scheduler = async_get_scheduler(hass)
+    release = asyncio.Event()
+    fetches = 0
+
+    async def fetch() -> dict:
+        nonlocal fetches
+        fetches += 1
+        await release.wait()
+        return {"mailPieces": {"mailPieceId": "A"}}
+
+    first = asyncio.ensure_future(
+        scheduler.async_fetch_mailpiece("A", fetch, timedelta(0))
+    )
+    second = asyncio.ensure_future(
+        scheduler.async_fetch_mailpiece("A", fetch, timedelta(0))
+    )
+    await asyncio.sleep(0)
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    release.set()
+    assert await second == {"mailPieces": {"mailPieceId": "A"}}
+    assert fetches == 1
+    assert not scheduler._in_flight
+
+
+async def test_shared_fetch_failure_reaches_every_caller(
+    hass: HomeAssistant,
+) -> None:
+    """Test a failed fetch is raised to every caller and not kept."""
+    scheduler = async_get_scheduler(hass)
+
+    async def fetch() -> dict:
+        await asyncio.sleep(0)
+        raise ValueError("Malformed body")
+
+    results = await asyncio.gather(
+        scheduler.async_fetch_mailpiece("A", fetch),
+        scheduler.async_fetch_mailpiece("A", fetch),
+        return_exceptions=True,
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert "A" not in scheduler._mailpieces
+    assert not scheduler._in_flight
+
+
+async def test_pool_closes_when_the_last_account_unloads(
+    hass: HomeAssistant,
+) -> None:
+    """Test the connection pool is shared, closed and reopened on demand."""
+    scheduler = async_get_scheduler(hass)
+    scheduler.async_acquire()
+    scheduler.async_acquire()
+    pool = scheduler.client_session
+
+    await scheduler.async_release()
+    assert not pool.closed
+    await scheduler.async_release()
+    assert pool.closed
+
+    reopened = scheduler.client_session
+    assert reopened is not pool
+    assert not reopened.closed
+    await reopened.close()
@@ -0,0 +1,116 @@
+"""Tests for the Royal Mail sensors."""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.royalmail.const import (
+    API_HOST,
+    CONF_ACCESS_TOKEN,
+    CONF_GUID,
+    CONF_PASSWORD,
+    CONF_STALE_SINCE,
+    CONF_USERNAME,
+    DOMAIN,
+)
+from custom_components.royalmail.scheduler import async_get_scheduler
+
+from .common import GUID, ITEMS_URL, FakeHttp, make_parcel
+
+TOTAL = "sensor.royalmail_tracked_parcels"
+PARCEL = "sensor.royalmail_parcel_a"
+IN_TRANSIT = "sensor.royalmail_in_transit"
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):
+    """Enable the integration."""
+    yield
+
+
+@pytest.fixture(autouse=True)
+def no_poll_stagger():
+    """Run polls back to back."""
+    with patch("custom_components.royalmail.scheduler.POLL_STAGGER", timedelta(0)):
+        yield
+
+
+@pytest.fixture
+async def http(hass: HomeAssistant) -> FakeHttp:
+    """Return the fake Royal Mail API, set up with one account tracking A."""
+    http = FakeHttp()
+    http.add_parcels(make_parcel("A"))
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_USERNAME: "someone@example.com",
+            CONF_PASSWORD: "hunter2",
+            CONF_ACCESS_TOKEN: "token",
+            CONF_GUID: GUID,
+        },
+    )
+    entry.add_to_hass(hass)
+    with patch(
+        "custom_components.royalmail.scheduler.async_create_session",
+        return_value=http,
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+        yield http
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    assert http.closed
+
+
+async def _async_refresh(hass: HomeAssistant) -> None:
+    """Poll now, as a new cycle, and write the resulting states."""
+    entry = hass.config_entries.async_entries(DOMAIN)[0]
+    async_get_scheduler(hass)._mailpieces.clear()
+    await entry.runtime_data.coordinator.async_refresh()
+    async_get_scheduler(hass).state_writer.async_flush()
+    await hass.async_block_till_done()
+
+
+async def test_sensors_follow_availability(hass: HomeAssistant, http: FakeHttp) -> None:
+    """Test the summary sensors go unavailable when a poll fails and recover."""
+    assert hass.states.get(TOTAL).state == "1"
+    assert hass.states.get(IN_TRANSIT).state == "1"
+    assert hass.states.get(PARCEL).state != STATE_UNAVAILABLE
+
+    http.responses.clear()
+    http.add(ITEMS_URL, 200, b"not json")
+    await _async_refresh(hass)
+    assert hass.states.get(TOTAL).state == STATE_UNAVAILABLE
+    assert hass.states.get(IN_TRANSIT).state == STATE_UNAVAILABLE
+
+    http.responses.clear()
+    http.add_parcels(make_parcel("A"))
+    await _async_refresh(hass)
+    assert hass.states.get(TOTAL).state == "1"
+    assert hass.states.get(IN_TRANSIT).state == "1"
+
+
+async def test_sensors_show_stale_data_during_an_outage(
+    hass: HomeAssistant, http: FakeHttp
+) -> None:
+    """Test an outage keeps the sensors available, marked stale, until it ends."""
+    http.responses.clear()
+    http.add(ITEMS_URL, 503)
+    await _async_refresh(hass)
+
+    total = hass.states.get(TOTAL)
+    assert total.state == "1"
+    assert total.attributes[CONF_STALE_SINCE] is not None
+    assert hass.states.get(PARCEL).state != STATE_UNAVAILABLE
+
+    http.responses.clear()
+    http.add_parcels(make_parcel("A", "EVKSP"))
+    async_get_scheduler(hass).backoff.async_succeeded(API_HOST)
+    await _async_refresh(hass)
+
+    total = hass.states.get(TOTAL)
+    assert total.attributes[CONF_STALE_SINCE] is None
+    assert hass.states.get(IN_TRANSIT).state == "0"
@@ -0,0 +1,51 @@
+"""Tests for the Royal Mail delivery time statistics."""
+
+import random
+
+import pytest
+
+from custom_components.royalmail.const import STATS_RELATIVE_ACCURACY
+from custom_components.royalmail.stats import DurationSketch
+
+
+def test_empty_sketch() -> None:
+    """Test an empty sketch has no statistics."""
+    sketch = DurationSketch()
+    assert sketch.mean is None
+    assert sketch.quantile(0.5) is None
+    assert sketch.summary() == {
+        "count": 0,
+        "mean": None,
+        "p50": None,
+        "p90": None,
+        "p95": None,
+    }
+
+
+@pytest.mark.parametrize("q", [0.0, 0.5, 0.9, 0.95, 1.0])
+def test_quantiles_within_relative_accuracy(q: float) -> None:
+    """Test quantiles stay within the configured relative error."""
+    values = [random.uniform(3600, 14 * 24 * 3600) for _ in range(1000)]
+    sketch = DurationSketch()
+    for value in values:
+        sketch.add(value)
+
+    expected = sorted(values)[int(q * (len(values) - 1))]
+    assert sketch.quantile(q) == pytest.approx(
+        expected, rel=STATS_RELATIVE_ACCURACY * 1.001
+    )
+    assert sketch.count == len(values)
+    assert sketch.mean == pytest.approx(sum(values) / len(values))
+
+
+def test_round_trip() -> None:
+    """Test a stored sketch restores to the same statistics."""
+    sketch = DurationSketch()
+    for hours in (20, 24, 26, 48, 72):
+        sketch.add(hours * 3600)
+
+    restored = DurationSketch.from_dict(sketch.as_dict())
+    assert restored.buckets == sketch.buckets
+    assert restored.summary() == sketch.summary()
+    assert restored.summary()["count"] == 5
+    assert restored.summary()["mean"] == 38.0
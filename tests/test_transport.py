@@ -0,0 +1,109 @@
+"""Tests for the Royal Mail recording and replay transports."""
+
+import json
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+import pytest
+
+from custom_components.royalmail.const import ACCESS_TOKEN, MAILPIECE_URL
+from custom_components.royalmail.transport import (
+    RecordedResponse,
+    RecordingTransport,
+    ReplayTransport,
+    Sanitizer,
+)
+
+URL = MAILPIECE_URL.format(mailPieceId="AB123456789GB")
+SECRETS = {
+    "username": "someone@example.com",
+    "password": "hunter2hunter2",
+    "access_token": "abcdefghijklmnop",
+}
+
+
+class _Session:
+    """Session answering every request with the same JSON body."""
+
+    def __init__(self, body: dict) -> None:
+        """Init."""
+        self.body = json.dumps(body).encode()
+
+    async def request(self, method: str, url: str, **kwargs) -> RecordedResponse:
+        """Return the body."""
+        return RecordedResponse(200, {"Content-Type": "application/json"}, self.body)
+
+
+def test_sanitizer_replaces_known_secrets() -> None:
+    """Test secrets are replaced wherever they appear."""
+    sanitize = Sanitizer(SECRETS)
+    text = sanitize('{"user": "someone@example.com", "pw": "hunter2hunter2"}')
+    assert text == '{"user": "<username>", "pw": "<password>"}'
+
+
+def test_sanitizer_learns_tokens_and_headers() -> None:
+    """Test secrets found in responses and request headers are learned."""
+    sanitize = Sanitizer()
+    sanitize.learn({"refresh_token": "refresh-token-value", "guid": "ab"})
+    sanitize.learn_headers({"Authorization": "Bearer bearer-token-value"})
+    sanitize.learn_headers({ACCESS_TOKEN: "access-token-value"})
+
+    text = sanitize("refresh-token-value bearer-token-value access-token-value ab")
+    assert text == "<refresh_token> <access_token> <access_token> ab"
+
+
+def test_sanitizer_replaces_longest_first() -> None:
+    """Test a secret containing another is replaced whole."""
+    sanitize = Sanitizer({"username": "someone", "password": "someone-secret"})
+    assert sanitize("someone-secret someone") == "<password> <username>"
+
+
+async def test_recording_is_sanitized_and_capped(hass: HomeAssistant, tmp_path) -> None:
+    """Test recorded entries are sanitized and stop once the cassette is full."""
+    path = str(tmp_path / "cassettes" / "entry.jsonl")
+    body = {"access_token": "returned-token-value"}
+    recorder = RecordingTransport(hass, _Session(body), path, SECRETS, max_bytes=600)
+
+    resp = await recorder.request("POST", URL, json={"username": "someone@example.com"})
+    assert await resp.json() == body
+    with open(path, encoding="utf-8") as cassette:
+        entry = json.loads(cassette.readline())
+    assert entry["json"] == {"username": "<username>"}
+    assert json.loads(entry["body"]) == {"access_token": "<access_token>"}
+
+    for _ in range(5):
+        await recorder.request("GET", URL)
+    assert recorder.full
+    with open(path, "rb") as cassette:
+        assert len(cassette.read()) <= 600
+
+
+@pytest.mark.parametrize(("speed", "expected"), [(0, None), (10.0, 0.3)])
+async def test_replay_schedules_from_recorded_offset(
+    hass: HomeAssistant, tmp_path, speed: float, expected: float | None
+) -> None:
+    """Test replayed responses are served at their recorded offset."""
+    path = tmp_path / "entry.jsonl"
+    path.write_text(
+        json.dumps(
+            {
+                "at": 2.5,
+                "duration": 0.5,
+                "method": "GET",
+                "url": URL,
+                "status": 200,
+                "body": '{"mailPieces": {}}',
+            }
+        )
+        + "\n"
+    )
+    replay = ReplayTransport(hass, str(path), speed)
+
+    with patch("custom_components.royalmail.transport.asyncio.sleep") as sleep:
+        resp = await replay.request("GET", URL)
+
+    assert resp.status == 200
+    if expected is None:
+        sleep.assert_not_called()
+    else:
+        assert sleep.call_args[0][0] == pytest.approx(expected, abs=0.1)